@@ -0,0 +1,80 @@
+import threading
+from collections import Counter
+
+from student_index import normalize_student_no
+
+# Akademisyen Paneli için artımlı (materialized) log özetleri.
+# Her yenilemede yalnızca son görülen kayıttan sonraki loglar okunur; metrikler, teslim durumu
+# ve hata dağılımı log boyutundan bağımsız olarak bu sayaçlardan üretilir.
+
+
+def error_field(error):
+    # "Kalem 2: GTİP" -> "GTİP" (hata grafiği kalem numarasından bağımsız alan bazında sayar)
+    if "Kalem" in error:
+        parts = error.split(":")
+        if len(parts) > 1:
+            return parts[1].strip()
+    return error
+
+
+class LogAggregates:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, generation):
+        self.generation = generation
+        self.last_id = 0
+        self.attempts = Counter()          # ödev -> deneme sayısı
+        self.successes = Counter()         # ödev -> başarılı tescil sayısı
+        self.field_errors = {}             # ödev -> Counter(alan -> hata sayısı)
+        self.submitted = {}                # öğrenci_no -> set(ödev)
+
+    def add(self, record):
+        odev = record["odev_no"]
+        self.attempts[odev] += 1
+        if record["success"]:
+            self.successes[odev] += 1
+        if record["errors"]:
+            self.field_errors.setdefault(odev, Counter()).update(error_field(e) for e in record["errors"])
+        self.submitted.setdefault(normalize_student_no(record["student_no"]), set()).add(odev)
+        self.last_id = max(self.last_id, record["id"])
+
+    def refresh(self, store):
+        with self._lock:
+            generation = store.grades_generation()
+            if generation != self.generation:
+                # Yeniden notlandırma eski kayıtların sonuçlarını değiştirdi: baştan kur
+                self._reset(generation)
+            while True:
+                records = store.submissions_after(self.last_id)
+                if not records:
+                    break
+                for record in records:
+                    self.add(record)
+        return self
+
+    def assignments(self):
+        with self._lock:
+            return sorted(self.attempts)
+
+    def totals(self, odev=None):
+        with self._lock:
+            if odev is None:
+                return sum(self.attempts.values()), sum(self.successes.values())
+            return self.attempts.get(odev, 0), self.successes.get(odev, 0)
+
+    def error_counts(self, odev=None):
+        with self._lock:
+            if odev is not None:
+                return Counter(self.field_errors.get(odev, {}))
+            total = Counter()
+            for counts in self.field_errors.values():
+                total.update(counts)
+            return total
+
+    def has_submitted(self, student_no, odev=None):
+        odevs = self.submitted.get(normalize_student_no(student_no))
+        if not odevs:
+            return False
+        return odev is None or odev in odevs
@@ -1,16 +1,22 @@
+import math
+import secrets
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import os
 from datetime import datetime
-import json
+from log_store import day_range
+import auth
+import courses
+import grading
+import regrade
+import export
+import metrics
+import plagiarism
+import policy
+import render
 
 # Configuration
-EXCEL_FILE = "mail_merge_wide_3kalem.xlsx"
-LOG_FILE = "student_logs.json"
-LOGIN_LOG_FILE = "login_logs.json"
-ADMIN_PASSWORD = "trakya_gumruk"
-SYSTEM_LOCKED = False  # Sistemi öğrenci erişimine kapatmak için True yapın
+# Çalışma kitabı, log veritabanı ve yönetici şifresi derse özeldir (bkz. courses.py / courses.json).
+# Sistem kilidi ve ödev takvimi Akademisyen Paneli'nden değiştirilir (bkz. policy.py).
 
 # Page Config
 st.set_page_config(page_title="Trakya Üniversitesi - BİLGE Simülasyonu", layout="wide")
@@ -65,152 +71,502 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# Dersler süreç genelinde paylaşılır; her dersin verisi ilk erişimde yüklenir, boşta kalınca atılır.
+# Kayıt defteri kurulurken dersler arka planda ısıtılmaya başlar (bkz. courses.py).
+@st.cache_resource
+def get_courses():
+    registry = courses.CourseRegistry()
+    registry.warm_up()
+    return registry
+
+def current_course():
+    return get_courses().get(st.session_state.get('course_id'))
+
+# Giriş denemeleri süreç genelinde, oturum ve istemci adresi başına sınırlanır (bkz. auth.py).
+# Sınırı aşan denemeler log veritabanına yazılmadan reddedilir.
+@st.cache_resource
+def get_login_limiters():
+    return {"ogrenci": auth.RateLimiter("ogrenci", auth.STUDENT_LIMITS),
+            "yonetici": auth.RateLimiter("yonetici", auth.ADMIN_LIMITS)}
+
+def login_throttled(kind):
+    if 'limit_key' not in st.session_state:
+        st.session_state.limit_key = secrets.token_hex(8)
+    wait = get_login_limiters()[kind].acquire(oturum=st.session_state.limit_key, istemci=st.context.ip_address)
+    if wait:
+        st.error(f"Çok fazla giriş denemesi. Lütfen {math.ceil(wait)} saniye sonra tekrar deneyiniz.")
+    return bool(wait)
+
+def require_ready():
+    # Isıtma sürüyorsa istek bekletilmez: "hazırlanıyor" gösterilir ve hazır olunca sayfa kendiliğinden yenilenir
+    course = current_course()
+    course.start_warm()
+    if course.wait_ready(courses.READY_WAIT):
+        return
+
+    st.info("⏳ Ödev verileri hazırlanıyor, lütfen birkaç saniye bekleyiniz...")
+
+    @st.fragment(run_every=1.0)
+    def wait_for_warm_up():
+        if course.ready:
+            st.rerun()
+
+    wait_for_warm_up()
+    st.stop()
+
 # Load Data
-@st.cache_data(ttl=600)
+# Veriler Excel yerine derlenmiş sütunsal depodan okunur (bkz. data_store.py).
+# Önbellekler içerik sürümüne bağlıdır: Excel değişince yeni sürüm arka planda hazırlanır,
+# hazır olana kadar oturumlara önceki sürüm sunulur (bkz. data_version.py).
+def get_data_service():
+    return current_course().data_service()
+
 def get_all_assignments():
-    if os.path.exists(EXCEL_FILE):
-        xl = pd.ExcelFile(EXCEL_FILE)
-        return xl.sheet_names
-    return []
-
-@st.cache_data(ttl=600)
-def get_all_unique_students():
-    all_students = pd.DataFrame()
-    xl = pd.ExcelFile(EXCEL_FILE)
-    for sheet_name in xl.sheet_names:
-        # Sadece gerekli sütunları okumayı dene, yoksa boş DataFrame ekle
-        try:
-            df_sheet = pd.read_excel(EXCEL_FILE, sheet_name=sheet_name, usecols=['Öğrenci_Numarası', 'Öğrenci_Ad_Soyad'])
-            all_students = pd.concat([all_students, df_sheet[['Öğrenci_Numarası', 'Öğrenci_Ad_Soyad']]], ignore_index=True)
-        except ValueError: # Sütunlar yoksa veya sayfa boşsa hata vermez
-            continue
-    return all_students.drop_duplicates(subset=['Öğrenci_Numarası']).reset_index(drop=True)
-
-@st.cache_data(ttl=600) # 10 dakika boyunca veriyi hafızada tut, hızlı açılmasını sağla
+    return get_data_service().current().sheet_names()
+
+def get_student_index():
+    return get_data_service().current().student_index()
+
 def load_assignment_data(sheet_name):
-    if os.path.exists(EXCEL_FILE):
-        df = pd.read_excel(EXCEL_FILE, sheet_name=sheet_name)
-        
-        # Beklenen tüm sütunların listesi (Eksik olanları "---" ile doldurmak için)
-        expected_cols = [
-            'Öğrenci_Numarası', 'Öğrenci_Ad_Soyad', 'Fatura_Numarası', 'Beyanname_Türü', 
-            'Rejim_Kodu', 'Alıcı_Adı_Adresi', 'Beyan_Sahibi_Temsilci', 'Gideceği_Ülke_Kodu', 
-            'Teslim_Şekli_Yeri', 'Döviz', 'Toplam_Fatura_Değeri', 'Beyan_Yeri', 'Beyan_Tarihi', 
-            'Gönderici_Adı_Adresi_VergiNo', 'İlk_Varış_Ülkesi_Kodu', 'Ticareti_Yapan_Ülke_Kodu', 
-            'Referans_Numarası', 'Sevk_Ülkesi_Adı_Kodu', 'Taşıma_Aracı_Kimliği', 'Konteyner_Kodu', 
-            'Taşıma_Şekli_Sınır', 'Taşıma_Şekli_Dahili', 'Boşaltma_Yeri', 'Varış Gümrük İdaresi', 
-            'Banka_Adı_Şube', 'Ödeme_Şekli', 'Toplam_Net_Ağırlık_KG', 'Toplam_Brüt_Ağırlık_KG', 
-            'SWIFT_Kodu', 'IBAN', 'Ödev_No', 'Son_Teslim'
-        ]
-        # Kalem bazlı sütunları da ekle
-        for i in range(1, 4):
-            expected_cols.extend([
-                f'GTIP_Kodu_{i}', f'Ürün_Tanımı_{i}', f'Menşe_Ülke_Kodu_{i}', f'Kap_Cinsi_{i}', 
-                f'Kap_Adedi_{i}', f'Net_Ağırlık_KG_{i}', f'Brüt_Ağırlık_KG_{i}', 
-                f'Tamamlayıcı_Ölçü_Birimi_{i}', f'Kalem_Fiyatı_{i}', f'İstatistiki_Kıymet_FOB_{i}', 
-                f'Navlun_Tutari_{i}', f'Sigorta_Tutari_{i}', f'CIF_Toplam_{i}', f'GV_{i}', 
-                f'GV_Orani_{i}', f'ÖTV_{i}', f'ÖTV_Orani_{i}', f'KDV_{i}', f'KDV_Orani_{i}', 
-                f'Vergiler_Toplami_{i}', f'Toplam_Tutar_{i}', f'Ek_Belge_Kodu_{i}', f'Ek_Belge_Referans_{i}'
-            ])
-
-        # Eksik sütunları ekle
-        for col in expected_cols:
-            if col not in df.columns:
-                df[col] = "---"
-
-        # Sayısal sütunları temizle
-        numeric_cols = ['Toplam_Fatura_Değeri', 'Toplam_Net_Ağırlık_KG', 'Toplam_Brüt_Ağırlık_KG']
-        for i in range(1, 4):
-            numeric_cols.extend([f'Kap_Adedi_{i}', f'Net_Ağırlık_KG_{i}', f'Brüt_Ağırlık_KG_{i}', 
-                                f'Kalem_Fiyatı_{i}', f'İstatistiki_Kıymet_FOB_{i}', f'Navlun_Tutari_{i}', 
-                                f'Sigorta_Tutari_{i}', f'CIF_Toplam_{i}', f'GV_{i}', f'ÖTV_{i}', f'KDV_{i}', 
-                                f'Vergiler_Toplami_{i}', f'Toplam_Tutar_{i}', f'GV_Orani_{i}', 
-                                f'ÖTV_Orani_{i}', f'KDV_Orani_{i}'])
-        
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        
-        df = df.fillna("---")
-        return df
-    return None
+    # Beklenen sütunlar, sayısal dönüşüm ve "---" doldurma derleme sırasında uygulanmıştır
+    return get_data_service().current().sheet(sheet_name)
+
+# Oturum yalnızca (veri sürümü, sayfa, satır) tanıtıcısını tutar; öğrenci kaydı her çalıştırmada
+# dersin paylaşılan sütunlarından salt okunur bir görünüm (RecordView) olarak okunur
+def start_student_session(snapshot, sheet_name, row):
+    st.session_state.student = snapshot.handle(sheet_name, row)
+    st.session_state.logged_in = True
+
+def end_student_session():
+    st.session_state.logged_in = False
+    st.session_state.student = None
+
+# Teslim politikası (kilit, ödev takvimi, son teslim) derse özeldir. Son teslim tarihleri veri sürümü
+# başına bir kez ayrıştırılır; her istekteki karar yalnızca birkaç karşılaştırmadır (bkz. policy.py).
+def get_policy():
+    return current_course().policy()
+
+def submission_decision(snapshot, sheet_name, row):
+    return get_policy().check(snapshot.deadlines(sheet_name), sheet_name, row)
+
+def show_lock_notice(detail):
+    st.error("⚠️ SİSTEM KAPATILMIŞTIR")
+    st.warning(detail)
+
+def show_decision(decision):
+    if decision.reason == policy.LOCKED:
+        show_lock_notice("Bu dönem için beyanname giriş süresi sona ermiştir.")
+    elif decision.reason == policy.NOT_OPEN:
+        st.warning(f"⏳ Bu ödev henüz teslime açılmadı. (Açılış: {policy.format_time(decision.at)})")
+    else:
+        st.error(f"⚠️ Bu ödevin süresi dolmuştur! (Son Teslim: {policy.format_time(decision.at)})")
+
+def student_record():
+    # (snapshot, kayıt) ya da oturumun veri sürümü artık bellekte değilse None
+    handle = st.session_state.student
+    return None if handle is None else get_data_service().resolve(handle)
 
 # Logging Function
-def log_attempt(student_no, student_name, success, errors, odev_name="Bilinmiyor"):
-    log_entry = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "student_no": str(student_no),
-        "student_name": student_name,
-        "odev_no": str(odev_name),
-        "success": success,
-        "errors": errors
-    }
-    
-    logs = []
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            try:
-                logs = json.load(f)
-            except json.JSONDecodeError:
-                logs = []
-    
-    logs.append(log_entry)
-    with open(LOG_FILE, "w", encoding="utf-8") as f:
-        json.dump(logs, f, ensure_ascii=False, indent=4)
+def get_log_store():
+    return current_course().log_store()
+
+def log_attempt(student_no, student_name, success, errors, odev_name="Bilinmiyor", sheet=None, invoice_no=None, payload=None):
+    get_log_store().append_submission(student_no, student_name, odev_name, success, errors,
+                                      sheet=sheet, invoice_no=invoice_no, payload=payload)
 
 def log_login_attempt(student_no, odev_name, status, details=""):
-    log_entry = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "student_no": str(student_no),
-        "odev_no": str(odev_name),
-        "status": status,
-        "details": details
-    }
-    logs = []
-    if os.path.exists(LOGIN_LOG_FILE):
-        with open(LOGIN_LOG_FILE, "r", encoding="utf-8") as f:
-            try:
-                logs = json.load(f)
-            except:
-                logs = []
-    logs.append(log_entry)
-    # Keep only last 500 attempts to save space
-    logs = logs[-500:]
-    with open(LOGIN_LOG_FILE, "w", encoding="utf-8") as f:
-        json.dump(logs, f, ensure_ascii=False, indent=4)
+    get_log_store().append_login(student_no, odev_name, status, details)
+
+# Fatura HTML önbelleği dersin tüm oturumlarınca paylaşılır (sınırlı LRU)
+def get_render_cache():
+    return current_course().resource("render", render.RenderCache)
+
+# Log özetleri ders başına paylaşılır ve her panel açılışında artımlı güncellenir
+def get_log_aggregates():
+    return current_course().log_aggregates()
+
+# Yönetim paneli tabloları sayfalıdır: yalnızca görünen sayfa veritabanından okunur ve tarayıcıya gönderilir
+PAGE_SIZES = [50, 100, 250, 500]
+
+def page_controls(total, key):
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    page_size = col_size.selectbox("Sayfa Boyutu", PAGE_SIZES, key=f"{key}_size")
+    page_count = max(1, -(-total // page_size))
+    # Süzgeç değişip kayıt sayısı azalınca sayfa numarası geçerli aralığa çekilir
+    if st.session_state.get(f"{key}_page", 1) > page_count:
+        st.session_state[f"{key}_page"] = page_count
+    page_no = col_page.number_input(f"Sayfa (1-{page_count})", min_value=1, max_value=page_count, step=1, key=f"{key}_page")
+    offset = (page_no - 1) * page_size
+    col_info.caption(f"{min(offset + 1, total)}–{min(offset + page_size, total)} / {total} kayıt")
+    return offset, page_size
+
+def log_filter_controls(key):
+    # Öğrenci no ve tarih aralığı süzgeci; log_store sorgularına verilecek anahtar sözcükleri döner
+    col_no, col_dates = st.columns(2)
+    student_no = col_no.text_input("Öğrenci No", key=f"{key}_student").strip()
+    dates = col_dates.date_input("Tarih Aralığı", value=(), key=f"{key}_dates", format="DD.MM.YYYY")
+    dates = tuple(dates) if isinstance(dates, (tuple, list)) else (dates,)
+    start, end = day_range(dates[0] if dates else None, dates[-1] if dates else None)
+    return {"student_no": student_no or None, "start": start, "end": end}
+
+# Dışa aktarım dosyaları yalnızca indirme tıklandığında, parça parça üretilir (bkz. export.py)
+def get_export_cache():
+    course = current_course()
+    return course.resource("exports", lambda: export.ExportCache(course.path(export.EXPORT_DIR)))
+
+def export_buttons(kind, filters, file_stem, label, formats=export.FORMATS):
+    store, cache = get_log_store(), get_export_cache()
+    for column, fmt in zip(st.columns(len(formats)), formats):
+        column.download_button(
+            label=f"📥 {label} ({fmt.upper()})",
+            data=lambda fmt=fmt: cache.read(store, kind, fmt, filters),
+            file_name=f'{file_stem}_{datetime.now().strftime("%Y%m%d")}.{fmt}',
+            mime=export.MIME_TYPES[fmt],
+            key=f"indir_{kind}_{fmt}",
+        )
+
+# Yeniden notlandırma ders başına tek bir arka plan işidir; betik çalıştırmasını bekletmez (bkz. regrade.py)
+def get_regrade_job():
+    return current_course().resource("regrade", regrade.RegradeJob)
+
+def regrade_status(job):
+    if job.running:
+        # İş sürerken yalnızca bu parça yenilenir; bitince düğme ve özet için sayfa yeniden çalışır
+        @st.fragment(run_every=1.0)
+        def regrade_progress():
+            if not job.running:
+                st.rerun()
+            fraction, message = job.progress
+            st.progress(fraction, text=message)
+
+        regrade_progress()
+    elif job.error is not None:
+        st.error(f"Yeniden notlandırma sırasında hata oluştu: {job.error}")
+    elif job.result is not None:
+        st.success(f"{job.result['regraded']} / {job.result['total']} teslim yeniden notlandırıldı.")
+        if job.result['unmatched']:
+            st.warning(f"{job.result['unmatched']} teslim güncel ödev verisiyle eşleşmedi.")
+
+# Yönetim paneli bölümleri ayrı parçalar (st.fragment) olarak çalışır: bir bölümdeki pencere öğesi
+# değişince yalnızca o bölüm yeniden çalışır; sayfanın geri kalanı ve diğer bölümler yeniden üretilmez.
+# Log özetleri her parça çalıştırmasında artımlı güncellenir (yalnızca yeni loglar okunur).
+def refreshed_log_aggregates():
+    with metrics.timer("panel.log_ozeti"):
+        return get_log_aggregates().refresh(get_log_store())
+
+@st.fragment
+def submission_log_panel():
+    with metrics.timer("parca.teslim_loglari"):
+        aggregates = refreshed_log_aggregates()
+        if aggregates.totals()[0] == 0:
+            st.info("Henüz hiç deneme yapılmadı.")
+            return
+
+        # Filter by Assignment
+        all_odevs = ["Hepsi"] + aggregates.assignments()
+        selected_filter = st.selectbox("Ödev Filtresi", all_odevs)
+        odev_filter = None if selected_filter == "Hepsi" else selected_filter
+
+        st.subheader(f"📝 Beyanname Tescil İşlemleri (Loglar) - {selected_filter}")
+        log_filters = log_filter_controls("teslim")
+        log_filters["odev_no"] = odev_filter
+        sort_options = {"Zaman": "timestamp", "Öğrenci No": "student_no", "Ödev": "odev_no", "Sonuç": "success"}
+        col_sort, col_order = st.columns(2)
+        sort_label = col_sort.selectbox("Sırala", list(sort_options), key="teslim_sort")
+        descending = col_order.radio("Yön", ["Azalan", "Artan"], horizontal=True, key="teslim_order") == "Azalan"
+
+        # En yeni en üstte; yalnızca görünen sayfa okunur
+        with metrics.timer("panel.teslim_sayfasi"):
+            log_total = get_log_store().count_submissions(**log_filters)
+            offset, page_size = page_controls(log_total, "teslim")
+            log_df = pd.DataFrame(get_log_store().query_submissions(
+                **log_filters, sort=sort_options[sort_label], descending=descending,
+                offset=offset, limit=page_size,
+            ), columns=['id', 'timestamp', 'student_no', 'student_name', 'odev_no', 'success', 'errors']).drop(columns=['id'])
+        st.dataframe(log_df, use_container_width=True)
+
+        # Download Buttons for Logs (süzgece uyan tüm kayıtlar) ve ödev başına not çizelgesi
+        export_buttons("teslimler", log_filters, f"beyanname_loglari_{selected_filter}", "Bu Raporu İndir")
+        export_buttons("notlar", {"odev_no": odev_filter}, f"not_cizelgesi_{selected_filter}", "Not Çizelgesi")
+
+        attempt_count, success_count = aggregates.totals(odev_filter)
+        col_a, col_b, col_c = st.columns(3)
+        with col_a:
+            st.metric("Toplam Deneme", attempt_count)
+        with col_b:
+            st.metric("Başarılı Tescil", success_count)
+        with col_c:
+            success_rate = (success_count / attempt_count) * 100 if attempt_count > 0 else 0
+            st.metric("Genel Başarı Oranı", f"%{success_rate:.1f}")
+
+        # Analytics (ödev süzgecine bağlı olduğu için aynı parçada)
+        st.subheader("En Çok Hata Yapılan Alanlar")
+        error_counts = aggregates.error_counts(odev_filter)
+
+        if error_counts:
+            err_counts = pd.DataFrame(error_counts.most_common(), columns=['Hata Türü', 'Sayı'])
+
+            with metrics.timer("panel.grafik"):
+                # plotly yalnızca grafik çizilirken yüklenir; öğrenci sayfaları onu hiç içe aktarmaz.
+                # graph_objects ile doğrudan kurulan çubuk grafik plotly.express'ten ~10 kat hızlıdır.
+                import plotly.graph_objects as go
+                fig = go.Figure(
+                    go.Bar(x=err_counts['Hata Türü'], y=err_counts['Sayı'],
+                           marker=dict(color=err_counts['Sayı'], colorscale='Blues', showscale=True,
+                                       colorbar=dict(title='Sayı'))),
+                    layout=dict(title="Sınıf Genelinde Hata Dağılımı",
+                                xaxis=dict(title='Hata Türü'), yaxis=dict(title='Sayı')),
+                )
+                st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Henüz hata kaydı bulunamamaktadır.")
+
+@st.fragment
+def submission_status_panel():
+    with metrics.timer("parca.teslim_durumu"):
+        aggregates = refreshed_log_aggregates()
+        if aggregates.totals()[0] == 0:
+            return
+
+        # Student Submission Status
+        st.divider()
+        st.subheader("📊 Öğrenci Beyanname Teslim Durumu")
+
+        students = get_student_index().students
+
+        if students:
+            # Teslim durumunu belirle: logda herhangi bir denemesi varsa 'Teslim Etti', yoksa 'Teslim Etmedi'.
+            # Liste bellekteki öğrenci dizininden gelir; süzülür ve yalnızca görünen sayfa tabloya çevrilir.
+            col_status, col_search = st.columns(2)
+            status_filter = col_status.radio("Durum", ["Hepsi", "Teslim Etti", "Teslim Etmedi"], horizontal=True, key="durum_filtre")
+            search = col_search.text_input("Öğrenci No / Ad Ara", key="durum_ara").strip().casefold()
+            status_rows = [
+                (no, name, aggregates.has_submitted(no)) for no, name in students.items()
+                if not search or search in no.casefold() or search in str(name).casefold()
+            ]
+            if status_filter != "Hepsi":
+                status_rows = [row for row in status_rows if row[2] == (status_filter == "Teslim Etti")]
+            offset, page_size = page_controls(len(status_rows), "durum")
+            page_rows = status_rows[offset:offset + page_size]
+            final_submission_status = pd.DataFrame({
+                "Öğrenci Numarası": [row[0] for row in page_rows],
+                "Öğrenci Adı Soyadı": [row[1] for row in page_rows],
+                "Teslim Durumu": ["✅ Teslim Etti" if row[2] else "❌ Teslim Etmedi" for row in page_rows],
+            })
+
+            st.dataframe(final_submission_status, use_container_width=True)
+        else:
+            st.info("Excel dosyasında ödev atanmış öğrenci bulunmamaktadır.")
+
+@st.fragment
+def login_log_panel():
+    with metrics.timer("parca.giris_loglari"):
+        # Login Attempts Section
+        st.divider()
+        st.subheader("🔑 Sisteme Giriş Yapan Öğrenciler (Tekil)")
+        if get_log_store().count_logins() == 0:
+            st.info("Henüz giriş denemesi kaydı bulunmamaktadır.")
+            return
+
+        login_filters = log_filter_controls("giris")
+        login_sort_options = {"Son İşlem Tarihi": "last_timestamp", "Öğrenci No": "student_no",
+                              "Toplam Giriş Denemesi": "attempts", "Son Durum": "status"}
+        col_sort, col_order = st.columns(2)
+        sort_label = col_sort.selectbox("Sırala", list(login_sort_options), key="giris_sort")
+        descending = col_order.radio("Yön", ["Azalan", "Artan"], horizontal=True, key="giris_order") == "Azalan"
+
+        # Öğrenci başına gruplama da veritabanında yapılır (GROUP BY student_no)
+        with metrics.timer("panel.giris_sayfasi"):
+            student_total = get_log_store().count_login_students(**login_filters)
+            offset, page_size = page_controls(student_total, "giris")
+            unique_logins = pd.DataFrame(get_log_store().query_login_summary(
+                **login_filters, sort=login_sort_options[sort_label], descending=descending,
+                offset=offset, limit=page_size,
+            ), columns=['student_no', 'last_timestamp', 'status', 'odev_no', 'attempts'])
+        unique_logins.columns = ['Öğrenci No', 'Son İşlem Tarihi', 'Son Durum', 'Son Ödev', 'Toplam Giriş Denemesi']
+
+        # Show unique students table
+        st.dataframe(unique_logins, use_container_width=True)
+
+        # Download Buttons for Login Logs (süzgece uyan tüm öğrenciler)
+        export_buttons("girisler", login_filters, "giris_listesi", "Giriş Listesini İndir")
+
+        # Show raw logs in expander (aynı süzgeç, ayrı sayfalama)
+        with st.expander("Tüm Giriş Loglarını Gör (Detaylı)"):
+            raw_offset, raw_page_size = page_controls(get_log_store().count_logins(**login_filters), "giris_detay")
+            login_df = pd.DataFrame(get_log_store().query_logins(**login_filters, offset=raw_offset, limit=raw_page_size),
+                                    columns=['id', 'timestamp', 'student_no', 'odev_no', 'status', 'details']).drop(columns=['id'])
+            st.dataframe(login_df, use_container_width=True)
+
+@st.fragment
+def access_policy_panel():
+    course_policy = get_policy()
+    # Anahtar her çalıştırmada diskteki durumla eşitlenir (kilit başka bir oturumdan da değişebilir)
+    st.session_state.sistem_kilidi = course_policy.is_locked()
+    st.toggle("Sistemi öğrenci erişimine kapat", key="sistem_kilidi",
+              on_change=lambda: course_policy.set_locked(st.session_state.sistem_kilidi))
+    limiters = get_login_limiters()
+    st.caption(f"Sınırı aşıp reddedilen giriş denemeleri (süreç başından beri): "
+               f"öğrenci {sum(limiters['ogrenci'].rejected.values())}, "
+               f"yönetici {sum(limiters['yonetici'].rejected.values())}")
+
+    # Ödev takvimi: kapanış verilirse Excel'deki Son_Teslim yerine geçer, ek süre son teslime eklenir
+    assignment = st.selectbox("Ödev", get_all_assignments(), key="takvim_odev")
+    schedule = course_policy.schedules.get(assignment)
+
+    def stored(timestamp):
+        return None if timestamp is None else datetime.fromtimestamp(timestamp)
+
+    opens, closes = (stored(schedule.opens), stored(schedule.closes)) if schedule else (None, None)
+    o1, o2, c1, c2 = st.columns(4)
+    open_date = o1.date_input("Açılış Tarihi", value=opens.date() if opens else None, key=f"acilis_tarih_{assignment}")
+    open_time = o2.time_input("Açılış Saati", value=opens.time() if opens else None, key=f"acilis_saat_{assignment}")
+    close_date = c1.date_input("Kapanış Tarihi", value=closes.date() if closes else None, key=f"kapanis_tarih_{assignment}")
+    close_time = c2.time_input("Kapanış Saati", value=closes.time() if closes else None, key=f"kapanis_saat_{assignment}")
+    grace = st.number_input("Ek Süre (dk)", min_value=0, step=5, key=f"ek_sure_{assignment}",
+                            value=int(schedule.grace // 60) if schedule else 0)
+
+    def combine(day, clock):
+        return None if day is None else datetime.combine(day, clock or datetime.min.time())
+
+    s1, s2 = st.columns(2)
+    if s1.button("Takvimi Kaydet"):
+        opens, closes = combine(open_date, open_time), combine(close_date, close_time)
+        if opens and closes and opens >= closes:
+            st.error("Açılış, kapanıştan önce olmalıdır.")
+        else:
+            course_policy.set_schedule(assignment, opens, closes, grace)
+            st.success("Takvim kaydedildi.")
+    if s2.button("Takvimi Kaldır", disabled=schedule is None):
+        course_policy.clear_schedule(assignment)
+        st.success("Takvim kaldırıldı.")
+
+    if course_policy.schedules:
+        st.dataframe(pd.DataFrame(
+            [(name, policy.format_time(s.opens), policy.format_time(s.closes), int(s.grace // 60))
+             for name, s in sorted(course_policy.schedules.items())],
+            columns=["Ödev", "Açılış", "Kapanış", "Ek Süre (dk)"]), use_container_width=True)
+    else:
+        st.caption("Takvim tanımlı değil: son teslim Excel'deki Son_Teslim sütunundan okunur.")
+
+# Kopya analizi çevrim dışı bir iştir: yalnızca istenince çalışır, sonuç ders başına saklanır (bkz. plagiarism.py)
+def get_collusion_cache():
+    return current_course().resource("plagiarism", plagiarism.ReportCache)
+
+@st.fragment
+def collusion_panel():
+    cache = get_collusion_cache()
+    if st.button("Analizi Çalıştır"):
+        with st.spinner("Teslimler karşılaştırılıyor..."):
+            cache.report(get_log_store(), get_data_service().current())
+    report = cache.last
+    if report is None:
+        st.info("Analiz henüz çalıştırılmadı.")
+        return
+    st.caption(f"Son analiz: {report.created_at} | {report.checked} teslim incelendi"
+               + (f" ({report.unmatched} teslim güncel ödev verisiyle eşleşmedi)" if report.unmatched else ""))
+    k1, k2 = st.columns(2)
+    k1.metric("Başkasının Cevabını Kullanan", len(report.copied))
+    k2.metric("Benzer Beyanname Çifti", len(report.similar))
+    st.markdown(f"**Başkasının cevabı:** başka bir öğrencinin faturasına özgü en az "
+                f"{plagiarism.MIN_COPIED_FIELDS} değer")
+    st.dataframe(report.copied, use_container_width=True)
+    st.markdown(f"**Benzer beyanname:** cevapların en az %{plagiarism.SIMILARITY_THRESHOLD * 100:.0f}'i aynı")
+    st.dataframe(report.similar, use_container_width=True)
+
+@st.fragment
+def performance_panel():
+    registry = metrics.METRICS
+    if not registry.enabled:
+        st.info("Ölçüm kapalı (BILGE_METRICS=0).")
+        return
+    st.caption(f"Ölçüm başlangıcı: {registry.started_at}")
+    p1, p2, p3 = st.columns(3)
+    for column, label, prefix in ((p1, "Fatura Önbelleği İsabet", "render.onbellek"),
+                                  (p2, "Sayfa Önbelleği İsabet", "veri.sayfa_onbellek")):
+        rate = registry.hit_rate(prefix)
+        column.metric(label, "---" if rate is None else f"%{rate * 100:.1f}")
+    p3.metric("Fatura Önbelleği Boyutu", len(get_render_cache()))
+
+    timer_rows = registry.timers()
+    if timer_rows:
+        st.dataframe(pd.DataFrame(timer_rows), use_container_width=True)
+        stage = st.selectbox("Histogram", [row["Aşama"] for row in timer_rows])
+        st.bar_chart(pd.Series(registry.histogram(stage), name="Gözlem"))
+    else:
+        st.info("Henüz ölçüm yok.")
+
+    counter_rows = registry.counters()
+    if counter_rows:
+        st.dataframe(pd.DataFrame(counter_rows.items(), columns=["Sayaç", "Değer"]), use_container_width=True)
+
+    e1, e2, e3 = st.columns(3)
+    if e1.button("Prometheus Dosyasına Yaz"):
+        st.success(f"Yazıldı: {registry.export_prometheus()}")
+    if e2.button("JSONL Dosyasına Ekle"):
+        st.success(f"Eklendi: {registry.export_jsonl()}")
+    if e3.button("Ölçümleri Sıfırla"):
+        registry.reset()
+        st.rerun(scope="fragment")
 
 # Session State Initialization
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
-if 'student_data' not in st.session_state:
-    st.session_state.student_data = None
+if 'student' not in st.session_state:
+    st.session_state.student = None
 if 'admin_mode' not in st.session_state:
     st.session_state.admin_mode = False
 if 'pending_matches' not in st.session_state:
     st.session_state.pending_matches = None
 
+# Ders seçimi: bağlantıdaki ?ders=<kimlik> ya da (birden çok ders varsa) kenar çubuğu
+course_ids = get_courses().ids()
+if 'course_id' not in st.session_state:
+    requested = st.query_params.get("ders")
+    st.session_state.course_id = requested if requested in course_ids else course_ids[0]
+
 # Sidebar Navigation
 st.sidebar.title("BİLGE SİSTEMİ")
 st.sidebar.subheader("İthalat Beyanname Portali")
+if len(course_ids) > 1:
+    selected_course = st.sidebar.selectbox(
+        "Ders", course_ids, format_func=get_courses().title,
+        index=course_ids.index(st.session_state.course_id) if st.session_state.course_id in course_ids else 0,
+    )
+    if selected_course != st.session_state.course_id:
+        # Ders değişince öğrenci ve yönetici oturumu kapanır (veriler ve şifreler derse özeldir)
+        st.session_state.course_id = selected_course
+        end_student_session()
+        st.session_state.admin_mode = False
+        st.session_state.pending_matches = None
+        st.query_params["ders"] = selected_course
 page = st.sidebar.radio("Menü", ["Öğrenci Girişi", "Dijital Beyanname", "Akademisyen Paneli"])
 
+# Sayfa çalışma süresi (st.stop / st.rerun ile yarıda kesilen çalıştırmalar sayılmaz)
+page_started = metrics.start()
+
 if page == "Öğrenci Girişi":
     st.title("🎓 Trakya Üniversitesi Gümrük İşletme Bölümü")
     st.subheader("Dijital Gümrük Beyanname Simülasyonu (BİLGE)")
     
-    if SYSTEM_LOCKED:
-        st.error("⚠️ SİSTEM KAPATILMIŞTIR")
-        st.warning("Bu dönem için beyanname giriş süresi sona ermiştir. Artık giriş yapılamaz.")
+    if get_policy().is_locked():
+        show_lock_notice("Bu dönem için beyanname giriş süresi sona ermiştir. Artık giriş yapılamaz.")
         st.stop()
     
+    require_ready()
     assignments = get_all_assignments()
     
+    if st.session_state.logged_in and student_record() is None:
+        # Oturumun veri sürümü bellekten çıkmış: öğrenci yeni sürümle tekrar giriş yapar
+        end_student_session()
+        st.warning("Ödev verisi güncellendi, lütfen tekrar giriş yapınız.")
+
     if st.session_state.logged_in:
-        st.success(f"Giriş Yapıldı: {st.session_state.student_data['Öğrenci_Ad_Soyad']}")
-        st.info(f"Çalışılan Ödev: {st.session_state.get('current_odev', 'Bilinmiyor')}")
+        _, data = student_record()
+        st.success(f"Giriş Yapıldı: {data['Öğrenci_Ad_Soyad']}")
+        st.info(f"Çalışılan Ödev: {st.session_state.student.sheet}")
         if st.button("Oturumu Kapat"):
-            st.session_state.logged_in = False
-            st.session_state.student_data = None
+            end_student_session()
             st.rerun()
     else:
         with st.form("login_form"):
@@ -219,45 +575,38 @@ if page == "Öğrenci Girişi":
             submit_login = st.form_submit_button("Sisteme Giriş Yap")
             
             if submit_login:
-                df_odev = load_assignment_data(selected_odev)
+                if login_throttled("ogrenci"):
+                    st.stop()
+                # Tablo ve indeks aynı veri sürümünden alınmalı (satır konumları sürüme bağlı)
+                snapshot = get_data_service().current()
+                df_odev = snapshot.sheet(selected_odev)
                 if df_odev is not None:
                     # Giriş temizleme: Boşlukları sil ve stringe çevir
                     input_no = str(student_no).strip()
                     
-                    # Eşleşme ara: Hem sayısal hem string olarak kontrol et
-                    match = df_odev[
-                        (df_odev['Öğrenci_Numarası'].astype(str).str.strip() == input_no)
-                    ]
+                    # Eşleşme ara: indeks üzerinden sözlük araması (numara normalize edilir)
+                    index = snapshot.student_index()
+                    with metrics.timer("giris.arama"):
+                        match_rows = index.lookup(selected_odev, input_no)
                     
-                    if not match.empty:
-                        # Check Deadline if column exists
-                        if 'Son_Teslim' in df_odev.columns:
-                            deadline_val = match.iloc[0]['Son_Teslim']
-                            if deadline_val != "---":
-                                deadline_dt = None
-                                if isinstance(deadline_val, datetime):
-                                    deadline_dt = deadline_val
-                                else:
-                                    deadline_str = str(deadline_val)
-                                    # Try multiple formats
-                                    for fmt in ("%Y-%m-%d %H:%M", "%d.%m.%Y %H:%M", "%Y-%m-%d %H:%M:%S", "%d.%m.%Y %H:%M:%S"):
-                                        try:
-                                            deadline_dt = datetime.strptime(deadline_str, fmt)
-                                            break
-                                        except ValueError:
-                                            continue
-                                
-                                if deadline_dt and datetime.now() > deadline_dt:
-                                    st.error(f"⚠️ Bu ödevin süresi dolmuştur! (Son Teslim: {deadline_val})")
-                                    st.stop()
-
-                        st.session_state.student_data = match.iloc[0].to_dict()
-                        st.session_state.current_odev = selected_odev
-                        st.session_state.logged_in = True
+                    if match_rows:
+                        # Kilit, ödev takvimi ve son teslim kontrolü
+                        decision = submission_decision(snapshot, selected_odev, match_rows[0])
+                        if not decision.allowed:
+                            show_decision(decision)
+                            st.stop()
+
+                        if len(match_rows) > 1:
+                            # Birden fazla fatura: seçim formun dışında yapılır (faturalar indeksten okunur)
+                            st.session_state.pending_matches = {"odev": selected_odev, "student_no": input_no}
+                            st.rerun()
+
+                        start_student_session(snapshot, selected_odev, match_rows[0])
                         
                         # Display Assignment Info
-                        odev_no = st.session_state.student_data.get('Ödev_No', '---')
-                        st.success(f"Hoş geldiniz, {st.session_state.student_data['Öğrenci_Ad_Soyad']}!")
+                        data = snapshot.record(selected_odev, match_rows[0])
+                        odev_no = data.get('Ödev_No', '---')
+                        st.success(f"Hoş geldiniz, {data['Öğrenci_Ad_Soyad']}!")
                         if odev_no != "---":
                             st.info(f"📌 Ödev No: {odev_no}")
                         
@@ -269,54 +618,56 @@ if page == "Öğrenci Girişi":
 
         # Handle multiple matches outside the form
         if 'pending_matches' in st.session_state and st.session_state.pending_matches is not None:
-            st.info(f"Numaranıza tanımlı {len(st.session_state.pending_matches)} farklı fatura bulundu.")
+            pending = st.session_state.pending_matches
+            pending_invoices = get_student_index().invoices_for(pending['odev'], pending['student_no'])
+            st.info(f"Numaranıza tanımlı {len(pending_invoices)} farklı fatura bulundu.")
             selected_invoice = st.selectbox("Çalışmak istediğiniz Fatura Numarasını seçin:", 
-                                          st.session_state.pending_matches['Fatura_Numarası'].tolist())
+                                          pending_invoices)
             if st.button("Seçilen Fatura ile Başla"):
-                match = st.session_state.pending_matches
-                st.session_state.student_data = match[match['Fatura_Numarası'] == selected_invoice].iloc[0].to_dict()
-                st.session_state.logged_in = True
-                st.session_state.pending_matches = None
-                st.success(f"Giriş Başarılı! {selected_invoice} nolu fatura yüklendi.")
-                st.rerun()
+                # Seçim sırasında veri sürümü değişmiş olabilir: satırı güncel sürümde yeniden bul
+                snapshot = get_data_service().current()
+                index = snapshot.student_index()
+                invoices = index.invoices_for(pending['odev'], pending['student_no'])
+                if selected_invoice in invoices:
+                    row = index.lookup(pending['odev'], pending['student_no'])[invoices.index(selected_invoice)]
+                    start_student_session(snapshot, pending['odev'], row)
+                    st.session_state.pending_matches = None
+                    log_login_attempt(pending['student_no'], pending['odev'], "Başarılı")
+                    st.success(f"Giriş Başarılı! {selected_invoice} nolu fatura yüklendi.")
+                    st.rerun()
+                else:
+                    st.session_state.pending_matches = None
+                    st.error("Ödev verisi güncellendi, lütfen tekrar giriş yapınız.")
 
 elif page == "Dijital Beyanname":
-    if SYSTEM_LOCKED:
-        st.error("⚠️ SİSTEM KAPATILMIŞTIR")
-        st.warning("Bu dönem için beyanname giriş süresi sona ermiştir.")
+    if get_policy().is_locked():
+        show_lock_notice("Bu dönem için beyanname giriş süresi sona ermiştir.")
         st.stop()
 
-    if not st.session_state.logged_in:
+    resolved = student_record() if st.session_state.logged_in else None
+    if st.session_state.logged_in and resolved is None:
+        end_student_session()
+        st.warning("Ödev verisi güncellendi, lütfen 'Öğrenci Girişi' sayfasından tekrar giriş yapınız.")
+    elif not st.session_state.logged_in:
         st.warning("Lütfen önce 'Öğrenci Girişi' sayfasından giriş yapınız.")
     else:
-        data = st.session_state.student_data
+        snapshot, data = resolved
+        handle = st.session_state.student
         
         # Re-check deadline even if logged in
-        son_teslim = data.get('Son_Teslim', '---')
-        if son_teslim != "---":
-            deadline_dt = None
-            if isinstance(son_teslim, datetime):
-                deadline_dt = son_teslim
-            else:
-                for fmt in ("%Y-%m-%d %H:%M", "%d.%m.%Y %H:%M", "%Y-%m-%d %H:%M:%S", "%d.%m.%Y %H:%M:%S"):
-                    try:
-                        deadline_dt = datetime.strptime(str(son_teslim), fmt)
-                        break
-                    except ValueError:
-                        continue
-            
-            if deadline_dt and datetime.now() > deadline_dt:
-                st.error(f"⚠️ Bu ödevin süresi dolmuştur! (Son Teslim: {son_teslim})")
-                if st.button("Giriş Sayfasına Dön"):
-                    st.session_state.logged_in = False
-                    st.rerun()
-                st.stop()
+        decision = submission_decision(snapshot, handle.sheet, handle.row)
+        if not decision.allowed:
+            show_decision(decision)
+            if st.button("Giriş Sayfasına Dön"):
+                end_student_session()
+                st.rerun()
+            st.stop()
 
         st.title("📝 Gümrük İşlemleri Portalı")
         
         # Assignment Info Header
         odev_no = data.get('Ödev_No', '---')
-        son_teslim = data.get('Son_Teslim', '---')
+        son_teslim = policy.format_time(decision.at)
         
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -338,191 +689,22 @@ elif page == "Dijital Beyanname":
             if data is None:
                 st.error("Veri bulunamadı. Lütfen tekrar giriş yapın.")
             else:
-                # HTML içeriğini güvenli bir şekilde oluştur
-                # Sayısal değerleri formatla
-                f_no = data.get('Fatura_Numarası', '---')
-                f_tarih = data.get('Beyan_Tarihi', '---')
-                ref = data.get('Referans_Numarası', '---')
-                satici = data.get('Gönderici_Adı_Adresi_VergiNo', '---')
-                alici = data.get('Alıcı_Adı_Adresi', '---')
-                mense = data.get('Sevk_Ülkesi_Adı_Kodu', '---')
-                varis = data.get('Gideceği_Ülke_Kodu', '---')
-                ilk_varis = data.get('İlk_Varış_Ülkesi_Kodu', '---')
-                v_gumruk_adi = data.get('Varış Gümrük İdaresi', '---')
-                tasima = data.get('Taşıma_Aracı_Kimliği', '---')
-                yukleme = data.get('Boşaltma_Yeri', '---')
-                rejimi = data.get('Rejim_Kodu', '---')
-                b_turu = data.get('Beyanname_Türü', '---')
-                t_sinir = data.get('Taşıma_Şekli_Sınır', '---')
-                t_dahili = data.get('Taşıma_Şekli_Dahili', '---')
-                konteyner = data.get('Konteyner_Kodu', '---')
-                ticaret_ulke = data.get('Ticareti_Yapan_Ülke_Kodu', '---')
-                doviz = data.get('Döviz', 'USD')
-                toplam = float(data.get('Toplam_Fatura_Değeri', 0))
-                
-                # Banka ve Ağırlık Bilgileri
-                banka = data.get('Banka_Adı_Şube', '---')
-                swift = data.get('SWIFT_Kodu', '---')
-                iban = data.get('IBAN', '---')
-                net_toplam = data.get('Toplam_Net_Ağırlık_KG', 0)
-                brut_toplam = data.get('Toplam_Brüt_Ağırlık_KG', 0)
-                odeme_sekli = data.get('Ödeme_Şekli', '---')
-                teslim_sekli = data.get('Teslim_Şekli_Yeri', '---')
-                beyan_sahibi = data.get('Beyan_Sahibi_Temsilci', '---')
-
-                invoice_html = f"""<div style="border: 2px solid #004a99; padding: 30px; background-color: white; color: black; font-family: 'Times New Roman', Times, serif; line-height: 1.6;">
-<div style="text-align: center; border-bottom: 3px double #004a99; padding-bottom: 10px; margin-bottom: 20px;">
-<h1 style="color: #004a99; margin: 0; font-size: 28px;">TİCARİ FATURA</h1>
-<div style="font-size: 14px; font-weight: bold;">(COMMERCIAL INVOICE)</div>
-</div>
-
-<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
-<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
-<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">İHRACATÇI / SATICI (EXPORTER):</strong>
-<div style="font-size: 14px; white-space: pre-wrap;">{satici}</div>
-</div>
-<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
-<table style="width: 100%; font-size: 14px; border-collapse: collapse;">
-<tr><td style="padding: 3px;"><b>Fatura No:</b></td><td style="padding: 3px;">{f_no}</td></tr>
-<tr><td style="padding: 3px;"><b>Tarih:</b></td><td style="padding: 3px;">{f_tarih}</td></tr>
-<tr><td style="padding: 3px;"><b>Referans:</b></td><td style="padding: 3px;">{ref}</td></tr>
-<tr><td style="padding: 3px;"><b>Döviz:</b></td><td style="padding: 3px;">{doviz}</td></tr>
-<tr><td style="padding: 3px;"><b>Beyanname Türü:</b></td><td style="padding: 3px;">{b_turu}</td></tr>
-<tr><td style="padding: 3px;"><b>Çıkış Rejimi:</b></td><td style="padding: 3px;">{rejimi}</td></tr>
-</table>
-</div>
-</div>
-
-<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
-<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
-<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">ALICI / İTHALATÇI (CONSIGNEE):</strong>
-<div style="font-size: 14px; white-space: pre-wrap;">{alici}</div>
-<br>
-<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">BEYAN SAHİBİ / TEMSİLCİ (DECLARANT):</strong>
-<div style="font-size: 14px; white-space: pre-wrap;">{beyan_sahibi}</div>
-</div>
-<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
-<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">NAKLİYE VE LOJİSTİK BİLGİLERİ:</strong>
-<div style="font-size: 13px;">
-<b>Menşe Ülke:</b> {mense}<br>
-<b>Gideceği Ülke:</b> {varis}<br>
-<b>İlk Varış Ülkesi:</b> {ilk_varis}<br>
-<b>Ticareti Yapan Ülke:</b> {ticaret_ulke}<br>
-<b>Gümrük İdaresi:</b> {v_gumruk_adi}<br>
-<b>Taşıma Aracı Kimliği:</b> {tasima}<br>
-<b>Yükleme Yeri:</b> {yukleme}<br>
-<b>Taşıma Şekli (Sınır):</b> {t_sinir}<br>
-<b>Taşıma Şekli (Dahili):</b> {t_dahili}<br>
-<b>Konteyner:</b> {"Evet (1)" if str(konteyner)=="1" else "Hayır (0)"}
-</div>
-</div>
-</div>
-
-<table style="width: 100%; border-collapse: collapse; font-size: 11px; margin-bottom: 20px; border: 1px solid #004a99;">
-<thead>
-<tr style="background-color: #004a99; color: white; text-align: center;">
-<th style="border: 1px solid #004a99; padding: 5px;">Eşyanın Tanımı</th>
-<th style="border: 1px solid #004a99; padding: 5px;">GTİP</th>
-<th style="border: 1px solid #004a99; padding: 5px;">Miktar/Birim</th>
-<th style="border: 1px solid #004a99; padding: 5px;">Net/Brüt (KG)</th>
-<th style="border: 1px solid #004a99; padding: 5px;">Kalem Fiyatı</th>
-<th style="border: 1px solid #004a99; padding: 5px;">İstatistiki Kıymet</th>
-<th style="border: 1px solid #004a99; padding: 5px;">Navlun/Sigorta</th>
-<th style="border: 1px solid #004a99; padding: 5px;">CIF Toplam</th>
-<th style="border: 1px solid #004a99; padding: 5px;">Vergiler</th>
-<th style="border: 1px solid #004a99; padding: 5px;">Genel Toplam</th>
-</tr>
-</thead>
-<tbody>
-"""
-                for i in range(1, 4):
-                    invoice_html += f"""
-<tr>
-<td style="border: 1px solid #ddd; padding: 5px;">{data.get(f'Ürün_Tanımı_{i}', '---')}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">{data.get(f'GTIP_Kodu_{i}', '---')}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">{data.get(f'Kap_Adedi_{i}', 0)} {data.get(f'Tamamlayıcı_Ölçü_Birimi_{i}', '---')}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">N: {data.get(f'Net_Ağırlık_KG_{i}', 0)}<br>B: {data.get(f'Brüt_Ağırlık_KG_{i}', 0)}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'Kalem_Fiyatı_{i}', 0)):.2f}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'İstatistiki_Kıymet_FOB_{i}', 0)):.2f}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">N: {float(data.get(f'Navlun_Tutari_{i}', 0)):.2f}<br>S: {float(data.get(f'Sigorta_Tutari_{i}', 0)):.2f}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'CIF_Toplam_{i}', 0)):.2f}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'Vergiler_Toplami_{i}', 0)):.2f}</td>
-<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'Toplam_Tutar_{i}', 0)):.2f}</td>
-</tr>"""
-
-                invoice_html += f"""
-</tbody>
-<tfoot>
-<tr style="font-weight: bold; background-color: #f8f9fa;">
-<td colspan="5" style="text-align: right; border: 1px solid #004a99; padding: 10px;">TOPLAMLAR:</td>
-<td colspan="2" style="border: 1px solid #004a99; padding: 10px; text-align: center;">Net: {net_toplam} KG / Brüt: {brut_toplam} KG</td>
-<td colspan="2" style="border: 1px solid #004a99; padding: 10px; text-align: right;">GENEL TOPLAM ({doviz}):</td>
-<td style="border: 1px solid #004a99; padding: 10px; text-align: right;">{toplam:.2f}</td>
-</tr>
-</tfoot>
-</table>
-
-<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
-<div style="width: 60%; border: 1px solid #ccc; padding: 10px;">
-<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">ÖDEME VE BANKA BİLGİLERİ:</strong>
-<div style="font-size: 13px;">
-<b>Ödeme Şekli:</b> {odeme_sekli}<br>
-<b>Teslim Şekli:</b> {teslim_sekli}<br>
-<b>Banka Adı:</b> {banka}<br>
-<b>SWIFT Kodu:</b> {swift}<br>
-<b>IBAN:</b> {iban}
-</div>
-</div>
-<div style="width: 35%; border: 1px solid #ccc; padding: 10px;">
-<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">EK BELGELER:</strong>
-<div style="font-size: 12px;">
-<b>1. Kalem:</b> {data.get('Ek_Belge_Kodu_1', '---')} ({data.get('Ek_Belge_Referans_1', '---')})<br>
-<b>2. Kalem:</b> {data.get('Ek_Belge_Kodu_2', '---')} ({data.get('Ek_Belge_Referans_2', '---')})<br>
-<b>3. Kalem:</b> {data.get('Ek_Belge_Kodu_3', '---')} ({data.get('Ek_Belge_Referans_3', '---')})
-</div>
-</div>
-</div>
-
-<div style="margin-top: 30px; display: flex; justify-content: flex-end;">
-<div style="width: 250px; text-align: center; border-top: 1px solid #000; padding-top: 5px;">
-<b style="font-size: 14px;">Yetkili İmza ve Kaşe</b>
-</div>
-</div>
-
-<div style="margin-top: 20px; padding: 15px; border: 1px dashed #004a99; background-color: #f0f7ff; font-size: 12px;">
-<strong style="color: #004a99; display: block; margin-bottom: 5px;">📌 ÖNEMLİ NOT: BEYANNAME İÇİN VERGİ ORANLARI VE MATRAH MANTIĞI</strong>
-<p style="margin-bottom: 10px; color: #333;">Beyannameyi doldururken aşağıdaki oranları ve kümülatif vergi matrahı mantığını kullanınız:</p>
-<table style="width: 100%; border-collapse: collapse; text-align: center;">
-<tr style="background-color: #e1ecf7; font-weight: bold;">
-<td style="border: 1px solid #ccc; padding: 5px;">Kalem No</td>
-<td style="border: 1px solid #ccc; padding: 5px;">Gümrük Vergisi (GV)<br><small>(CIF üzerinden)</small></td>
-<td style="border: 1px solid #ccc; padding: 5px;">ÖTV<br><small>(CIF + GV üzerinden)</small></td>
-<td style="border: 1px solid #ccc; padding: 5px;">KDV<br><small>(CIF + GV + ÖTV üzerinden)</small></td>
-</tr>
-"""
-                for i in range(1, 4):
-                    # Oranları doğrudan yeni eklenen sütunlardan çek
-                    gv_oran = data.get(f'GV_Orani_{i}', 0)
-                    otv_oran = data.get(f'ÖTV_Orani_{i}', 0)
-                    kdv_oran = data.get(f'KDV_Orani_{i}', 0)
-                    
-                    invoice_html += f"""
-<tr>
-<td style="border: 1px solid #ccc; padding: 5px;">Kalem {i}</td>
-<td style="border: 1px solid #ccc; padding: 5px;">%{int(round(float(gv_oran)))}</td>
-<td style="border: 1px solid #ccc; padding: 5px;">%{int(round(float(otv_oran)))}</td>
-<td style="border: 1px solid #ccc; padding: 5px;">%{int(round(float(kdv_oran)))}</td>
-</tr>"""
-
-                invoice_html += """
-</table>
-<p style="margin-top: 10px; font-style: italic; color: #555;">* Vergi oranları sistem tarafından otomatik hesaplanmıştır. Lütfen beyannamenizi bu oranlara göre doldurunuz.</p>
-</div>
-</div>"""
+                # Fatura HTML'i (ödev, öğrenci, fatura, veri sürümü) başına bir kez üretilir ve önbellekten okunur
+                cache_key = (handle.sheet, str(data.get('Öğrenci_Numarası')), str(data.get('Fatura_Numarası')), handle.version)
+                invoice_html = get_render_cache().get_or_render(cache_key, render.render_invoice, data)
                 st.markdown(invoice_html, unsafe_allow_html=True)
                 st.info("💡 Yukarıdaki faturadaki bilgileri kullanarak yan sekmedeki beyannameyi doldurunuz.")
 
-        with main_tabs[1]:
+        # Beyanname formu ayrı bir parçadır (st.fragment): tescil yalnızca bu bölümü yeniden çalıştırır,
+        # fatura ve sayfa başlığı yeniden üretilmez. Kayıt her çalıştırmada oturum tanıtıcısından okunur.
+        @st.fragment
+        def declaration_form():
+            resolved = student_record() if st.session_state.logged_in else None
+            handle = st.session_state.student
+            if resolved is None or not submission_decision(resolved[0], handle.sheet, handle.row).allowed:
+                # Oturum, kilit ya da süre durumu değişmiş: sayfanın tamamı yeniden çalışıp durumu gösterir
+                st.rerun()
+            snapshot, data = resolved
             st.write(f"**Beyan Sahibi:** {data.get('Öğrenci_Ad_Soyad', '---')} | **Fatura No:** {data.get('Fatura_Numarası', '---')}")
             
             with st.form("bilge_form"):
@@ -530,53 +712,55 @@ elif page == "Dijital Beyanname":
                 st.markdown('<div class="section-header">1. GENEL BİLGİLER & TARAFLAR</div>', unsafe_allow_html=True)
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    v_gumruk = st.text_input("Varış Gümrük İdaresi (Box A)", help="Örn: Kapıkule Gümrük Müdürlüğü")
-                    b_turu = st.text_input("Beyanname Türü (Box 1)", help="Örn: IM")
-                    c_rejimi = st.text_input("Çıkış Rejimi (Box 1)", help="Örn: 1000")
-                    ref_no = st.text_input("Referans Numarası (Box 7)")
+                    v_gumruk = st.text_input("Varış Gümrük İdaresi (Box A)", help="Örn: Kapıkule Gümrük Müdürlüğü", key="v_gumruk")
+                    b_turu = st.text_input("Beyanname Türü (Box 1)", help="Örn: IM", key="b_turu")
+                    c_rejimi = st.text_input("Çıkış Rejimi (Box 1)", help="Örn: 1000", key="c_rejimi")
+                    ref_no = st.text_input("Referans Numarası (Box 7)", key="ref_no")
                 with col2:
-                    gonderici = st.text_area("Gönderici/İhracatçı (Box 2)", help="Ad, Adres ve Vergi No")
-                    alici = st.text_area("Alıcı (Box 8)", help="Ad, Adres ve Verig No")
+                    gonderici = st.text_area("Gönderici/İhracatçı (Box 2)", help="Ad, Adres ve Vergi No", key="gonderici")
+                    alici = st.text_area("Alıcı (Box 8)", help="Ad, Adres ve Verig No", key="alici")
                 with col3:
-                    temsilci = st.text_area("Beyan Sahibi/Temsilci (Box 14)", help="Ad, Adres ve Vergi No")
-                    b_yeri = st.text_input("Beyan Yeri")
-                    b_tarihi = st.text_input("Beyan Tarihi (GG.AA.YYYY)")
+                    temsilci = st.text_area("Beyan Sahibi/Temsilci (Box 14)", help="Ad, Adres ve Vergi No", key="temsilci")
+                    b_yeri = st.text_input("Beyan Yeri", key="b_yeri")
+                    b_tarihi = st.text_input("Beyan Tarihi (GG.AA.YYYY)", key="b_tarihi")
 
                 # SECTION 2: TASIMA VE FINANS
                 st.markdown('<div class="section-header">2. TAŞIMA VE FİNANSAL BİLGİLER</div>', unsafe_allow_html=True)
                 c1, c2, c3 = st.columns(3)
                 with c1:
-                    sevk_ulke = st.text_input("Sevk Ülkesi Kodu (Box 15)")
-                    ticaret_ulke = st.text_input("Ticareti Yapan Ülke Kodu(Box 11)")
-                    gidecek_ulke = st.text_input("Gideceği Ülke Kodu (Box 17)")
-                    ilk_varis_ulke = st.text_input("İlk Varış Ülkesi Kodu (Box 17)")
+                    sevk_ulke = st.text_input("Sevk Ülkesi Kodu (Box 15)", key="sevk_ulke")
+                    ticaret_ulke = st.text_input("Ticareti Yapan Ülke Kodu(Box 11)", key="ticaret_ulke")
+                    gidecek_ulke = st.text_input("Gideceği Ülke Kodu (Box 17)", key="gidecek_ulke")
+                    ilk_varis_ulke = st.text_input("İlk Varış Ülkesi Kodu (Box 17)", key="ilk_varis_ulke")
                 with c2:
-                    tasima_araci = st.text_input("Taşıma Aracı Kimliği (Box 18/21)")
-                    konteyner = st.text_input("Konteyner (Box 19)", help="0 veya 1")
-                    teslim_sekli = st.text_input("Teslim Şekli ve Yeri (Box 20)", help="Örn: FCA - Viyana")
+                    tasima_araci = st.text_input("Taşıma Aracı Kimliği (Box 18/21)", key="tasima_araci")
+                    konteyner = st.text_input("Konteyner (Box 19)", help="0 veya 1", key="konteyner")
+                    teslim_sekli = st.text_input("Teslim Şekli ve Yeri (Box 20)", help="Örn: FCA - Viyana", key="teslim_sekli")
                 with c3:
-                    tasima_sinir = st.text_input("Taşıma Şekli - Sınır (Box 25)")
-                    tasima_dahili = st.text_input("Taşıma Şekli - Dahili (Box 26)")
-                    yukleme_yeri = st.text_input("Yükleme Yeri (Box 27)")
+                    tasima_sinir = st.text_input("Taşıma Şekli - Sınır (Box 25)", key="tasima_sinir")
+                    tasima_dahili = st.text_input("Taşıma Şekli - Dahili (Box 26)", key="tasima_dahili")
+                    yukleme_yeri = st.text_input("Yükleme Yeri (Box 27)", key="yukleme_yeri")
 
                 st.divider()
                 f1, f2, f3 = st.columns(3)
                 with f1:
-                    doviz = st.text_input("Döviz (Box 22)", help="Örn: EUR, USD")
-                    top_fatura = st.number_input("Toplam Fatura Değeri", format="%.2f")
+                    doviz = st.text_input("Döviz (Box 22)", help="Örn: EUR, USD", key="doviz")
+                    top_fatura = st.number_input("Toplam Fatura Değeri", format="%.2f", key="top_fatura")
                 with f2:
-                    odeme_sekli = st.text_input("Ödeme Şekli (Box 28)")
-                    banka = st.text_input("Banka Adı / Şube")
-                    top_net = st.number_input("Toplam Net Ağırlık (KG)", format="%.2f")
+                    odeme_sekli = st.text_input("Ödeme Şekli (Box 28)", key="odeme_sekli")
+                    banka = st.text_input("Banka Adı / Şube", key="banka")
+                    top_net = st.number_input("Toplam Net Ağırlık (KG)", format="%.2f", key="top_net")
                 with f3:
-                    iban = st.text_input("IBAN")
-                    swift = st.text_input("SWIFT Kodu")
-                    top_brut = st.number_input("Toplam Brüt Ağırlık (KG)", format="%.2f")
+                    iban = st.text_input("IBAN", key="iban")
+                    swift = st.text_input("SWIFT Kodu", key="swift")
+                    top_brut = st.number_input("Toplam Brüt Ağırlık (KG)", format="%.2f", key="top_brut")
 
                 # SECTION 3: KALEMLER
                 st.markdown('<div class="section-header">3. KALEM DETAYLARI (EŞYA BİLGİLERİ)</div>', unsafe_allow_html=True)
                 
-                tabs = st.tabs(["Kalem 1", "Kalem 2", "Kalem 3"])
+                # Yalnızca bu faturada bulunan kalemler için sekme ve alan oluşturulur
+                item_count = grading.item_count_of(data)
+                tabs = st.tabs([f"Kalem {i}" for i in range(1, item_count + 1)]) if item_count else []
                 
                 for i, tab in enumerate(tabs, 1):
                     with tab:
@@ -614,79 +798,38 @@ elif page == "Dijital Beyanname":
                 submit_decl = st.form_submit_button("BEYANNAMEYİ TESCİL ET (GÖNDER)")
 
                 if submit_decl:
-                    # Build a comparison of student inputs vs system (expected) values
-                    comparisons = []
-                    def add_comp(label, student_val, expected_val):
-                        comparisons.append({
-                            "Alan": label,
-                            "Öğrenci Cevabı": "" if student_val is None else str(student_val),
-                            "Sistem (Beklenen)": "" if expected_val is None else str(expected_val)
-                        })
-
-                    # General fields
-                    add_comp("Varış Gümrük İdaresi", v_gumruk, data.get('Varış Gümrük İdaresi', '---'))
-                    add_comp("Beyanname Türü", b_turu, data.get('Beyanname_Türü', '---'))
-                    add_comp("Çıkış Rejimi", c_rejimi, data.get('Rejim_Kodu', '---'))
-                    add_comp("Referans Numarası", ref_no, data.get('Referans_Numarası', '---'))
-                    add_comp("Gönderici", gonderici, data.get('Gönderici_Adı_Adresi_VergiNo', '---'))
-                    add_comp("Alıcı", alici, data.get('Alıcı_Adı_Adresi', '---'))
-                    add_comp("Beyan Sahibi/Temsilci", temsilci, data.get('Beyan_Sahibi_Temsilci', '---'))
-                    add_comp("Beyan Yeri", b_yeri, data.get('Beyan_Yeri', '---'))
-                    add_comp("Beyan Tarihi", b_tarihi, data.get('Beyan_Tarihi', '---'))
-
-                    # Transport/finance
-                    add_comp("Sevk Ülkesi", sevk_ulke, data.get('Sevk_Ülkesi_Adı_Kodu', '---'))
-                    add_comp("Ticareti Yapan Ülke", ticaret_ulke, data.get('Ticareti_Yapan_Ülke_Kodu', '---'))
-                    add_comp("Gideceği Ülke", gidecek_ulke, data.get('Gideceği_Ülke_Kodu', '---'))
-                    add_comp("İlk Varış Ülkesi", ilk_varis_ulke, data.get('İlk_Varış_Ülkesi_Kodu', '---'))
-                    add_comp("Taşıma Aracı", tasima_araci, data.get('Taşıma_Aracı_Kimliği', '---'))
-                    add_comp("Konteyner", konteyner, data.get('Konteyner_Kodu', '---'))
-                    add_comp("Teslim Şekli", teslim_sekli, data.get('Teslim_Şekli_Yeri', '---'))
-                    add_comp("Döviz", doviz, data.get('Döviz', '---'))
-                    add_comp("Toplam Fatura Değeri", top_fatura, data.get('Toplam_Fatura_Değeri', '---'))
-
-                    # Items and tax comparisons
-                    for i in range(1, 4):
-                        add_comp(f"Kalem {i} - Ürün Tanımı", st.session_state.get(f"tanim_{i}"), data.get(f'Ürün_Tanımı_{i}', '---'))
-                        add_comp(f"Kalem {i} - GTİP", st.session_state.get(f"gtip_{i}"), data.get(f'GTIP_Kodu_{i}', '---'))
-                        add_comp(f"Kalem {i} - Net Ağırlık", st.session_state.get(f"net_{i}"), data.get(f'Net_Ağırlık_KG_{i}', '---'))
-                        add_comp(f"Kalem {i} - Brüt Ağırlık", st.session_state.get(f"gross_{i}"), data.get(f'Brüt_Ağırlık_KG_{i}', '---'))
-                        add_comp(f"Kalem {i} - Kalem Fiyatı", st.session_state.get(f"fiyat_{i}"), data.get(f'Kalem_Fiyatı_{i}', '---'))
-                        # Show system-calculated expected tax values as info in comparison
-                        try:
-                            cif_val = float(data.get(f'CIF_Toplam_{i}', 0))
-                            gv_rate = float(data.get(f'GV_Orani_{i}', 0))
-                            otv_rate = float(data.get(f'ÖTV_Orani_{i}', 0))
-                            kdv_rate = float(data.get(f'KDV_Orani_{i}', 0))
-                            expected_gv = cif_val * (gv_rate / 100)
-                            otv_matrah = cif_val + expected_gv
-                            expected_otv = otv_matrah * (otv_rate / 100)
-                            kdv_matrah = otv_matrah + expected_otv
-                            expected_kdv = kdv_matrah * (kdv_rate / 100)
-                        except Exception:
-                            expected_gv = expected_otv = expected_kdv = '---'
-
-                        add_comp(f"Kalem {i} - Sistem GV (Beklenen)", st.session_state.get(f"gv_{i}"), expected_gv)
-                        add_comp(f"Kalem {i} - Sistem ÖTV (Beklenen)", st.session_state.get(f"otv_{i}"), expected_otv)
-                        add_comp(f"Kalem {i} - Sistem KDV (Beklenen)", st.session_state.get(f"kdv_{i}"), expected_kdv)
+                    # Öğrenci cevaplarını beklenen değerlerle karşılaştır (bkz. grading.py)
+                    form_values = {key: st.session_state.get(key) for key in grading.form_keys(item_count)}
+                    with metrics.timer("notlandirma.beyanname"):
+                        # Oturumun veri sürümünde derlenmiş cevap anahtarının öğrenci satırı
+                        expected = snapshot.answer_key(handle.sheet).take([handle.row], item_count)
+                        grade = grading.grade_single(form_values, expected, item_count)
 
                     # Show neutral confirmation and comparison table (no correct/incorrect labels)
                     st.balloons()
                     st.info("Beyanname kaydedildi. Aşağıda sizin girdiğiniz değerler ve sistemdeki beklenen değerler listelenmiştir.")
-                    comp_df = pd.DataFrame(comparisons)
+                    comp_df = grade.comparison_table()
                     st.dataframe(comp_df, use_container_width=True)
 
-                    # Log submission (kept as success True so it appears in akademisyen raporlarında)
-                    odev_log_name = data.get('Ödev_No', st.session_state.get('current_odev', '1'))
-                    log_attempt(data['Öğrenci_Numarası'], data['Öğrenci_Ad_Soyad'], True, [], odev_log_name)
+                    # Log submission: form değerleri de saklanır, cevap anahtarı değişirse yeniden notlandırılabilir
+                    odev_log_name = data.get('Ödev_No', handle.sheet)
+                    log_attempt(data['Öğrenci_Numarası'], data['Öğrenci_Ad_Soyad'], bool(grade.success()[0]), grade.errors()[0],
+                                odev_log_name, sheet=handle.sheet,
+                                invoice_no=data.get('Fatura_Numarası'), payload=form_values)
+
+        with main_tabs[1]:
+            declaration_form()
 
 elif page == "Akademisyen Paneli":
     st.title("📽️ Öğretim Üyesi Yönetim Paneli")
     
-    if not st.session_state.admin_mode:
+    if not st.session_state.admin_mode and current_course().admin_password_hash is None:
+        st.warning("Bu ders için yönetici şifresi tanımlı değil. Şifre özetini `python auth.py` ile üretip "
+                   "courses.json'da `admin_password_hash` olarak ayarlayın.")
+    elif not st.session_state.admin_mode:
         password = st.text_input("Yönetici Şifresi", type="password")
-        if st.button("Giriş"):
-            if password == ADMIN_PASSWORD:
+        if st.button("Giriş") and not login_throttled("yonetici"):
+            if current_course().check_admin_password(password):
                 st.session_state.admin_mode = True
                 st.rerun()
             else:
@@ -695,143 +838,33 @@ elif page == "Akademisyen Paneli":
         if st.sidebar.button("Çıkış Yap"):
             st.session_state.admin_mode = False
             st.rerun()
-            
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r", encoding="utf-8") as f:
-                logs = json.load(f)
-            
-            log_df = pd.DataFrame(logs)
-            
-            # Sort by timestamp descending (En yeni en üstte)
-            if 'timestamp' in log_df.columns:
-                log_df = log_df.sort_values(by="timestamp", ascending=False)
-            
-            # Filter by Assignment
-            all_odevs = ["Hepsi"] + sorted(log_df['odev_no'].unique().tolist())
-            selected_filter = st.selectbox("Ödev Filtresi", all_odevs)
-            
-            if selected_filter != "Hepsi":
-                log_df = log_df[log_df['odev_no'] == selected_filter]
 
-            st.subheader(f"📝 Beyanname Tescil İşlemleri (Loglar) - {selected_filter}")
-            st.dataframe(log_df, use_container_width=True)
-            
-            # Download Button for Logs
-            csv = log_df.to_csv(index=False).encode('utf-8-sig')
-            st.download_button(
-                label="📥 Bu Raporu İndir (CSV)",
-                data=csv,
-                file_name=f'beyanname_loglari_{selected_filter}_{datetime.now().strftime("%Y%m%d")}.csv',
-                mime='text/csv',
-            )
-            
-            col_a, col_b, col_c = st.columns(3)
-            with col_a:
-                st.metric("Toplam Deneme", len(log_df))
-            with col_b:
-                success_count = log_df['success'].sum()
-                st.metric("Başarılı Tescil", success_count)
-            with col_c:
-                success_rate = (success_count / len(log_df)) * 100 if len(log_df) > 0 else 0
-                st.metric("Genel Başarı Oranı", f"%{success_rate:.1f}")
-
-            # Student Submission Status
-            st.divider()
-            st.subheader("📊 Öğrenci Beyanname Teslim Durumu")
-            
-            all_students = get_all_unique_students()
+        # Cevap anahtarı (Excel) değiştiyse saklanan tüm teslimleri yeniden notlandır
+        regrade_job = get_regrade_job()
+        if st.sidebar.button("Teslimleri Yeniden Notlandır", disabled=regrade_job.running):
+            regrade_job.start(get_log_store(), current_course().excel_path, get_data_service().current())
+        with st.sidebar:
+            regrade_status(regrade_job)
 
-            if not all_students.empty:
-                # Log dosyasında herhangi bir deneme yapmış öğrencileri bul (başarılı/başarısız fark etmez)
-                logged_students = pd.DataFrame(logs)[['student_no']].drop_duplicates()
-                logged_students['student_no'] = logged_students['student_no'].astype(str)
-                
-                # Tüm öğrencileri deneme yapmış öğrencilerle birleştir
-                merged_df = pd.merge(
-                    all_students,
-                    logged_students,
-                    left_on=all_students['Öğrenci_Numarası'].astype(str),
-                    right_on='student_no',
-                    how='left',
-                    indicator=True
-                )
-                
-                # Teslim durumunu belirle: logda varsa 'Teslim Etti', yoksa 'Teslim Etmedi'
-                merged_df['Teslim Durumu'] = merged_df['_merge'].apply(lambda x: "✅ Teslim Etti" if x == 'both' else "❌ Teslim Etmedi")
-                
-                # Gereksiz sütunları temizle ve yeniden adlandır
-                final_submission_status = merged_df[['Öğrenci_Numarası', 'Öğrenci_Ad_Soyad', 'Teslim Durumu']]
-                final_submission_status.columns = ["Öğrenci Numarası", "Öğrenci Adı Soyadı", "Teslim Durumu"]
-                
-                st.dataframe(final_submission_status, use_container_width=True)
-            else:
-                st.info("Excel dosyasında ödev atanmış öğrenci bulunmamaktadır.")
-
-            # Analytics
-            st.subheader("En Çok Hata Yapılan Alanlar")
-            all_errors = []
-            for err_list in log_df['errors']:
-                for e in err_list:
-                    if "Kalem" in e:
-                        parts = e.split(":")
-                        if len(parts) > 1:
-                            all_errors.append(parts[1].strip())
-                        else:
-                            all_errors.append(e)
-                    else:
-                        all_errors.append(e)
-            
-            if all_errors:
-                err_counts = pd.Series(all_errors).value_counts().reset_index()
-                err_counts.columns = ['Hata Türü', 'Sayı']
-                
-                fig = px.bar(err_counts, x='Hata Türü', y='Sayı', 
-                            title="Sınıf Genelinde Hata Dağılımı",
-                            color='Sayı', color_continuous_scale='Blues')
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("Henüz hata kaydı bulunamamaktadır.")
-        else:
-            st.info("Henüz hiç deneme yapılmadı.")
-                
-        # Login Attempts Section
+        require_ready()
+
+        # Bölümler ayrı parçalardır: bir bölümdeki süzgeç/sayfa değişince yalnızca o bölüm yeniden çalışır
+        submission_log_panel()
+        submission_status_panel()
+        login_log_panel()
+
+        # Sistem kilidi ve ödev takvimi (bkz. policy.py); değişiklik tüm oturumlara en geç birkaç saniyede yansır
         st.divider()
-        st.subheader("🔑 Sisteme Giriş Yapan Öğrenciler (Tekil)")
-        if os.path.exists(LOGIN_LOG_FILE):
-            with open(LOGIN_LOG_FILE, "r", encoding="utf-8") as f:
-                login_logs = json.load(f)
-            login_df = pd.DataFrame(login_logs)
-            
-            if not login_df.empty:
-                # Sort by timestamp descending
-                login_df = login_df.sort_values(by="timestamp", ascending=False)
-                
-                # Group by student_no to get unique students
-                unique_logins = login_df.groupby('student_no').agg({
-                    'timestamp': 'max',
-                    'status': 'last', # Since we sorted descending, first is last
-                    'odev_no': 'last',
-                    'details': 'count' # Count attempts
-                }).reset_index()
-                
-                unique_logins.columns = ['Öğrenci No', 'Son İşlem Tarihi', 'Son Durum', 'Son Ödev', 'Toplam Giriş Denemesi']
-                
-                # Show unique students table
-                st.dataframe(unique_logins, use_container_width=True)
-                
-                # Download Button for Login Logs
-                csv_login = unique_logins.to_csv(index=False).encode('utf-8-sig')
-                st.download_button(
-                    label="📥 Giriş Listesini İndir (CSV)",
-                    data=csv_login,
-                    file_name=f'giris_listesi_{datetime.now().strftime("%Y%m%d")}.csv',
-                    mime='text/csv',
-                )
-                
-                # Show raw logs in expander
-                with st.expander("Tüm Giriş Loglarını Gör (Detaylı)"):
-                    st.dataframe(login_df, use_container_width=True)
-            else:
-                st.info("Henüz giriş denemesi kaydı bulunmamaktadır.")
-        else:
-            st.info("Henüz giriş denemesi kaydı bulunmamaktadır.")
+        with st.expander("🔒 Erişim ve Teslim Takvimi"):
+            access_policy_panel()
+
+        # Kopya / ortak çalışma analizi: saklanan beyannamelerin parmak izleri karşılaştırılır
+        with st.expander("🕵️ Kopya Analizi"):
+            collusion_panel()
+
+        # Performans: aşama süreleri, önbellek isabet oranları ve dışa aktarma (bkz. metrics.py)
+        st.divider()
+        with st.expander("⏱️ Performans"):
+            performance_panel()
+
+metrics.stop(f"sayfa.{page}", page_started)
@@ -0,0 +1,102 @@
+import getpass
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+
+import metrics
+
+# Giriş yollarının kaba kuvvet denemelerine karşı korunması.
+#
+# - Jeton kovası (token bucket) sınırlayıcı: her anahtarın (oturum, istemci adresi) kovası en
+#   fazla `capacity` jeton tutar ve saniyede `rate` jeton dolar; her giriş denemesi bir jeton
+#   harcar. Sınırlayıcı süreç içidir. Reddedilen deneme log veritabanına yazılmaz, yalnızca
+#   toplu sayaçlarda sayılır (RateLimiter.rejected ve metrics). Ret birkaç aritmetik işlemdir.
+#   Yeniden dolmuş kovalar PRUNE_EVERY denemede bir bellekten atılır.
+# - Yönetici şifresi PBKDF2-SHA256 özeti olarak saklanır ve sabit zamanlı karşılaştırılır.
+#   Özet üretmek için: python auth.py [şifre]  (çıktı courses.json'da "admin_password_hash")
+
+Limit = namedtuple("Limit", "capacity rate")   # rate: saniyede dolan jeton
+
+# Öğrenci girişi: oturum başına 5 deneme, sonra 6 saniyede bir. Okul ağında bütün sınıf tek
+# adresten görünebildiği için istemci adresi sınırı geniştir.
+STUDENT_LIMITS = {"oturum": Limit(5, 1 / 6), "istemci": Limit(60, 2.0)}
+# Yönetici girişi: oturum başına 5 deneme, sonra 30 saniyede bir; adres başına dakikada bir
+ADMIN_LIMITS = {"oturum": Limit(5, 1 / 30), "istemci": Limit(10, 1 / 60)}
+PRUNE_EVERY = 1000
+
+PBKDF2_ITERATIONS = 200_000
+HASH_ALGORITHM = "pbkdf2_sha256"
+
+
+class RateLimiter:
+    def __init__(self, name, limits, clock=time.monotonic):
+        self.name = name
+        self.limits = limits
+        self.clock = clock
+        self.rejected = Counter()   # kapsam -> reddedilen deneme sayısı
+        self._buckets = {}          # (kapsam, anahtar) -> (jeton, son güncelleme)
+        self._attempts = 0
+        self._lock = threading.Lock()
+
+    def _level(self, scope, key, now):
+        limit = self.limits[scope]
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            return limit.capacity
+        tokens, updated = bucket
+        return min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+    def acquire(self, **keys):
+        # keys: kapsam -> anahtar (ör. oturum=..., istemci=...); None anahtarlar atlanır.
+        # Tüm kovalarda jeton varsa her birinden bir jeton düşülür ve 0 döner; yoksa hiçbirinden
+        # düşülmez ve yeniden denemeden önce beklenecek saniye döner.
+        now = self.clock()
+        with self._lock:
+            levels = {scope: self._level(scope, key, now) for scope, key in keys.items() if key is not None}
+            empty = [scope for scope, level in levels.items() if level < 1]
+            if empty:
+                for scope in empty:
+                    self.rejected[scope] += 1
+                    metrics.count(f"giris.red.{self.name}.{scope}")
+                return max((1 - levels[scope]) / self.limits[scope].rate for scope in empty)
+            for scope, level in levels.items():
+                self._buckets[(scope, keys[scope])] = (level - 1, now)
+            self._attempts += 1
+            if self._attempts % PRUNE_EVERY == 0:
+                self._prune(now)
+            return 0.0
+
+    def _prune(self, now):
+        self._buckets = {(scope, key): bucket for (scope, key), bucket in self._buckets.items()
+                         if self._level(scope, key, now) < self.limits[scope].capacity}
+
+
+def hash_password(password, salt=None, iterations=PBKDF2_ITERATIONS):
+    salt = os.urandom(16) if salt is None else salt
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{HASH_ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, encoded):
+    try:
+        algorithm, iterations, salt, digest = encoded.split("$")
+        salt, digest, iterations = bytes.fromhex(salt), bytes.fromhex(digest), int(iterations)
+    except (AttributeError, ValueError):
+        return False
+    if algorithm != HASH_ALGORITHM:
+        return False
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return hmac.compare_digest(candidate, digest)
+
+
+if __name__ == "__main__":
+    # Kullanım: python auth.py [şifre]  (verilmezse sorulur; kabuk geçmişine yazılmaması için önerilir)
+    password = sys.argv[1] if len(sys.argv) > 1 else getpass.getpass("Şifre: ")
+    if not password:
+        print("Kullanım: python auth.py [şifre]")
+        sys.exit(1)
+    print(hash_password(password))
@@ -0,0 +1,514 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import tempfile
+import timeit
+
+import numpy as np
+
+import data_store
+import data_version
+import generator
+import grading
+import plagiarism
+import render
+
+# Sıcak yol mikro-ölçümleri.
+# Kullanım: python benchmarks.py render [excel_dosyası]
+#           python benchmarks.py generate [öğrenci_sayısı]
+#           python benchmarks.py rerun [öğrenci_sayısı]
+#           python benchmarks.py plagiarism [öğrenci_sayısı]
+
+EXCEL_FILE = "mail_merge_wide_3kalem.xlsx"
+
+
+def _first_rows(excel_path, limit=50):
+    manifest = data_store.ensure_store(excel_path)
+    rows = []
+    for sheet_name in data_store.sheet_names(manifest):
+        df = data_store.read_sheet(excel_path, manifest, sheet_name)
+        items = data_store.read_items(excel_path, manifest, sheet_name)
+        rows.extend((sheet_name, r, data_store.record(df, items, r)) for r in range(min(len(df), limit - len(rows))))
+        if len(rows) >= limit:
+            break
+    return manifest["version"], rows
+
+
+def _report(name, seconds, runs):
+    print(f"{name:<32} {seconds / runs * 1e6:10.1f} µs / yeniden çalıştırma")
+
+
+def _baseline_invoice(data):
+    # Önceki app.py'deki satır içi f-string fatura kodu (karşılaştırma için aynen korunur; her zaman 3 kalem)
+    f_no = data.get('Fatura_Numarası', '---')
+    f_tarih = data.get('Beyan_Tarihi', '---')
+    ref = data.get('Referans_Numarası', '---')
+    satici = data.get('Gönderici_Adı_Adresi_VergiNo', '---')
+    alici = data.get('Alıcı_Adı_Adresi', '---')
+    mense = data.get('Sevk_Ülkesi_Adı_Kodu', '---')
+    varis = data.get('Gideceği_Ülke_Kodu', '---')
+    ilk_varis = data.get('İlk_Varış_Ülkesi_Kodu', '---')
+    v_gumruk_adi = data.get('Varış Gümrük İdaresi', '---')
+    tasima = data.get('Taşıma_Aracı_Kimliği', '---')
+    yukleme = data.get('Boşaltma_Yeri', '---')
+    rejimi = data.get('Rejim_Kodu', '---')
+    b_turu = data.get('Beyanname_Türü', '---')
+    t_sinir = data.get('Taşıma_Şekli_Sınır', '---')
+    t_dahili = data.get('Taşıma_Şekli_Dahili', '---')
+    konteyner = data.get('Konteyner_Kodu', '---')
+    ticaret_ulke = data.get('Ticareti_Yapan_Ülke_Kodu', '---')
+    doviz = data.get('Döviz', 'USD')
+    toplam = float(data.get('Toplam_Fatura_Değeri', 0))
+    
+    # Banka ve Ağırlık Bilgileri
+    banka = data.get('Banka_Adı_Şube', '---')
+    swift = data.get('SWIFT_Kodu', '---')
+    iban = data.get('IBAN', '---')
+    net_toplam = data.get('Toplam_Net_Ağırlık_KG', 0)
+    brut_toplam = data.get('Toplam_Brüt_Ağırlık_KG', 0)
+    odeme_sekli = data.get('Ödeme_Şekli', '---')
+    teslim_sekli = data.get('Teslim_Şekli_Yeri', '---')
+    beyan_sahibi = data.get('Beyan_Sahibi_Temsilci', '---')
+
+    invoice_html = f"""<div style="border: 2px solid #004a99; padding: 30px; background-color: white; color: black; font-family: 'Times New Roman', Times, serif; line-height: 1.6;">
+<div style="text-align: center; border-bottom: 3px double #004a99; padding-bottom: 10px; margin-bottom: 20px;">
+<h1 style="color: #004a99; margin: 0; font-size: 28px;">TİCARİ FATURA</h1>
+<div style="font-size: 14px; font-weight: bold;">(COMMERCIAL INVOICE)</div>
+</div>
+
+<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
+<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">İHRACATÇI / SATICI (EXPORTER):</strong>
+<div style="font-size: 14px; white-space: pre-wrap;">{satici}</div>
+</div>
+<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
+<table style="width: 100%; font-size: 14px; border-collapse: collapse;">
+<tr><td style="padding: 3px;"><b>Fatura No:</b></td><td style="padding: 3px;">{f_no}</td></tr>
+<tr><td style="padding: 3px;"><b>Tarih:</b></td><td style="padding: 3px;">{f_tarih}</td></tr>
+<tr><td style="padding: 3px;"><b>Referans:</b></td><td style="padding: 3px;">{ref}</td></tr>
+<tr><td style="padding: 3px;"><b>Döviz:</b></td><td style="padding: 3px;">{doviz}</td></tr>
+<tr><td style="padding: 3px;"><b>Beyanname Türü:</b></td><td style="padding: 3px;">{b_turu}</td></tr>
+<tr><td style="padding: 3px;"><b>Çıkış Rejimi:</b></td><td style="padding: 3px;">{rejimi}</td></tr>
+</table>
+</div>
+</div>
+
+<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
+<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">ALICI / İTHALATÇI (CONSIGNEE):</strong>
+<div style="font-size: 14px; white-space: pre-wrap;">{alici}</div>
+<br>
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">BEYAN SAHİBİ / TEMSİLCİ (DECLARANT):</strong>
+<div style="font-size: 14px; white-space: pre-wrap;">{beyan_sahibi}</div>
+</div>
+<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">NAKLİYE VE LOJİSTİK BİLGİLERİ:</strong>
+<div style="font-size: 13px;">
+<b>Menşe Ülke:</b> {mense}<br>
+<b>Gideceği Ülke:</b> {varis}<br>
+<b>İlk Varış Ülkesi:</b> {ilk_varis}<br>
+<b>Ticareti Yapan Ülke:</b> {ticaret_ulke}<br>
+<b>Gümrük İdaresi:</b> {v_gumruk_adi}<br>
+<b>Taşıma Aracı Kimliği:</b> {tasima}<br>
+<b>Yükleme Yeri:</b> {yukleme}<br>
+<b>Taşıma Şekli (Sınır):</b> {t_sinir}<br>
+<b>Taşıma Şekli (Dahili):</b> {t_dahili}<br>
+<b>Konteyner:</b> {"Evet (1)" if str(konteyner)=="1" else "Hayır (0)"}
+</div>
+</div>
+</div>
+
+<table style="width: 100%; border-collapse: collapse; font-size: 11px; margin-bottom: 20px; border: 1px solid #004a99;">
+<thead>
+<tr style="background-color: #004a99; color: white; text-align: center;">
+<th style="border: 1px solid #004a99; padding: 5px;">Eşyanın Tanımı</th>
+<th style="border: 1px solid #004a99; padding: 5px;">GTİP</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Miktar/Birim</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Net/Brüt (KG)</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Kalem Fiyatı</th>
+<th style="border: 1px solid #004a99; padding: 5px;">İstatistiki Kıymet</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Navlun/Sigorta</th>
+<th style="border: 1px solid #004a99; padding: 5px;">CIF Toplam</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Vergiler</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Genel Toplam</th>
+</tr>
+</thead>
+<tbody>
+"""
+    for i in range(1, 4):
+        invoice_html += f"""
+<tr>
+<td style="border: 1px solid #ddd; padding: 5px;">{data.get(f'Ürün_Tanımı_{i}', '---')}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">{data.get(f'GTIP_Kodu_{i}', '---')}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">{data.get(f'Kap_Adedi_{i}', 0)} {data.get(f'Tamamlayıcı_Ölçü_Birimi_{i}', '---')}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">N: {data.get(f'Net_Ağırlık_KG_{i}', 0)}<br>B: {data.get(f'Brüt_Ağırlık_KG_{i}', 0)}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'Kalem_Fiyatı_{i}', 0)):.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'İstatistiki_Kıymet_FOB_{i}', 0)):.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">N: {float(data.get(f'Navlun_Tutari_{i}', 0)):.2f}<br>S: {float(data.get(f'Sigorta_Tutari_{i}', 0)):.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'CIF_Toplam_{i}', 0)):.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'Vergiler_Toplami_{i}', 0)):.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{float(data.get(f'Toplam_Tutar_{i}', 0)):.2f}</td>
+</tr>"""
+
+    invoice_html += f"""
+</tbody>
+<tfoot>
+<tr style="font-weight: bold; background-color: #f8f9fa;">
+<td colspan="5" style="text-align: right; border: 1px solid #004a99; padding: 10px;">TOPLAMLAR:</td>
+<td colspan="2" style="border: 1px solid #004a99; padding: 10px; text-align: center;">Net: {net_toplam} KG / Brüt: {brut_toplam} KG</td>
+<td colspan="2" style="border: 1px solid #004a99; padding: 10px; text-align: right;">GENEL TOPLAM ({doviz}):</td>
+<td style="border: 1px solid #004a99; padding: 10px; text-align: right;">{toplam:.2f}</td>
+</tr>
+</tfoot>
+</table>
+
+<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
+<div style="width: 60%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">ÖDEME VE BANKA BİLGİLERİ:</strong>
+<div style="font-size: 13px;">
+<b>Ödeme Şekli:</b> {odeme_sekli}<br>
+<b>Teslim Şekli:</b> {teslim_sekli}<br>
+<b>Banka Adı:</b> {banka}<br>
+<b>SWIFT Kodu:</b> {swift}<br>
+<b>IBAN:</b> {iban}
+</div>
+</div>
+<div style="width: 35%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">EK BELGELER:</strong>
+<div style="font-size: 12px;">
+<b>1. Kalem:</b> {data.get('Ek_Belge_Kodu_1', '---')} ({data.get('Ek_Belge_Referans_1', '---')})<br>
+<b>2. Kalem:</b> {data.get('Ek_Belge_Kodu_2', '---')} ({data.get('Ek_Belge_Referans_2', '---')})<br>
+<b>3. Kalem:</b> {data.get('Ek_Belge_Kodu_3', '---')} ({data.get('Ek_Belge_Referans_3', '---')})
+</div>
+</div>
+</div>
+
+<div style="margin-top: 30px; display: flex; justify-content: flex-end;">
+<div style="width: 250px; text-align: center; border-top: 1px solid #000; padding-top: 5px;">
+<b style="font-size: 14px;">Yetkili İmza ve Kaşe</b>
+</div>
+</div>
+
+<div style="margin-top: 20px; padding: 15px; border: 1px dashed #004a99; background-color: #f0f7ff; font-size: 12px;">
+<strong style="color: #004a99; display: block; margin-bottom: 5px;">📌 ÖNEMLİ NOT: BEYANNAME İÇİN VERGİ ORANLARI VE MATRAH MANTIĞI</strong>
+<p style="margin-bottom: 10px; color: #333;">Beyannameyi doldururken aşağıdaki oranları ve kümülatif vergi matrahı mantığını kullanınız:</p>
+<table style="width: 100%; border-collapse: collapse; text-align: center;">
+<tr style="background-color: #e1ecf7; font-weight: bold;">
+<td style="border: 1px solid #ccc; padding: 5px;">Kalem No</td>
+<td style="border: 1px solid #ccc; padding: 5px;">Gümrük Vergisi (GV)<br><small>(CIF üzerinden)</small></td>
+<td style="border: 1px solid #ccc; padding: 5px;">ÖTV<br><small>(CIF + GV üzerinden)</small></td>
+<td style="border: 1px solid #ccc; padding: 5px;">KDV<br><small>(CIF + GV + ÖTV üzerinden)</small></td>
+</tr>
+"""
+    for i in range(1, 4):
+        # Oranları doğrudan yeni eklenen sütunlardan çek
+        gv_oran = data.get(f'GV_Orani_{i}', 0)
+        otv_oran = data.get(f'ÖTV_Orani_{i}', 0)
+        kdv_oran = data.get(f'KDV_Orani_{i}', 0)
+        
+        invoice_html += f"""
+<tr>
+<td style="border: 1px solid #ccc; padding: 5px;">Kalem {i}</td>
+<td style="border: 1px solid #ccc; padding: 5px;">%{int(round(float(gv_oran)))}</td>
+<td style="border: 1px solid #ccc; padding: 5px;">%{int(round(float(otv_oran)))}</td>
+<td style="border: 1px solid #ccc; padding: 5px;">%{int(round(float(kdv_oran)))}</td>
+</tr>"""
+
+    invoice_html += """
+</table>
+<p style="margin-top: 10px; font-style: italic; color: #555;">* Vergi oranları sistem tarafından otomatik hesaplanmıştır. Lütfen beyannamenizi bu oranlara göre doldurunuz.</p>
+</div>
+</div>"""
+    return invoice_html
+
+
+def bench_render(excel_path, runs=2000):
+    version, rows = _first_rows(excel_path)
+    sheet_name, row, data = rows[0]
+
+    # Önceki kod ve yeni şablonlar aynı HTML'i üretmeli (önceki kod her zaman 3 kalem çizer)
+    same = all(_baseline_invoice(d) == render.render_invoice(d, 3) for _, _, d in rows)
+
+    # Önce: her yeniden çalıştırmada fatura HTML'i satır içi f-string'lerle baştan üretilir
+    baseline = timeit.timeit(lambda: _baseline_invoice(data), number=runs)
+    # Ayrıştırılmış şablonlarla önbelleksiz üretim
+    uncached = timeit.timeit(lambda: render.render_invoice(data), number=runs)
+
+    # Sonra: (ödev, satır, veri sürümü) anahtarıyla önbellekten okunur
+    cache = render.RenderCache()
+    key = (sheet_name, row, version)
+    cache.get_or_render(key, render.render_invoice, data)
+    cached = timeit.timeit(lambda: cache.get_or_render(key, render.render_invoice, data), number=runs)
+
+    # Sınıf boyutunda karışık erişim (önbellek ısındıktan sonra)
+    for sheet_name, row, data in rows:
+        cache.get_or_render((sheet_name, row, version), render.render_invoice, data)
+    mixed = timeit.timeit(
+        lambda: [cache.get_or_render((s, r, version), render.render_invoice, d) for s, r, d in rows],
+        number=max(1, runs // len(rows)),
+    )
+
+    print(f"Fatura oluşturma ({len(rows)} öğrenci satırı, {runs} tekrar)")
+    _report("önceki f-string kodu", baseline, runs)
+    _report("önbelleksiz render_invoice", uncached, runs)
+    _report("önbellekten (tek öğrenci)", cached, runs)
+    _report("önbellekten (karışık erişim)", mixed, max(1, runs // len(rows)) * len(rows))
+    print(f"çıktı önceki kodla {'aynı' if same else 'FARKLI'}; hızlanma: şablon x{baseline / uncached:.1f}, "
+          f"önbellek x{baseline / cached:.0f}; önbellek isabet/ıska: {cache.hits}/{cache.misses}")
+
+
+def bench_generate(students="5000", runs=3):
+    # Excel/Parquet yazımı hariç: yalnızca varyantların bellekte üretilmesi
+    students = generator.sample_students(int(students) if str(students).isdigit() else 5000)
+    assignments = generator.default_assignments(3)
+    seconds = timeit.timeit(lambda: generator.generate_cohort(students, 1, assignments), number=runs)
+    print(f"Varyant üretimi ({len(students)} öğrenci x {len(assignments)} ödev, {runs} tekrar)")
+    print(f"{'generate_cohort':<32} {seconds / runs:10.3f} sn / sınıf")
+    one = timeit.timeit(lambda: generator.variant(1, students['Öğrenci_Numarası'].iloc[0], 1), number=100)
+    print(f"{'variant (tek öğrenci)':<32} {one / 100 * 1e3:10.2f} ms")
+
+
+class _ServerSession:
+    # Çalışan bir "streamlit run" sunucusuna tarayıcı gibi bağlanan en küçük istemci: her etkileşimde
+    # tüm pencere öğesi değerleri gönderilir; öğe bir st.fragment içindeyse yeniden çalıştırma tarayıcıdaki
+    # gibi yalnızca o parçayı hedefler.
+    def __init__(self, url):
+        self.url = url
+        self.elements = {}   # etiket -> (öğe türü, pencere öğesi id, parça id)
+        self.states = {}     # pencere öğesi id -> WidgetState
+        self.ws = None
+
+    async def connect(self):
+        import websockets
+        self.ws = await websockets.connect(self.url, max_size=None)
+
+    def find(self, label):
+        for key, value in self.elements.items():
+            if key.startswith(label):
+                return value
+        raise KeyError(f"pencere öğesi bulunamadı: {label}")
+
+    def set(self, label, **value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        _, widget_id, fragment_id = self.find(label)
+        self.states[widget_id] = WidgetState(id=widget_id, **value)
+        return fragment_id
+
+    async def run(self, fragment_id="", trigger=None):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        msg = BackMsg()
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        if trigger:
+            _, widget_id, fragment_id = self.find(trigger)
+            msg.rerun_script.widget_states.widgets.append(WidgetState(id=widget_id, trigger_value=True))
+            msg.rerun_script.fragment_id = fragment_id
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.ws.recv())
+            kind = forward.WhichOneof("type")
+            # st.rerun() ile kesilen çalıştırmanın ardından gelen yeni çalıştırma da beklenir
+            if kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                widget = getattr(element, element.WhichOneof("type"))
+                if getattr(widget, "id", "") and getattr(widget, "label", ""):
+                    self.elements[widget.label] = (element.WhichOneof("type"), widget.id, forward.delta.fragment_id)
+
+
+def _process_cpu(pid):
+    # Sunucu sürecinin kullanıcı + sistem CPU süresi (sn); Linux /proc
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_rerun(students="200", runs=20):
+    # Etkileşim başına sunucu CPU'su: gerçek bir streamlit sunucusu başlatılır, panel ve beyanname
+    # sayfasındaki tipik etkileşimler websocket üzerinden tekrarlanır. Ağ bağlantısı gerekmez.
+    # websockets yalnızca bu ölçümün istemcisidir; uygulamanın bağımlılığı değildir
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("rerun ölçümü atlandı: websockets paketi kurulu değil (pip install websockets)")
+        return
+    import asyncio
+    import json
+    import auth
+    import courses
+    import loadtest
+    from log_store import LogStore
+
+    students = int(students) if str(students).isdigit() else 200
+    workdir, _, sheet_name = loadtest._prepare_workdir(students)
+    # Yalnızca bu ölçüm için geçici yönetici şifresi
+    admin_password = os.urandom(8).hex()
+    with open(os.path.join(workdir, courses.COURSES_FILE), "w", encoding="utf-8") as f:
+        json.dump({courses.DEFAULT_COURSE_ID: {"admin_password_hash": auth.hash_password(admin_password)}}, f)
+    store = LogStore(os.path.join(workdir, loadtest.LOG_DB))
+    student_nos = [str(1000000001 + i) for i in range(students)]
+    for i in range(students * 10):
+        no = student_nos[i % students]
+        store.append_submission(no, f"Öğrenci {no}", sheet_name, i % 3 == 0, [] if i % 3 == 0 else ["GTİP Kodu 1"],
+                                sheet=sheet_name)
+        store.append_login(no, sheet_name, "Başarılı")
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", loadtest.APP_FILE, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    async def measure(session, interaction):
+        # İlk çalıştırma ısınmadır; sonraki runs tekrarın ortalaması alınır
+        await interaction(0)
+        cpu, started = _process_cpu(server.pid), time.perf_counter()
+        for i in range(1, runs + 1):
+            await interaction(i)
+        return (_process_cpu(server.pid) - cpu) / runs, (time.perf_counter() - started) / runs
+
+    async def scenario():
+        session = _ServerSession(f"ws://127.0.0.1:{port}/_stcore/stream")
+        for _ in range(100):
+            try:
+                await session.connect()
+                break
+            except OSError:
+                await asyncio.sleep(0.2)
+        await session.run()
+        while "Öğrenci Numarası" not in session.elements:
+            await asyncio.sleep(0.5)
+            await session.run()
+
+        results = {}
+        session.set("Menü", string_value="Akademisyen Paneli")
+        await session.run()
+        session.set("Yönetici Şifresi", string_value=admin_password)
+        await session.run(trigger="Giriş")
+
+        async def full_rerun(i):
+            await session.run()
+        results["Panelin tamamı (tam çalıştırma)"] = await measure(session, full_rerun)
+
+        async def change_filter(i):
+            fragment_id = session.set("Ödev Filtresi", string_value="Hepsi" if i % 2 else sheet_name)
+            await session.run(fragment_id)
+        results["Ödev Filtresi değişimi"] = await measure(session, change_filter)
+
+        async def change_status(i):
+            fragment_id = session.set("Durum", string_value=("Hepsi", "Teslim Etti", "Teslim Etmedi")[i % 3])
+            await session.run(fragment_id)
+        results["Teslim durumu süzgeci"] = await measure(session, change_status)
+
+        session.set("Menü", string_value="Öğrenci Girişi")
+        await session.run()
+        session.set("Öğrenci Numarası", string_value=student_nos[0])
+        session.set("Yapmak İstediğiniz Ödevi Seçiniz", string_value=sheet_name)
+        await session.run(trigger="Sisteme Giriş Yap")
+        session.set("Menü", string_value="Dijital Beyanname")
+        await session.run()
+
+        async def submit(i):
+            session.set("Varış Gümrük İdaresi", string_value=f"Deneme {i}")
+            await session.run(trigger="BEYANNAMEYİ TESCİL ET")
+        results["Beyanname tescili"] = await measure(session, submit)
+        return results
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Etkileşim başına sunucu süresi ({students} öğrenci, {students * 10} teslim, {runs} tekrar)")
+    print(f"{'etkileşim':<32} {'CPU (ms)':>10} {'süre (ms)':>10}")
+    for name, (cpu, wall) in results.items():
+        print(f"{name:<32} {cpu * 1e3:10.1f} {wall * 1e3:10.1f}")
+
+
+def bench_plagiarism(students="2000", runs=3):
+    # Sentetik teslimler: herkes kendi faturasını alanlarının ~%10'u hatalı girer; öğrencilerin %2'si
+    # bir arkadaşının beyannamesini iki alanı değiştirerek kopyalar, %2'si de başka bir öğrencinin
+    # faturasındaki beş tutarı (fatura toplamı, kalem fiyatı, KDV) kullanır. Analiz süresi ve
+    # yerleştirilen vakaların bulunma oranı; kopya beyannameler kaynağın cevaplarını da taşıdığından
+    # "başkasının cevabı" tablosunda da görünür, bunlar fazladan sayılmaz.
+    count = int(students) if str(students).isdigit() else 2000
+    workdir = tempfile.mkdtemp(prefix="bilge-bench-")
+    try:
+        excel_path = os.path.join(workdir, EXCEL_FILE)
+        generator.write_cohort(generator.generate_cohort(generator.sample_students(count), 1, [("Odev1", 1, "---")]),
+                               excel_path)
+        snapshot = data_version.DataVersionService(excel_path).wait()
+        sheet = snapshot.sheet("Odev1")
+        key = snapshot.answer_key("Odev1")
+        fields = grading.declaration_fields(key.item_count)
+        rng = np.random.default_rng(0)
+        payloads = []
+        for row in range(len(sheet)):
+            payload = {field.form_key: key.display[field.id].iloc[row] for field in fields}
+            for field in fields:
+                if rng.random() < 0.1:
+                    payload[field.form_key] = float(rng.integers(1, 10 ** 6)) if field.kind == "number" else f"HATA{rng.integers(10 ** 9)}"
+            payloads.append(payload)
+        rows = rng.permutation(len(sheet))
+        pairs = len(sheet) // 50
+        for source, target in zip(rows[:pairs], rows[pairs:2 * pairs]):
+            payloads[target] = dict(payloads[source])
+            for k in rng.choice(len(fields), 2, replace=False):
+                payloads[target][fields[k].form_key] = f"HATA{rng.integers(10 ** 9)}"
+        amounts = [field for field in fields if field.id == "top_fatura" or field.id.startswith(("fiyat_", "kdv_"))]
+        for source, target in zip(rows[2 * pairs:3 * pairs], rows[3 * pairs:4 * pairs]):
+            for k in rng.choice(len(amounts), 5, replace=False):
+                payloads[target][amounts[k].form_key] = key.display[amounts[k].id].iloc[source]
+        submissions = [{"id": row + 1, "student_no": sheet['Öğrenci_Numarası'].iloc[row], "sheet": "Odev1",
+                        "invoice_no": sheet['Fatura_Numarası'].iloc[row], "payload": payload}
+                       for row, payload in enumerate(payloads)]
+
+        seconds = timeit.timeit(lambda: plagiarism.find_collusion(submissions, snapshot), number=runs)
+        report = plagiarism.find_collusion(submissions, snapshot)
+        numbers = sheet['Öğrenci_Numarası'].astype(str).to_numpy()
+        planted_similar = {frozenset((numbers[s], numbers[t])) for s, t in zip(rows[:pairs], rows[pairs:2 * pairs])}
+        planted_copied = {(numbers[t], numbers[s]) for s, t in zip(rows[2 * pairs:3 * pairs], rows[3 * pairs:4 * pairs])}
+        found_similar = {frozenset(p) for p in zip(report.similar["Öğrenci"], report.similar["Diğer Öğrenci"])}
+        found_copied = set(zip(report.copied["Öğrenci"], report.copied["Kaynak Öğrenci"]))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Kopya analizi ({len(submissions)} teslim, {len(fields)} alan, {runs} tekrar)")
+    print(f"{'find_collusion':<32} {seconds / runs:10.3f} sn")
+    print(f"{'tüm çiftler (O(n²))':<32} {len(submissions) * (len(submissions) - 1) // 2:10d} çift")
+    print(f"benzer beyanname: {len(planted_similar & found_similar)} / {len(planted_similar)} bulundu, "
+          f"{len(found_similar - planted_similar)} fazladan")
+    extra = {pair for pair in found_copied - planted_copied if frozenset(pair) not in planted_similar}
+    print(f"başkasının cevabı: {len(planted_copied & found_copied)} / {len(planted_copied)} bulundu, "
+          f"{len(extra)} fazladan")
+
+
+BENCHMARKS = {
+    "render": bench_render,
+    "generate": bench_generate,
+    "rerun": bench_rerun,
+    "plagiarism": bench_plagiarism,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Kullanım: python benchmarks.py [{'|'.join(BENCHMARKS)}] [excel_dosyası]")
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](sys.argv[2] if len(sys.argv) > 2 else EXCEL_FILE)
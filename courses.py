@@ -0,0 +1,239 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import analytics
+import auth
+import data_version
+import metrics
+import policy
+from log_store import LogStore
+
+# Çok dersli / çok şubeli kullanım: tek uygulama süreci birden çok dersi sunar.
+# Her dersin kendi klasörü vardır; çalışma kitabı, derlenmiş depo (.bilge_store), log veritabanı,
+# log arşivi, dışa aktarım dosyaları ve teslim politikası (policy.json) bu klasörde tutulur,
+# yönetici şifresi de derse özeldir. Şifre özet olarak verilir ("admin_password_hash", bkz.
+# auth.py); eski düz metin "admin_password" da kabul edilir ve ders yüklenirken özetlenir.
+# Ders kaynakları (veri servisi, log deposu, önbellekler) ilk erişimde kurulur ve IDLE_TIMEOUT
+# boyunca kullanılmayan dersler bellekten atılır; bir sonraki erişimde diskteki derlenmiş
+# depodan yeniden yüklenir.
+#
+# Isıtma: bir dersin tüm ödev sayfaları, kalem tabloları, öğrenci indeksi ve log özetleri arka
+# plan iş parçacığında önceden yüklenir. "warm_on_start" açık olan dersler süreç başlarken
+# (CourseRegistry.warm_up) sırayla ısıtılır; diğerleri ilk erişimde ısıtılmaya başlar. Isıtma
+# bitene kadar arayüz "hazırlanıyor" durumunu gösterir (Course.ready).
+#
+# courses.json biçimi (dosya yoksa tek bir varsayılan ders, eski sabitlerle çalışır; yönetici
+# şifresinin özeti her derste ayarlanmalıdır, bkz. auth.py):
+# {
+#   "gumruk-a": {"title": "Gümrük İşlemleri (A Şubesi)", "dir": "dersler/gumruk-a",
+#                "admin_password_hash": "pbkdf2_sha256$...", "excel": "mail_merge_wide_3kalem.xlsx"}
+# }
+
+COURSES_FILE = "courses.json"
+DEFAULT_COURSE_ID = "varsayilan"
+READY_WAIT = 2.0            # saniye; hazırlanıyor ekranı göstermeden önce ısıtmanın beklendiği süre
+IDLE_TIMEOUT = 30 * 60      # saniye; bu süre kullanılmayan dersin verisi bellekten atılır
+EVICT_INTERVAL = 60         # saniye; boşta kalan dersler en fazla bu sıklıkta taranır
+
+DEFAULT_CONFIG = {
+    "title": "Trakya Üniversitesi Gümrük İşletme Bölümü",
+    "dir": ".",
+    "excel": "mail_merge_wide_3kalem.xlsx",
+    "log_db": "bilge_logs.db",
+    "log_file": "student_logs.json",        # Eski JSON loglar: ilk açılışta log_db'ye aktarılır
+    "login_log_file": "login_logs.json",
+    "admin_password": None,                  # düz metin (eski courses.json); verilirse özetin yerine geçer
+    # Varsayılan şifre yoktur: özet courses.json'da verilmeli (python auth.py). Verilmezse
+    # Akademisyen Paneli'ne giriş kapalıdır.
+    "admin_password_hash": None,
+    "policy_file": policy.POLICY_FILE,      # kilit ve ödev takvimi (Akademisyen Paneli'nden değiştirilir)
+    "warm_on_start": True,
+}
+
+
+class Course:
+    def __init__(self, course_id, config):
+        self.id = course_id
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.title = self.config["title"]
+        self.directory = self.config["dir"]
+        password = self.config["admin_password"]
+        self.admin_password_hash = auth.hash_password(password) if password else self.config["admin_password_hash"]
+        self.excel_path = self.path(self.config["excel"])
+        self.log_db = self.path(self.config["log_db"])
+        self.last_used = time.monotonic()
+        self._resources = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._warm_thread = None
+        self._warm_lock = threading.Lock()
+        self.warm_error = None
+
+    def check_admin_password(self, password):
+        return auth.verify_password(password, self.admin_password_hash)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    @property
+    def loaded(self):
+        return bool(self._resources)
+
+    def resource(self, name, factory):
+        # Derse özel, ilk erişimde kurulan paylaşımlı nesne (veri servisi, log deposu, önbellekler)
+        self.last_used = time.monotonic()
+        value = self._resources.get(name)
+        if value is None:
+            with self._lock:
+                value = self._resources.get(name)
+                if value is None:
+                    if not self._resources:
+                        metrics.count("ders.yukleme")
+                    value = self._resources[name] = factory()
+        return value
+
+    def data_service(self):
+        return self.resource("data", lambda: data_version.DataVersionService(self.excel_path))
+
+    def log_store(self):
+        return self.resource("logs", self._open_log_store)
+
+    def _open_log_store(self):
+        store = LogStore(self.log_db)
+        store.migrate_json(self.path(self.config["log_file"]), self.path(self.config["login_log_file"]))
+        return store
+
+    def policy(self):
+        return self.resource("policy", lambda: policy.Policy(self.path(self.config["policy_file"])))
+
+    def log_aggregates(self):
+        return self.resource("aggregates", analytics.LogAggregates)
+
+    # --- Isıtma ---
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def warm(self):
+        try:
+            with metrics.timer("ders.isitma"):
+                self.data_service().current().warm()
+                self.log_aggregates().refresh(self.log_store())
+            self.warm_error = None
+        except Exception as e:
+            # Isıtma hatası arayüzü kilitlememeli: ders hazır sayılır, eksikler ilk erişimde yüklenir
+            self.warm_error = e
+        self._ready.set()
+        return self
+
+    def start_warm(self):
+        with self._warm_lock:
+            if self.ready or (self._warm_thread is not None and self._warm_thread.is_alive()):
+                return self._warm_thread
+            self._warm_thread = threading.Thread(target=self.warm, name=f"bilge-warm-{self.id}", daemon=True)
+            self._warm_thread.start()
+            return self._warm_thread
+
+    def unload(self):
+        # Açık oturumlar ellerindeki kayıtları kullanmaya devam eder; yalnızca paylaşılan önbellekler bırakılır
+        with self._warm_lock, self._lock:
+            service = self._resources.get("data")
+            if service is not None and service.rebuilding:
+                return False
+            if self._warm_thread is not None and self._warm_thread.is_alive():
+                return False
+            self._resources = {}
+            self._ready.clear()
+        metrics.count("ders.bosaltma")
+        return True
+
+
+class CourseRegistry:
+    def __init__(self, config_path=COURSES_FILE, idle_timeout=IDLE_TIMEOUT):
+        self.config_path = config_path
+        self.idle_timeout = idle_timeout
+        self._courses = {}
+        self._config_mtime = None
+        self._last_evict = time.monotonic()
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _read_config(self):
+        if not os.path.exists(self.config_path):
+            return None, {DEFAULT_COURSE_ID: {}}
+        with open(self.config_path, "r", encoding="utf-8") as f:
+            return os.path.getmtime(self.config_path), json.load(f)
+
+    def _reload(self):
+        # courses.json değişince yeni dersler eklenir; ayarı değişmeyen derslerin yüklü verisi korunur
+        mtime, configs = self._read_config()
+        courses = {}
+        for course_id, config in configs.items():
+            existing = self._courses.get(course_id)
+            if existing is not None and existing.config == dict(DEFAULT_CONFIG, **config):
+                courses[course_id] = existing
+            else:
+                courses[course_id] = Course(course_id, config)
+        self._courses = courses
+        self._config_mtime = mtime
+
+    def _check_config(self):
+        mtime = os.path.getmtime(self.config_path) if os.path.exists(self.config_path) else None
+        if mtime != self._config_mtime:
+            with self._lock:
+                self._reload()
+
+    def ids(self):
+        self._check_config()
+        return list(self._courses)
+
+    def title(self, course_id):
+        return self._courses[course_id].title
+
+    def get(self, course_id=None):
+        # course_id verilmezse (ya da tanımsızsa) ilk ders
+        self._check_config()
+        courses = self._courses
+        course = courses.get(course_id) or next(iter(courses.values()))
+        course.last_used = time.monotonic()
+        if course.last_used - self._last_evict >= EVICT_INTERVAL:
+            self.evict_idle()
+        return course
+
+    def evict_idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._last_evict = now
+        evicted = []
+        for course in list(self._courses.values()):
+            if course.loaded and now - course.last_used >= self.idle_timeout and course.unload():
+                evicted.append(course.id)
+        return evicted
+
+    def warm_up(self):
+        # Süreç başında: "warm_on_start" dersleri tek bir arka plan iş parçacığında sırayla ısıtılır
+        def run():
+            for course in list(self._courses.values()):
+                if course.config["warm_on_start"]:
+                    course.start_warm().join()
+
+        thread = threading.Thread(target=run, name="bilge-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def loaded(self):
+        return [course_id for course_id, course in self._courses.items() if course.loaded]
+
+
+if __name__ == "__main__":
+    # Kullanım: python courses.py [courses.json]
+    registry = CourseRegistry(sys.argv[1] if len(sys.argv) > 1 else COURSES_FILE)
+    for course_id in registry.ids():
+        course = registry.get(course_id)
+        print(f"{course_id}: {course.title} | {course.excel_path} | {course.log_db}")
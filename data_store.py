@@ -0,0 +1,425 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# Excel çalışma kitabından derlenen sütunsal (Parquet) veri deposu.
+# Her sayfa bir kez okunur, beklenen sütunlar / sayısal dönüşümler / "---" doldurma
+# uygulanır ve sayfa başına bir Parquet dosyası olarak yazılır. Uygulama yalnızca
+# bu depodan okur; .xlsx dosyası değiştiğinde depo otomatik olarak yeniden derlenir.
+#
+# Excel'deki geniş kalem blokları (GTIP_Kodu_1 ... GTIP_Kodu_N) derlemede uzun biçimli bir
+# kalem tablosuna (satır, öğrenci, kalem no) açılır; yalnızca gerçekten dolu kalemler saklanır.
+# Genel tabloda her satırın kalem sayısı 'Kalem_Sayısı' sütunundadır.
+
+STORE_DIR = ".bilge_store"
+MANIFEST_NAME = "manifest.json"
+STORE_FORMAT = 2
+ITEM_COUNT = 3  # Yeni üretilen ödevlerin varsayılan kalem sayısı (okuyucular sabit bir sayı varsaymaz)
+MAX_ITEM_COUNT = 99
+
+ROW_COL = 'Satır'               # Kalem tablosunda genel tablodaki satır konumu
+ITEM_NO_COL = 'Kalem_No'
+ITEM_COUNT_COL = 'Kalem_Sayısı'
+
+GENERAL_COLS = [
+    'Öğrenci_Numarası', 'Öğrenci_Ad_Soyad', 'Fatura_Numarası', 'Beyanname_Türü',
+    'Rejim_Kodu', 'Alıcı_Adı_Adresi', 'Beyan_Sahibi_Temsilci', 'Gideceği_Ülke_Kodu',
+    'Teslim_Şekli_Yeri', 'Döviz', 'Toplam_Fatura_Değeri', 'Beyan_Yeri', 'Beyan_Tarihi',
+    'Gönderici_Adı_Adresi_VergiNo', 'İlk_Varış_Ülkesi_Kodu', 'Ticareti_Yapan_Ülke_Kodu',
+    'Referans_Numarası', 'Sevk_Ülkesi_Adı_Kodu', 'Taşıma_Aracı_Kimliği', 'Konteyner_Kodu',
+    'Taşıma_Şekli_Sınır', 'Taşıma_Şekli_Dahili', 'Boşaltma_Yeri', 'Varış Gümrük İdaresi',
+    'Banka_Adı_Şube', 'Ödeme_Şekli', 'Toplam_Net_Ağırlık_KG', 'Toplam_Brüt_Ağırlık_KG',
+    'SWIFT_Kodu', 'IBAN', 'Ödev_No', 'Son_Teslim'
+]
+
+ITEM_FIELDS = [
+    'GTIP_Kodu', 'Ürün_Tanımı', 'Menşe_Ülke_Kodu', 'Kap_Cinsi',
+    'Kap_Adedi', 'Net_Ağırlık_KG', 'Brüt_Ağırlık_KG',
+    'Tamamlayıcı_Ölçü_Birimi', 'Kalem_Fiyatı', 'İstatistiki_Kıymet_FOB',
+    'Navlun_Tutari', 'Sigorta_Tutari', 'CIF_Toplam', 'Vergi_Kodu', 'GV',
+    'GV_Orani', 'ÖTV', 'ÖTV_Orani', 'KDV', 'KDV_Orani',
+    'Vergiler_Toplami', 'Toplam_Tutar', 'Ek_Belge_Kodu', 'Ek_Belge_Referans'
+]
+
+# Bir kalemin var sayılması için bu alanlardan en az birinin dolu olması gerekir
+ITEM_PRESENCE_FIELDS = ['Ürün_Tanımı', 'GTIP_Kodu', 'Kalem_Fiyatı']
+
+GENERAL_NUMERIC_COLS = ['Toplam_Fatura_Değeri', 'Toplam_Net_Ağırlık_KG', 'Toplam_Brüt_Ağırlık_KG']
+
+ITEM_NUMERIC_FIELDS = [
+    'Kap_Adedi', 'Net_Ağırlık_KG', 'Brüt_Ağırlık_KG',
+    'Kalem_Fiyatı', 'İstatistiki_Kıymet_FOB', 'Navlun_Tutari',
+    'Sigorta_Tutari', 'CIF_Toplam', 'GV', 'ÖTV', 'KDV',
+    'Vergiler_Toplami', 'Toplam_Tutar', 'GV_Orani',
+    'ÖTV_Orani', 'KDV_Orani'
+]
+
+
+
+def wide_columns(item_count=ITEM_COUNT):
+    # Excel'deki geniş düzen: genel sütunlar + her kalem için '<alan>_<i>' sütunları
+    return GENERAL_COLS + [f'{field}_{i}' for i in range(1, item_count + 1) for field in ITEM_FIELDS]
+
+
+EXPECTED_COLS = wide_columns(ITEM_COUNT)
+
+_ITEM_COL = re.compile(r"^(%s)_(\d+)$" % "|".join(re.escape(f) for f in sorted(ITEM_FIELDS, key=len, reverse=True)))
+
+_lock = threading.Lock()
+_manifest_cache = {}
+
+
+def item_numbers(columns):
+    # Geniş sayfada bulunan kalem numaraları (ör. ..._1, ..._2, ..._7)
+    numbers = set()
+    for col in columns:
+        m = _ITEM_COL.match(str(col))
+        if m and 1 <= int(m.group(2)) <= MAX_ITEM_COUNT:
+            numbers.add(int(m.group(2)))
+    return sorted(numbers)
+
+
+def _text_columns(df):
+    # Parquet karışık tipli sütun saklayamaz: "---" ile dolan sayı/tarih sütunlarını
+    # metne çevir (uygulama bu değerleri zaten str(...) ile kullanıyor)
+    for col in df.columns:
+        if df[col].dtype == object:
+            values = df[col]
+            if not values.map(lambda v: isinstance(v, str)).all():
+                df[col] = values.map(lambda v: v if isinstance(v, str) else str(v))
+    return df
+
+
+def _is_blank(values):
+    return values.isna().to_numpy() | values.astype(str).str.strip().isin(["", "---", "nan"]).to_numpy()
+
+
+def prepare_sheet(df):
+    # Geniş sayfayı (genel tablo, uzun kalem tablosu) ikilisine ayırır
+    df = df.reset_index(drop=True)
+    numbers = item_numbers(df.columns)
+    item_cols = {f'{field}_{i}' for i in numbers for field in ITEM_FIELDS}
+    general = df[[c for c in df.columns if c not in item_cols]].copy()
+
+    blocks = []
+    for i in numbers:
+        block = pd.DataFrame({field: df[f'{field}_{i}'] if f'{field}_{i}' in df.columns else np.nan
+                              for field in ITEM_FIELDS}, index=df.index)
+        present = np.zeros(len(df), dtype=bool)
+        for field in ITEM_PRESENCE_FIELDS:
+            present |= ~_is_blank(block[field])
+        block = block[present]
+        block.insert(0, ITEM_NO_COL, i)
+        block.insert(0, ROW_COL, block.index.to_numpy())
+        blocks.append(block)
+    if blocks:
+        items = pd.concat(blocks, ignore_index=True).sort_values([ROW_COL, ITEM_NO_COL], kind="stable")
+    else:
+        items = pd.DataFrame(columns=[ROW_COL, ITEM_NO_COL] + ITEM_FIELDS)
+    items = items.reset_index(drop=True)
+    items[ROW_COL] = items[ROW_COL].astype(np.int64)
+    items[ITEM_NO_COL] = items[ITEM_NO_COL].astype(np.int64)
+    for field in ITEM_NUMERIC_FIELDS:
+        items[field] = pd.to_numeric(items[field], errors='coerce').fillna(0)
+    items = _text_columns(items.fillna("---"))
+
+    # Eksik genel sütunları ekle, sayısal sütunları temizle
+    for col in GENERAL_COLS:
+        if col not in general.columns:
+            general[col] = "---"
+    for col in GENERAL_NUMERIC_COLS:
+        general[col] = pd.to_numeric(general[col], errors='coerce').fillna(0)
+    general = _text_columns(general.fillna("---"))
+    general[ITEM_COUNT_COL] = np.bincount(items[ROW_COL].to_numpy(), minlength=len(general))[:len(general)]
+    return general, items
+
+
+def item_slice(item_rows, row):
+    # Kalem tablosu satır konumuna göre sıralıdır: bir satırın kalemleri tek bir dilimdir
+    return np.searchsorted(item_rows, row, side="left"), np.searchsorted(item_rows, row, side="right")
+
+
+def record(general, items, row, item_rows=None):
+    # Tek bir ödev satırını uygulamanın kullandığı düz sözlüğe çevirir ('<alan>_<i>' anahtarları
+    # yalnızca var olan kalemler için üretilir)
+    data = general.iloc[row].to_dict()
+    if item_rows is None:
+        item_rows = items[ROW_COL].to_numpy()
+    start, stop = item_slice(item_rows, row)
+    for item in items.iloc[start:stop].to_dict("records"):
+        i = item[ITEM_NO_COL]
+        for field in ITEM_FIELDS:
+            data[f'{field}_{i}'] = item[field]
+    return data
+
+
+def _scalar(value):
+    # numpy skalerleri sözlük kaydıyla aynı Python tiplerine çevrilir
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class SheetColumns:
+    # Bir sayfanın paylaşılan, salt okunur sütun dizileri. Sürüm başına bir kez kurulur;
+    # oturumlar kayıtları kopyalamak yerine RecordView ile bu diziler üzerinden okur.
+    __slots__ = ("general", "items", "item_rows", "item_nos")
+
+    def __init__(self, general, items=None):
+        self.general = {col: general[col].to_numpy() for col in general.columns}
+        if items is None:
+            self.items, self.item_rows, self.item_nos = {}, None, None
+        else:
+            self.items = {field: items[field].to_numpy() for field in ITEM_FIELDS if field in items.columns}
+            self.item_rows = items[ROW_COL].to_numpy()
+            self.item_nos = items[ITEM_NO_COL].to_numpy()
+
+    def view(self, row):
+        return RecordView(self, row)
+
+
+class RecordView(Mapping):
+    # Tek bir ödev satırının record() ile aynı anahtarları veren salt okunur görünümü:
+    # yalnızca sayfa sütunlarına bir referans ve satırın kalem dilimini tutar, değer kopyalamaz.
+    __slots__ = ("_columns", "_row", "_start", "_stop")
+
+    def __init__(self, columns, row):
+        self._columns = columns
+        self._row = row
+        if columns.item_rows is None:
+            self._start = self._stop = 0
+        else:
+            self._start, self._stop = item_slice(columns.item_rows, row)
+
+    def __getitem__(self, key):
+        columns = self._columns
+        values = columns.general.get(key)
+        if values is not None:
+            return _scalar(values[self._row])
+        m = _ITEM_COL.match(key) if isinstance(key, str) else None
+        values = columns.items.get(m.group(1)) if m else None
+        if values is not None:
+            number = int(m.group(2))
+            for pos in range(self._start, self._stop):
+                if columns.item_nos[pos] == number:
+                    return _scalar(values[pos])
+        raise KeyError(key)
+
+    def __iter__(self):
+        columns = self._columns
+        yield from columns.general
+        for pos in range(self._start, self._stop):
+            number = columns.item_nos[pos]
+            for field in columns.items:
+                yield f'{field}_{number}'
+
+    def __len__(self):
+        return len(self._columns.general) + (self._stop - self._start) * len(self._columns.items)
+
+    def __repr__(self):
+        return f"RecordView(row={self._row}, items={self._stop - self._start})"
+
+
+def widen(general, items, rows):
+    # Seçilen satırları geniş düzene çevirir (toplu notlandırma için). Satırda olmayan kalemlerin
+    # sayısal alanları NaN, metin alanları "---" olur; notlandırıcı bunları kontrol dışı sayar.
+    rows = np.asarray(rows, dtype=np.int64)
+    wide = general.iloc[rows].reset_index(drop=True)
+    selected = items[items[ROW_COL].isin(rows)]
+    if selected.empty:
+        return wide
+    pivot = selected.set_index([ROW_COL, ITEM_NO_COL])[ITEM_FIELDS].unstack(ITEM_NO_COL)
+    pivot = pivot.reindex(rows)
+    pivot.columns = [f'{field}_{i}' for field, i in pivot.columns]
+    pivot = pivot.reset_index(drop=True)
+    for col in pivot.columns:
+        if _ITEM_COL.match(col).group(1) not in ITEM_NUMERIC_FIELDS:
+            pivot[col] = pivot[col].astype(object).where(pivot[col].notna(), "---")
+    return pd.concat([wide, pivot], axis=1)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _store_dir_for(excel_path, store_dir=None):
+    if store_dir:
+        return store_dir
+    return os.path.join(os.path.dirname(os.path.abspath(excel_path)), STORE_DIR)
+
+
+def _read_manifest(store_dir):
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    cached = _manifest_cache.get(path)
+    if cached and cached[0] == stat.st_mtime_ns:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+    if manifest.get("format") != STORE_FORMAT:
+        return None
+    _manifest_cache[path] = (stat.st_mtime_ns, manifest)
+    return manifest
+
+
+def _write_manifest(store_dir, manifest):
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, prefix=".manifest-", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(store_dir, MANIFEST_NAME))
+
+
+def _remove_stale_versions(store_dir, keep):
+    for name in os.listdir(store_dir):
+        path = os.path.join(store_dir, name)
+        if os.path.isdir(path) and name not in keep and not name.startswith(".build-"):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def compile_workbook(excel_path, store_dir=None, sha256=None, frames=None):
+    # frames: Excel'e az önce yazılmış sayfalar bellekte hazırsa ({sayfa: DataFrame}),
+    # çalışma kitabı yeniden okunmadan doğrudan bunlardan derlenir
+    store_dir = _store_dir_for(excel_path, store_dir)
+    os.makedirs(store_dir, exist_ok=True)
+    stat = os.stat(excel_path)
+    sha256 = sha256 or file_sha256(excel_path)
+    version = f"{sha256[:16]}.{STORE_FORMAT}"  # Depo biçimi değişince aynı içerik de yeniden derlenir
+
+    version_dir = os.path.join(store_dir, version)
+    sheets = {}
+    if not os.path.isdir(version_dir):
+        # Çalışma kitabı tek seferde okunur, sayfalar geçici klasöre yazılıp atomik olarak taşınır
+        build_dir = tempfile.mkdtemp(dir=store_dir, prefix=".build-")
+        try:
+            with metrics.timer("veri.excel_okuma"):
+                raw_sheets = frames if frames is not None else pd.read_excel(excel_path, sheet_name=None)
+            for idx, (sheet_name, df) in enumerate(raw_sheets.items()):
+                file_name = f"sheet_{idx:03d}.parquet"
+                with metrics.timer("veri.sayfa_derleme"):
+                    general, items = prepare_sheet(df)
+                general.to_parquet(os.path.join(build_dir, file_name), index=False)
+                items.to_parquet(os.path.join(build_dir, _items_file(file_name)), index=False)
+                sheets[sheet_name] = file_name
+            with open(os.path.join(build_dir, "sheets.json"), "w", encoding="utf-8") as f:
+                json.dump(sheets, f, ensure_ascii=False)
+            try:
+                os.rename(build_dir, version_dir)
+            except OSError:
+                # Başka bir süreç aynı sürümü bizden önce derlemiş
+                shutil.rmtree(build_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+    with open(os.path.join(version_dir, "sheets.json"), "r", encoding="utf-8") as f:
+        sheets = json.load(f)
+
+    previous = _read_manifest(store_dir)
+    manifest = {
+        "format": STORE_FORMAT,
+        "source": os.path.basename(excel_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+        "version": version,
+        "sheets": sheets,
+    }
+    _write_manifest(store_dir, manifest)
+    keep = {version}
+    if previous and previous.get("version"):
+        keep.add(previous["version"])  # Eski sürümü okuyan oturumlar için bir önceki sürüm saklanır
+    _remove_stale_versions(store_dir, keep)
+    return manifest
+
+
+def ensure_store(excel_path, store_dir=None):
+    store_dir = _store_dir_for(excel_path, store_dir)
+    manifest = _read_manifest(store_dir)
+    try:
+        stat = os.stat(excel_path)
+    except FileNotFoundError:
+        # Excel yoksa mevcut derlenmiş depo ile devam et
+        return manifest
+
+    if manifest and manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+        return manifest
+
+    with _lock:
+        manifest = _read_manifest(store_dir)
+        if manifest and manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+            return manifest
+        sha256 = file_sha256(excel_path)
+        if manifest and manifest["sha256"] == sha256:
+            # İçerik aynı, sadece dosya zamanı değişmiş: yeniden derlemeye gerek yok
+            manifest = dict(manifest, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_manifest(store_dir, manifest)
+            return manifest
+        return compile_workbook(excel_path, store_dir, sha256=sha256)
+
+
+def current_manifest(excel_path, store_dir=None):
+    # Derlenmiş deponun son manifesti (Excel'i kontrol etmeden, derleme yapmadan)
+    return _read_manifest(_store_dir_for(excel_path, store_dir))
+
+
+def is_current(excel_path, manifest):
+    # Manifest, diskteki Excel dosyasının güncel hâlinden mi derlenmiş? (yalnızca stat)
+    try:
+        stat = os.stat(excel_path)
+    except FileNotFoundError:
+        return True
+    return bool(manifest) and manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size
+
+
+def sheet_names(manifest):
+    if not manifest:
+        return []
+    return list(manifest["sheets"].keys())
+
+
+def _items_file(file_name):
+    return file_name.replace(".parquet", "_items.parquet")
+
+
+def read_sheet(excel_path, manifest, sheet_name, columns=None, store_dir=None):
+    if not manifest or sheet_name not in manifest["sheets"]:
+        return None
+    store_dir = _store_dir_for(excel_path, store_dir)
+    path = os.path.join(store_dir, manifest["version"], manifest["sheets"][sheet_name])
+    with metrics.timer("veri.parquet_okuma"):
+        return pd.read_parquet(path, columns=columns)
+
+
+def read_items(excel_path, manifest, sheet_name, columns=None, store_dir=None):
+    # Sayfanın uzun biçimli kalem tablosu: (Satır, Kalem_No) sıralı, yalnızca dolu kalemler
+    if not manifest or sheet_name not in manifest["sheets"]:
+        return None
+    store_dir = _store_dir_for(excel_path, store_dir)
+    path = os.path.join(store_dir, manifest["version"], _items_file(manifest["sheets"][sheet_name]))
+    with metrics.timer("veri.parquet_okuma"):
+        return pd.read_parquet(path, columns=columns)
+
+
+if __name__ == "__main__":
+    # Kullanım: python data_store.py [excel_dosyası]
+    source = sys.argv[1] if len(sys.argv) > 1 else "mail_merge_wide_3kalem.xlsx"
+    result = compile_workbook(source)
+    print(f"{source} derlendi: sürüm {result['version']}, {len(result['sheets'])} sayfa")
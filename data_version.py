@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+import data_store
+import grading
+import metrics
+import policy
+import student_index
+
+# İçerik özetine (sha256) göre sürümlenen ödev verisi servisi.
+# Sabit TTL yerine önbellekler veri gerçekten değişene kadar yaşar. Excel dosyası değiştiğinde
+# yeni sürüm arka planda bir kez derlenip ısıtılır; hazır olana kadar tüm oturumlara bir önceki
+# sürüm sunulmaya devam eder.
+
+CHECK_INTERVAL = 2.0  # saniye; Excel dosyasının stat kontrolü en fazla bu sıklıkta yapılır
+KEEP_SNAPSHOTS = 3    # açık oturumların satır tanıtıcıları için bellekte tutulan son sürüm sayısı
+
+# Oturumda tutulan öğrenci tanıtıcısı: kayıt her çalıştırmada paylaşılan sürümden okunur
+StudentHandle = namedtuple("StudentHandle", "version sheet row")
+
+
+class DataSnapshot:
+    # Tek bir veri sürümünün görünümü: sayfalar ve öğrenci indeksi ilk erişimde yüklenir, sonra paylaşılır
+    def __init__(self, excel_path, manifest):
+        self.excel_path = excel_path
+        self.manifest = manifest
+        self.version = manifest["version"] if manifest else None
+        self._sheets = {}
+        self._items = {}     # sayfa -> (uzun kalem tablosu,); kalem tablosu olmayan sayfalar için (None,)
+        self._columns = {}   # sayfa -> data_store.SheetColumns (RecordView'ların okuduğu diziler)
+        self._keys = {}      # sayfa -> derlenmiş cevap anahtarı (grading.AnswerKey)
+        self._deadlines = {} # sayfa -> satır başına son teslim (epoch saniye, NaN: sınır yok) ya da None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def sheet_names(self):
+        return data_store.sheet_names(self.manifest)
+
+    def sheet(self, sheet_name):
+        df = self._sheets.get(sheet_name)
+        if df is None:
+            metrics.count("veri.sayfa_onbellek.iska")
+            with self._lock:
+                df = self._sheets.get(sheet_name)
+                if df is None:
+                    df = data_store.read_sheet(self.excel_path, self.manifest, sheet_name)
+                    self._sheets[sheet_name] = df
+        else:
+            metrics.count("veri.sayfa_onbellek.isabet")
+        return df
+
+    def items(self, sheet_name):
+        entry = self._items.get(sheet_name)
+        if entry is None:
+            with self._lock:
+                entry = self._items.get(sheet_name)
+                if entry is None:
+                    entry = (data_store.read_items(self.excel_path, self.manifest, sheet_name),)
+                    self._items[sheet_name] = entry
+        return entry[0]
+
+    def columns(self, sheet_name):
+        columns = self._columns.get(sheet_name)
+        if columns is None:
+            df = self.sheet(sheet_name)
+            items = self.items(sheet_name)
+            with self._lock:
+                columns = self._columns.get(sheet_name)
+                if columns is None:
+                    columns = self._columns[sheet_name] = data_store.SheetColumns(df, items)
+        return columns
+
+    def record(self, sheet_name, row):
+        # Öğrenci satırının salt okunur görünümü: genel alanlar + yalnızca var olan kalemler
+        return self.columns(sheet_name).view(row)
+
+    def handle(self, sheet_name, row):
+        return StudentHandle(self.version, sheet_name, row)
+
+    def answer_key(self, sheet_name):
+        # Sayfanın tüm satırları için cevap anahtarı, sürüm başına bir kez derlenir
+        key = self._keys.get(sheet_name)
+        if key is None:
+            # Sayfa ve kalem tablosu kilit dışında yüklenir (kendi kilitlerini alırlar)
+            df = self.sheet(sheet_name)
+            items = self.items(sheet_name)
+            with self._lock:
+                key = self._keys.get(sheet_name)
+                if key is None:
+                    with metrics.timer("veri.cevap_anahtari"):
+                        expected = df if items is None else data_store.widen(df, items, np.arange(len(df)))
+                        key = self._keys[sheet_name] = grading.compile_answer_key(expected, version=self.version)
+        return key
+
+    def deadlines(self, sheet_name):
+        # Son_Teslim hücreleri sürüm başına bir kez ayrıştırılır (bkz. policy.deadline_array)
+        if sheet_name not in self._deadlines:
+            df = self.sheet(sheet_name)
+            with self._lock:
+                if sheet_name not in self._deadlines:
+                    self._deadlines[sheet_name] = (policy.deadline_array(df['Son_Teslim'])
+                                                   if df is not None and 'Son_Teslim' in df.columns else None)
+        return self._deadlines[sheet_name]
+
+    def student_index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    with metrics.timer("veri.indeks_kurma"):
+                        self._index = student_index.build_index(self.excel_path, self.manifest)
+        return self._index
+
+    def warm(self):
+        for sheet_name in self.sheet_names():
+            self.sheet(sheet_name)
+            self.items(sheet_name)
+            self.columns(sheet_name)
+            self.answer_key(sheet_name)
+            self.deadlines(sheet_name)
+        self.student_index()
+        return self
+
+
+class DataVersionService:
+    def __init__(self, excel_path, check_interval=CHECK_INTERVAL):
+        self.excel_path = excel_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._builder = None
+        self._last_check = time.monotonic()
+        self.last_error = None
+
+        manifest = data_store.current_manifest(excel_path)
+        if manifest is None:
+            # Hiç derlenmiş sürüm yok: ilk derleme beklenmek zorunda
+            manifest = data_store.ensure_store(excel_path)
+        self._snapshot = DataSnapshot(excel_path, manifest)
+        self._recent = OrderedDict([(self._snapshot.version, self._snapshot)])
+        if not data_store.is_current(excel_path, manifest):
+            self._start_rebuild()
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if not data_store.is_current(self.excel_path, self._snapshot.manifest):
+                self._start_rebuild()
+        return self._snapshot
+
+    def snapshot(self, version):
+        # Oturum tanıtıcısının sürümü; bellekte tutulmayan eski sürümler için None
+        current = self._snapshot
+        if current.version == version:
+            return current
+        return self._recent.get(version)
+
+    def resolve(self, handle):
+        # Tanıtıcıyı kayda çevirir: (snapshot, RecordView) ya da sürüm artık tutulmuyorsa None
+        snapshot = self.snapshot(handle.version)
+        if snapshot is None:
+            return None
+        return snapshot, snapshot.record(handle.sheet, handle.row)
+
+    @property
+    def rebuilding(self):
+        return self._builder is not None and self._builder.is_alive()
+
+    def _start_rebuild(self):
+        with self._lock:
+            if self.rebuilding:
+                return
+            self._builder = threading.Thread(target=self._rebuild, name="bilge-data-rebuild", daemon=True)
+            self._builder.start()
+
+    def _rebuild(self):
+        try:
+            manifest = data_store.ensure_store(self.excel_path)
+            if manifest and manifest["version"] == self._snapshot.version:
+                # İçerik aynı (yalnızca dosya zamanı değişmiş): mevcut önbellekler geçerli kalır
+                self._snapshot.manifest = manifest
+                return
+            # Yeni sürüm tamamen ısıtıldıktan sonra tek atamayla devreye alınır
+            with metrics.timer("veri.surum_isitma"):
+                snapshot = DataSnapshot(self.excel_path, manifest).warm()
+            # Eski sürümler açık oturumlar için bir süre daha tutulur
+            recent = OrderedDict(self._recent)
+            recent[snapshot.version] = snapshot
+            while len(recent) > KEEP_SNAPSHOTS:
+                recent.popitem(last=False)
+            self._recent = recent
+            self._snapshot = snapshot
+            self.last_error = None
+        except Exception as e:
+            # Bozuk/yarım yazılmış Excel: önceki sürümle devam et, bir sonraki kontrolde tekrar dene
+            self.last_error = e
+
+    def wait(self, timeout=None):
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+        return self._snapshot
@@ -0,0 +1,167 @@
+import csv
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+
+from openpyxl import Workbook
+
+import metrics
+from log_store import LOG_DB, LogStore
+
+# Logların ve notların dışa aktarımı (CSV / XLSX). Dosya yalnızca indirme istendiğinde üretilir:
+# kayıtlar log deposundan EXPORT_CHUNK'lık parçalar hâlinde okunup doğrudan diske yazılır, yani
+# bellek kullanımı log boyutundan bağımsızdır (XLSX için openpyxl write-only kipi). Üretilen dosya
+# süzgeç başına önbelleğe alınır ve ilgili tabloya yeni kayıt gelene ya da teslimler yeniden
+# notlandırılana kadar yeniden kullanılır.
+
+EXPORT_DIR = ".bilge_exports"
+KINDS = ("teslimler", "girisler", "notlar")
+FORMATS = ("csv", "xlsx")
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+SUBMISSION_HEADER = ["Zaman", "Öğrenci No", "Öğrenci Adı", "Ödev", "Sonuç", "Hatalar"]
+LOGIN_HEADER = ["Öğrenci No", "Son İşlem Tarihi", "Son Durum", "Son Ödev", "Toplam Giriş Denemesi"]
+GRADE_HEADER = ["Öğrenci No", "Öğrenci Adı", "Deneme Sayısı", "Başarılı Tescil", "Not",
+                "İlk Başarı Zamanı", "Son Teslim Zamanı"]
+
+
+def _submission_rows(store, filters):
+    for row in store.iter_submissions(**filters):
+        yield [row["timestamp"], row["student_no"], row["student_name"], row["odev_no"],
+               "Başarılı" if row["success"] else "Hatalı",
+               "; ".join(json.loads(row["errors"]) if row["errors"] else [])]
+
+
+def _login_rows(store, filters):
+    for row in store.iter_login_summary(**filters):
+        yield [row["student_no"], row["last_timestamp"], row["status"], row["odev_no"], row["attempts"]]
+
+
+def _grade_row(row):
+    passed = bool(row["passed"])
+    return [row["student_no"], row["student_name"], row["attempts"], row["successes"],
+            "Geçti" if passed else "Kaldı", row["first_success"] or "", row["last_timestamp"]]
+
+
+def _grade_sheets(store, filters):
+    # Ödev başına bir sayfa: (ödev, satır üreteci) çiftleri. Kayıtlar ödeve göre sıralı geldiğinden
+    # her sayfa tek geçişte, sırayla üretilir.
+    rows = iter(store.iter_grades(odev_no=filters.get("odev_no")))
+    row = next(rows, None)
+    while row is not None:
+        odev = row["odev_no"]
+
+        def sheet_rows():
+            nonlocal row
+            while row is not None and row["odev_no"] == odev:
+                yield _grade_row(row)
+                row = next(rows, None)
+
+        yield odev, sheet_rows()
+
+
+def _write_csv(path, header, rows):
+    # Excel'in Türkçe karakterleri doğru açması için BOM'lu UTF-8
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _write_xlsx(path, sheets):
+    # sheets: (sayfa adı, başlık, satır üreteci) üçlüleri
+    wb = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        ws = wb.create_sheet(title=_sheet_title(title))
+        ws.append(header)
+        for row in rows:
+            ws.append(row)
+    if not wb.worksheets:
+        wb.create_sheet(title="Boş")
+    wb.save(path)
+
+
+def _sheet_title(name):
+    # Excel sayfa adı: en çok 31 karakter, []:*?/\ içeremez
+    return "".join("_" if c in "[]:*?/\\" else c for c in str(name))[:31] or "Sayfa"
+
+
+def write_export(store, kind, fmt, path, filters=None):
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+    if kind == "teslimler":
+        header, rows, title = SUBMISSION_HEADER, _submission_rows(store, filters), "Teslimler"
+    elif kind == "girisler":
+        header, rows, title = LOGIN_HEADER, _login_rows(store, filters), "Girişler"
+    elif kind == "notlar":
+        if fmt == "xlsx":
+            sheets = ((f"Ödev {odev}", GRADE_HEADER, rows) for odev, rows in _grade_sheets(store, filters))
+            return _write_xlsx(path, sheets)
+        header = ["Ödev"] + GRADE_HEADER
+        rows = ([row["odev_no"]] + _grade_row(row) for row in store.iter_grades(odev_no=filters.get("odev_no")))
+        title = "Notlar"
+    else:
+        raise ValueError(f"Bilinmeyen dışa aktarım türü: {kind}")
+
+    if fmt == "csv":
+        _write_csv(path, header, rows)
+    elif fmt == "xlsx":
+        _write_xlsx(path, [(title, header, rows)])
+    else:
+        raise ValueError(f"Bilinmeyen dosya biçimi: {fmt}")
+
+
+class ExportCache:
+    # Süzgeç başına son dışa aktarım dosyası; log tablosunun değişim işareti aynı kaldıkça yeniden kullanılır
+    def __init__(self, export_dir=EXPORT_DIR):
+        self.export_dir = export_dir
+        self._entries = {}   # anahtar -> (değişim işareti, dosya yolu)
+        self._lock = threading.Lock()
+
+    def path(self, store, kind, fmt, filters=None):
+        filters = {k: v for k, v in sorted((filters or {}).items()) if v is not None}
+        key = json.dumps([kind, fmt, filters], ensure_ascii=False)
+        # Giriş özeti yalnızca giriş tablosuna, teslim ve not dökümleri teslim tablosuna bağlıdır
+        marker = store.change_marker("logins" if kind == "girisler" else "submissions")
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] == marker and os.path.exists(cached[1]):
+                metrics.count("disa_aktarim.onbellek.isabet")
+                return cached[1]
+            metrics.count("disa_aktarim.onbellek.iska")
+            os.makedirs(self.export_dir, exist_ok=True)
+            path = os.path.join(self.export_dir, f"{kind}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}.{fmt}")
+            fd, tmp_path = tempfile.mkstemp(dir=self.export_dir, suffix="." + fmt)
+            os.close(fd)
+            try:
+                with metrics.timer(f"disa_aktarim.{kind}.{fmt}"):
+                    write_export(store, kind, fmt, tmp_path, filters)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._entries[key] = (marker, path)
+            return path
+
+    def read(self, store, kind, fmt, filters=None):
+        # st.download_button(data=...) için: dosya yalnızca tıklamada üretilir ve okunur
+        with open(self.path(store, kind, fmt, filters), "rb") as f:
+            return f.read()
+
+
+if __name__ == "__main__":
+    # Kullanım: python export.py <teslimler|girisler|notlar> <csv|xlsx> [çıktı_dosyası] [log_veritabanı]
+    if len(sys.argv) < 3 or sys.argv[1] not in KINDS or sys.argv[2] not in FORMATS:
+        print("Kullanım: python export.py <teslimler|girisler|notlar> <csv|xlsx> [çıktı_dosyası] [log_veritabanı]")
+        sys.exit(1)
+    kind, fmt = sys.argv[1], sys.argv[2]
+    output = sys.argv[3] if len(sys.argv) > 3 else f"{kind}.{fmt}"
+    log_db = sys.argv[4] if len(sys.argv) > 4 else LOG_DB
+    write_export(LogStore(log_db), kind, fmt, output)
+    print(f"{output} yazıldı")
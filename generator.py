@@ -0,0 +1,299 @@
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_store
+from data_store import ITEM_COUNT, wide_columns
+from grading import tax_columns
+from shuffle import write_workbook
+from student_index import normalize_student_no
+
+# Öğrenci başına deterministik ödev varyantı üreticisi.
+# Her alan, (tohum, öğrenci numarası, ödev no, alan adı) üzerinden sayaç tabanlı bir hash
+# (splitmix64) ile seçilir; satırın saklanmasına gerek yoktur, aynı girdiler her zaman aynı
+# varyantı verir. Tüm sınıf NumPy dizileriyle tek seferde üretilir ve hem Excel'e hem de
+# sütunsal (Parquet) depoya yazılır.
+
+# (tanım, GTİP, vergi kodu, GV %, ÖTV %, KDV %, kap cinsi, en düşük fiyat, en yüksek fiyat)
+PRODUCTS = [
+    ("Bisküvi", "190531990000", 501, 10.0, 0, 20, "KK", 300, 1500),
+    ("Hurma", "804100000000", 501, 0.0, 0, 20, "DK", 300, 1200),
+    ("Buğday", "100199000000", 501, 0.0, 0, 1, "DK", 300, 1000),
+    ("Otomobil", "870323190000", 602, 10.0, 80, 20, "AR", 5000, 9000),
+    ("Forklift", "842720000000", 501, 5.0, 0, 20, "AR", 4000, 8000),
+    ("Deri Ayakkabı", "640399930000", 101, 10.0, 0, 20, "KK", 500, 2500),
+    ("Lastik", "401110000000", 501, 4.5, 0, 20, "KK", 500, 2000),
+    ("İş Mak. Parça", "843141000000", 501, 2.0, 0, 20, "KK", 500, 2000),
+    ("Transformatör", "850421000000", 501, 2.0, 0, 20, "KK", 800, 3000),
+    ("Ahşap Mobilya", "940360100000", 501, 5.0, 0, 20, "AS", 500, 2500),
+    ("Kereste", "440711100000", 501, 4.0, 0, 20, "PL", 400, 1500),
+    ("Seramik Karo", "690721000000", 501, 8.0, 0, 20, "KK", 400, 1500),
+    ("Cam Eşya", "701349100000", 501, 5.0, 0, 20, "KK", 300, 1200),
+    ("Kimyasal", "292241000000", 501, 5.0, 0, 20, "KK", 500, 2000),
+    ("Plastik Hammadde", "390110900000", 501, 6.5, 0, 20, "DK", 500, 2000),
+    ("Üre (Gübre)", "310210100000", 501, 0.0, 0, 20, "DK", 300, 1000),
+    ("Kot Pantolon", "620342000000", 101, 12.0, 0, 20, "BY", 400, 1800),
+    ("T-Shirt", "610910000000", 101, 12.0, 0, 20, "BY", 300, 1200),
+    ("Pamuk İpliği", "520512000000", 101, 8.0, 0, 20, "BY", 300, 1200),
+    ("Akıllı Telefon", "851713000000", 602, 0.0, 50, 20, "KK", 2000, 6000),
+    ("Laptop", "847130000000", 501, 0.0, 0, 20, "KK", 2000, 6000),
+]
+
+# (ülke kodu, ülke, şehir, teslim şekli, döviz, ek belge); A.TR kapsamındaki (AB) menşelerde GV alınmaz
+ORIGINS = [
+    ("GE", "Gürcistan", "Tiflis", "FCA", "USD", "EUR.1"),
+    ("AT", "Avusturya", "Viyana", "FCA", "EUR", "ATR"),
+    ("NL", "Hollanda", "Rotterdam", "FOB", "USD", "ATR"),
+    ("CN", "Çin", "Şanghay", "FOB", "USD", "EUR.1"),
+    ("DE", "Almanya", "Hannover", "FCA", "EUR", "ATR"),
+    ("DE", "Almanya", "Frankfurt", "FCA", "EUR", "ATR"),
+    ("CZ", "Çekya", "Prag", "FCA", "EUR", "ATR"),
+    ("SE", "İsveç", "Stokholm", "FCA", "EUR", "ATR"),
+    ("FR", "Fransa", "Paris", "FCA", "EUR", "ATR"),
+    ("IT", "İtalya", "Milano", "FCA", "EUR", "ATR"),
+    ("PL", "Polonya", "Varşova", "FCA", "EUR", "ATR"),
+    ("FI", "Finlandiya", "Helsinki", "FCA", "EUR", "ATR"),
+    ("IN", "Hindistan", "Mumbai", "FOB", "USD", "EUR.1"),
+    ("BD", "Bangladeş", "Dakka", "FOB", "USD", "EUR.1"),
+    ("PK", "Pakistan", "Lahor", "FOB", "USD", "EUR.1"),
+    ("IQ", "Irak", "Bağdat", "FCA", "USD", "EUR.1"),
+    ("AZ", "Azerbaycan", "Bakü", "FCA", "USD", "EUR.1"),
+    ("RU", "Rusya", "Krasnodar", "FOB", "USD", "EUR.1"),
+    ("JP", "Japonya", "Tokyo", "FOB", "USD", "EUR.1"),
+    ("UA", "Ukrayna", "Lviv", "FOB", "USD", "EUR.1"),
+    ("VN", "Vietnam", "Hanoi", "FOB", "USD", "EUR.1"),
+]
+
+IBANS = [
+    "TR88 0013 4000 0006 7890 1234 56", "TR12 0001 0002 3456 7890 1234 56",
+    "TR77 0001 5000 0005 6789 0123 45", "TR33 0006 1000 0001 2345 6789 01",
+    "TR25 0004 6000 0012 3456 7890 12", "TR11 0012 3000 0008 9012 3456 78",
+    "TR44 0006 2000 0002 3456 7890 12", "TR66 0001 2000 0004 5678 9012 34",
+    "TR55 0006 7000 0003 4567 8901 23", "TR99 0011 1000 0007 8901 2345 67",
+]
+
+# Tüm varyantlarda ortak olan sabit alanlar
+FIXED_VALUES = {
+    'Beyanname_Türü': 'IM',
+    'Rejim_Kodu': 4000,
+    'Alıcı_Adı_Adresi': 'Keşan Ticaret A.Ş., Keşan/EDİRNE, Vergi No: 1234567890',
+    'Beyan_Sahibi_Temsilci': 'Keşan Ticaret A.Ş., Vergi No: 1234567890',
+    'Gideceği_Ülke_Kodu': 'TR',
+    'Beyan_Yeri': 'Keşan',
+    'İlk_Varış_Ülkesi_Kodu': 'TR',
+    'Ticareti_Yapan_Ülke_Kodu': 'TR',
+    'Taşıma_Aracı_Kimliği': '34ABC123',
+    'Konteyner_Kodu': 0,
+    'Taşıma_Şekli_Sınır': 30,
+    'Taşıma_Şekli_Dahili': 30,
+    'Boşaltma_Yeri': 'Keşan Deposu',
+    'Varış Gümrük İdaresi': 'Kapıkule Gümrük Müdürlüğü',
+    'Banka_Adı_Şube': 'Ziraat Bankası Keşan Şubesi',
+    'Ödeme_Şekli': 'Peşin',
+}
+
+FCA_FOB_FACTOR = 1.08   # FCA teslimde istatistiki kıymet = fiyat x 1.08 (FOB teslimde fiyatın kendisi)
+FREIGHT_RATE = 0.10     # navlun = fiyat x %10
+INSURANCE_RATE = 0.03   # sigorta = fiyat x %3
+DEFAULT_DECLARATION_DATE = "30.11.2025"
+
+
+def _splitmix64(x):
+    # Sayaç tabanlı karıştırıcı: aynı girdi her zaman aynı 64 bitlik çıktıyı verir
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _hash64(text):
+    return np.uint64(int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little"))
+
+
+def student_keys(student_nos):
+    # Öğrenci numarası -> 64 bitlik anahtar (numara biçiminden bağımsız: 1222603002 == "1222603002.0")
+    return np.array([_hash64(normalize_student_no(no)) for no in student_nos], dtype=np.uint64)
+
+
+class _Streams:
+    # Bir ödevin tüm öğrencileri için alan bazında bağımsız sayı akışları
+    def __init__(self, seed, keys, odev_no):
+        self.keys = keys
+        self.base = _hash64(f"{seed}:{odev_no}")
+
+    def uniform(self, field):
+        h = _splitmix64(self.keys ^ _splitmix64(np.array([self.base ^ _hash64(field)], dtype=np.uint64)))
+        return (h >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+    def integers(self, field, low, high):
+        # [low, high] aralığında tam sayılar
+        return low + np.floor(self.uniform(field) * (high - low + 1)).astype(np.int64)
+
+    def sample(self, field, population, k):
+        # Satır başına yinelemesiz k seçim: her aday için hash anahtarı, en küçük k tanesi seçilir
+        scores = np.column_stack([self.uniform(f"{field}:{j}") for j in range(population)])
+        return np.argsort(scores, axis=1)[:, :k]
+
+
+def _pick(table, column, idx):
+    return np.array([row[column] for row in table], dtype=object)[idx]
+
+
+def generate_sheet(students, seed, odev_no, deadline="---", declaration_date=DEFAULT_DECLARATION_DATE,
+                   item_count=ITEM_COUNT):
+    # students: 'Öğrenci_Numarası' ve 'Öğrenci_Ad_Soyad' sütunlu DataFrame
+    # item_count: sabit kalem sayısı ya da öğrenci başına seçilecek (en az, en çok) aralığı
+    numbers = [normalize_student_no(no) for no in students['Öğrenci_Numarası']]
+    n = len(numbers)
+    rng = _Streams(seed, student_keys(numbers), odev_no)
+    cols = {
+        'Öğrenci_Numarası': numbers,
+        'Öğrenci_Ad_Soyad': students['Öğrenci_Ad_Soyad'].astype(str).to_numpy(),
+    }
+    invoices = np.array([f"FTR{odev_no}{no}" for no in numbers], dtype=object)
+    cols['Fatura_Numarası'] = invoices
+    cols['Referans_Numarası'] = np.array([f"REF{odev_no}{no}" for no in numbers], dtype=object)
+
+    origin = rng.integers("origin", 0, len(ORIGINS) - 1)
+    country, city, incoterm = _pick(ORIGINS, 0, origin), _pick(ORIGINS, 2, origin), _pick(ORIGINS, 3, origin)
+    doc = _pick(ORIGINS, 5, origin)
+    preferential = doc == "ATR"
+    cols['Sevk_Ülkesi_Adı_Kodu'] = country
+    cols['Gönderici_Adı_Adresi_VergiNo'] = _pick(ORIGINS, 1, origin) + " İthalat Ltd., " + city
+    cols['Teslim_Şekli_Yeri'] = incoterm + " - " + city
+    cols['Döviz'] = _pick(ORIGINS, 4, origin)
+    cols['IBAN'] = _pick([(iban,) for iban in IBANS], 0, rng.integers("iban", 0, len(IBANS) - 1))
+    cols['Beyan_Tarihi'] = declaration_date
+    cols['Ödev_No'] = odev_no
+    cols['Son_Teslim'] = deadline
+    cols.update(FIXED_VALUES)
+
+    if isinstance(item_count, tuple):
+        max_items = item_count[1]
+        counts = rng.integers("kalem_sayisi", item_count[0], item_count[1])
+    else:
+        max_items = item_count
+        counts = np.full(n, item_count)
+
+    fob_factor = np.where(incoterm == "FCA", FCA_FOB_FACTOR, 1.0)
+    products = rng.sample("product", len(PRODUCTS), max(1, min(max_items, len(PRODUCTS))))
+    total = np.zeros(n)
+    total_net = np.zeros(n, dtype=np.int64)
+    total_gross = np.zeros(n, dtype=np.int64)
+    for i in range(1, max_items + 1):
+        present = counts >= i
+        p = products[:, (i - 1) % products.shape[1]]
+        low, high = _pick(PRODUCTS, 7, p).astype(float), _pick(PRODUCTS, 8, p).astype(float)
+        price = np.round(low + rng.uniform(f"fiyat_{i}") * (high - low), 2)
+        net = rng.integers(f"net_{i}", 50, 300)
+        gross = net + rng.integers(f"dara_{i}", 3, 15)
+        gv_rate = np.where(preferential, 0.0, _pick(PRODUCTS, 3, p).astype(float))
+        otv_rate = _pick(PRODUCTS, 4, p).astype(float)
+        kdv_rate = _pick(PRODUCTS, 5, p).astype(float)
+
+        freight = price * FREIGHT_RATE
+        insurance = price * INSURANCE_RATE
+        cif = price + freight + insurance
+        taxes = tax_columns(i, cif, gv_rate, otv_rate, kdv_rate)
+
+        item = {
+            f'GTIP_Kodu_{i}': _pick(PRODUCTS, 1, p),
+            f'Ürün_Tanımı_{i}': _pick(PRODUCTS, 0, p),
+            f'Menşe_Ülke_Kodu_{i}': country,
+            f'Kap_Cinsi_{i}': _pick(PRODUCTS, 6, p),
+            f'Kap_Adedi_{i}': rng.integers(f"kap_{i}", 5, 20),
+            f'Net_Ağırlık_KG_{i}': net,
+            f'Brüt_Ağırlık_KG_{i}': gross,
+            f'Tamamlayıcı_Ölçü_Birimi_{i}': 'Adet',
+            f'Kalem_Fiyatı_{i}': price,
+            f'İstatistiki_Kıymet_FOB_{i}': price * fob_factor,
+            f'Navlun_Tutari_{i}': freight,
+            f'Sigorta_Tutari_{i}': insurance,
+            f'CIF_Toplam_{i}': cif,
+            f'Vergi_Kodu_{i}': _pick(PRODUCTS, 2, p),
+            f'GV_{i}': taxes[f'GV_{i}'],
+            f'GV_Orani_{i}': gv_rate,
+            f'ÖTV_{i}': taxes[f'ÖTV_{i}'],
+            f'ÖTV_Orani_{i}': otv_rate,
+            f'KDV_{i}': taxes[f'KDV_{i}'],
+            f'KDV_Orani_{i}': kdv_rate,
+            f'Vergiler_Toplami_{i}': taxes[f'Vergiler_Toplami_{i}'],
+            f'Toplam_Tutar_{i}': taxes[f'Toplam_Tutar_{i}'],
+            f'Ek_Belge_Kodu_{i}': doc,
+            f'Ek_Belge_Referans_{i}': doc + "-" + invoices + f"-{i}",
+        }
+        if not present.all():
+            # Bu kalemi olmayan öğrencilerde blok boş kalır (Excel'de boş hücre)
+            item = {col: np.where(present, values, None) for col, values in item.items()}
+        cols.update(item)
+        total += np.where(present, taxes[f'Toplam_Tutar_{i}'], 0.0)
+        total_net += np.where(present, net, 0)
+        total_gross += np.where(present, gross, 0)
+
+    cols['Toplam_Fatura_Değeri'] = total
+    cols['Toplam_Net_Ağırlık_KG'] = total_net
+    cols['Toplam_Brüt_Ağırlık_KG'] = total_gross
+    df = pd.DataFrame(cols, index=range(n))
+    ordered = [c for c in wide_columns(max_items) if c in df.columns]
+    return df[ordered + [c for c in df.columns if c not in ordered]]
+
+
+def generate_cohort(students, seed, assignments, item_count=ITEM_COUNT):
+    # assignments: [(sayfa adı, ödev no, son teslim "GG.AA.YYYY SS:DD"), ...]
+    return {sheet_name: generate_sheet(students, seed, odev_no, deadline, item_count=item_count)
+            for sheet_name, odev_no, deadline in assignments}
+
+
+def variant(seed, student_no, odev_no, student_name="---", deadline="---", item_count=ITEM_COUNT):
+    # Tek öğrencinin varyantı: sınıf listesinde aynı öğrencinin satırıyla birebir aynıdır
+    students = pd.DataFrame({'Öğrenci_Numarası': [student_no], 'Öğrenci_Ad_Soyad': [student_name]})
+    return generate_sheet(students, seed, odev_no, deadline, item_count=item_count).iloc[0].to_dict()
+
+
+def write_cohort(sheets, excel_path, progress=None):
+    # Excel tek geçişte yazılır; sütunsal depo dosya yeniden okunmadan bellekteki sayfalardan derlenir
+    write_workbook(sheets, excel_path, progress)
+    return data_store.compile_workbook(excel_path, frames=sheets)
+
+
+def load_students(path):
+    df = pd.read_csv(path, dtype=str) if path.lower().endswith(".csv") else pd.read_excel(path, dtype=str)
+    return df[['Öğrenci_Numarası', 'Öğrenci_Ad_Soyad']].dropna(subset=['Öğrenci_Numarası'])
+
+
+def sample_students(count, first_no=1000000001):
+    # Yük testleri ve denemeler için yapay öğrenci listesi
+    numbers = np.arange(first_no, first_no + count)
+    return pd.DataFrame({'Öğrenci_Numarası': numbers.astype(str),
+                         'Öğrenci_Ad_Soyad': [f"ÖĞRENCİ {k}" for k in range(1, count + 1)]})
+
+
+def default_assignments(count, deadline="21.12.2025 22:00"):
+    return [(f"Odev{k}", k, deadline) for k in range(1, count + 1)]
+
+
+if __name__ == "__main__":
+    # Kullanım: python generator.py <öğrenci_listesi.xlsx|.csv|öğrenci_sayısı> <çıktı.xlsx> [tohum] [ödev_sayısı]
+    #                               [kalem_sayısı | en_az-en_çok]
+    usage = ("Kullanım: python generator.py <öğrenci_listesi.xlsx|.csv|öğrenci_sayısı> <çıktı.xlsx> "
+             "[tohum] [ödev_sayısı] [kalem_sayısı|en_az-en_çok]")
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+    source, target = sys.argv[1], sys.argv[2]
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    count = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+    items = sys.argv[5] if len(sys.argv) > 5 else str(ITEM_COUNT)
+    item_count = tuple(int(x) for x in items.split("-")) if "-" in items else int(items)
+    students = sample_students(int(source)) if source.isdigit() and not os.path.exists(source) else load_students(source)
+
+    started = time.perf_counter()
+    cohort = generate_cohort(students, seed, default_assignments(count), item_count)
+    generated = time.perf_counter()
+    manifest = write_cohort(cohort, target)
+    print(f"{len(students)} öğrenci x {count} ödev üretildi ({generated - started:.2f} sn), "
+          f"yazıldı ({time.perf_counter() - generated:.2f} sn): {target}, sürüm {manifest['version']}")
@@ -0,0 +1,316 @@
+import re
+from collections import namedtuple
+from collections.abc import Mapping
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_store import ITEM_COUNT, ITEM_COUNT_COL, item_numbers
+
+# Beyanname notlandırma motoru. Bir grup beyanname (form değerleri) ile beklenen ödev
+# satırlarını sütun sütun karşılaştırır: her alan için tüm öğrenciler tek bir NumPy/pandas
+# işlemiyle kontrol edilir. Tek öğrencilik form da, sınıfın toplu yeniden notlandırması da
+# aynı grade_batch çağrısını kullanır.
+#
+# Cevap anahtarı (AnswerKey) her veri sürümünde bir kez derlenir: beklenen değerler alanın
+# karşılaştırma türüne göre kanonik biçime çevrilir, vergiler hesaplanır. Notlandırma yalnızca
+# öğrencinin cevabını aynı kurallarla kanonikleştirip karşılaştırır. Canlı notlandırma ve toplu
+# yeniden notlandırma aynı derleyiciyi kullandığından sonuçları birbirini tutar.
+#
+# Karşılaştırma türleri (Field.kind):
+#   "code"   - kod: büyük/küçük harf, boşluk ve . - / ayırıcıları yok sayılır (GTİP, ülke, rejim kodu)
+#   "text"   - metin: büyük/küçük harf ve Türkçe İ/I/ı/i farkı ile fazla boşluklar yok sayılır
+#   "date"   - tarih: GG.AA.YYYY (ya da GG/AA/YYYY, YYYY-AA-GG) aynı güne karşılık geliyorsa doğru
+#   "number" - sayı: NUMERIC_TOLERANCE mutlak toleransla, "12,5" gibi virgüllü yazım da kabul edilir
+# Beklenen değeri boş ("", "---", NaN) olan alanlar kontrol dışıdır.
+
+NUMERIC_TOLERANCE = 0.01
+DATE_FORMATS = ("%d.%m.%Y", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d.%m.%Y %H:%M", "%Y-%m-%d %H:%M:%S")
+
+# id: alan anahtarı, label: tabloda görünen ad, error: hata listesindeki ad,
+# form_key: formdaki widget anahtarı, column: beklenen değerin sütunu, kind: karşılaştırma türü
+Field = namedtuple("Field", ["id", "label", "error", "form_key", "column", "kind"])
+
+GENERAL_FIELDS = [
+    ("Varış Gümrük İdaresi", "v_gumruk", "Varış Gümrük İdaresi", "text"),
+    ("Beyanname Türü", "b_turu", "Beyanname_Türü", "code"),
+    ("Çıkış Rejimi", "c_rejimi", "Rejim_Kodu", "code"),
+    ("Referans Numarası", "ref_no", "Referans_Numarası", "code"),
+    ("Gönderici", "gonderici", "Gönderici_Adı_Adresi_VergiNo", "text"),
+    ("Alıcı", "alici", "Alıcı_Adı_Adresi", "text"),
+    ("Beyan Sahibi/Temsilci", "temsilci", "Beyan_Sahibi_Temsilci", "text"),
+    ("Beyan Yeri", "b_yeri", "Beyan_Yeri", "text"),
+    ("Beyan Tarihi", "b_tarihi", "Beyan_Tarihi", "date"),
+    ("Sevk Ülkesi", "sevk_ulke", "Sevk_Ülkesi_Adı_Kodu", "code"),
+    ("Ticareti Yapan Ülke", "ticaret_ulke", "Ticareti_Yapan_Ülke_Kodu", "code"),
+    ("Gideceği Ülke", "gidecek_ulke", "Gideceği_Ülke_Kodu", "code"),
+    ("İlk Varış Ülkesi", "ilk_varis_ulke", "İlk_Varış_Ülkesi_Kodu", "code"),
+    ("Taşıma Aracı", "tasima_araci", "Taşıma_Aracı_Kimliği", "code"),
+    ("Konteyner", "konteyner", "Konteyner_Kodu", "code"),
+    ("Teslim Şekli", "teslim_sekli", "Teslim_Şekli_Yeri", "text"),
+    ("Döviz", "doviz", "Döviz", "code"),
+    ("Toplam Fatura Değeri", "top_fatura", "Toplam_Fatura_Değeri", "number"),
+]
+
+ITEM_FIELDS = [
+    ("Ürün Tanımı", "tanim", "Ürün_Tanımı", "text"),
+    ("GTİP", "gtip", "GTIP_Kodu", "code"),
+    ("Net Ağırlık", "net", "Net_Ağırlık_KG", "number"),
+    ("Brüt Ağırlık", "gross", "Brüt_Ağırlık_KG", "number"),
+    ("Kalem Fiyatı", "fiyat", "Kalem_Fiyatı", "number"),
+]
+
+# Vergi alanlarının beklenen değeri sütundan okunmaz, CIF ve oranlardan hesaplanır
+TAX_FIELDS = [
+    ("Sistem GV (Beklenen)", "GV", "gv"),
+    ("Sistem ÖTV (Beklenen)", "ÖTV", "otv"),
+    ("Sistem KDV (Beklenen)", "KDV", "kdv"),
+]
+
+# Formda olup henüz notlandırılmayan alanlar; yine de teslimle birlikte saklanır
+EXTRA_FORM_KEYS = ["tasima_sinir", "tasima_dahili", "yukleme_yeri", "odeme_sekli", "banka", "top_net",
+                   "iban", "swift", "top_brut"]
+EXTRA_ITEM_KEYS = ["mense", "birim", "ek_kod", "ek_ref", "kap_cinsi", "kap_adet", "fob", "navlun", "sigorta",
+                   "cif", "v_toplam"]
+
+
+def declaration_fields(item_count=ITEM_COUNT):
+    fields = [Field(key, label, label, key, column, kind) for label, key, column, kind in GENERAL_FIELDS]
+    for i in range(1, item_count + 1):
+        for label, key, column, kind in ITEM_FIELDS:
+            fields.append(Field(f"{key}_{i}", f"Kalem {i} - {label}", f"Kalem {i}: {label}", f"{key}_{i}", f"{column}_{i}", kind))
+        for label, error, key in TAX_FIELDS:
+            fields.append(Field(f"{key}_{i}", f"Kalem {i} - {label}", f"Kalem {i}: {error}", f"{key}_{i}", None, "number"))
+    return fields
+
+
+def form_keys(item_count=ITEM_COUNT):
+    keys = [field.form_key for field in declaration_fields(item_count)] + EXTRA_FORM_KEYS
+    keys += [f"{key}_{i}" for i in range(1, item_count + 1) for key in EXTRA_ITEM_KEYS]
+    return keys
+
+
+def compute_taxes(cif, gv_rate, otv_rate, kdv_rate):
+    # Kümülatif matrah: GV CIF üzerinden, ÖTV (CIF + GV), KDV (CIF + GV + ÖTV) üzerinden
+    gv = cif * (gv_rate / 100)
+    otv_matrah = cif + gv
+    otv = otv_matrah * (otv_rate / 100)
+    kdv_matrah = otv_matrah + otv
+    kdv = kdv_matrah * (kdv_rate / 100)
+    return gv, otv, kdv
+
+
+def tax_columns(i, cif, gv_rate, otv_rate, kdv_rate):
+    # Çalışma kitabındaki i. kalemin vergi sütunları (shuffle.py ve generator.py aynı biçimi yazar).
+    # GV_i ve ÖTV_i vergi tutarını değil, vergi eklenmiş matrahı tutar (oran 0 ise 0);
+    # KDV_i kalemin vergiler dahil toplamıdır (Toplam_Tutar_i ile aynı).
+    gv, otv, kdv = compute_taxes(cif, gv_rate, otv_rate, kdv_rate)
+    taxes = gv + otv + kdv
+    return {
+        f'GV_{i}': np.where(gv_rate > 0, cif + gv, 0.0),
+        f'ÖTV_{i}': np.where(otv_rate > 0, cif + gv + otv, 0.0),
+        f'KDV_{i}': cif + taxes,
+        f'Vergiler_Toplami_{i}': taxes,
+        f'Toplam_Tutar_{i}': cif + taxes,
+    }
+
+
+def _numeric(values):
+    return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+
+
+def item_count_of(expected):
+    # Notlandırılacak kalem sayısı: 'Kalem_Sayısı' sütunu/alanı, yoksa geniş sütunlardan
+    if isinstance(expected, Mapping):
+        count = expected.get(ITEM_COUNT_COL)
+        return int(count) if count is not None else max(item_numbers(expected.keys()), default=ITEM_COUNT)
+    if ITEM_COUNT_COL in expected.columns and len(expected):
+        return int(expected[ITEM_COUNT_COL].max())
+    return max(item_numbers(expected.columns), default=ITEM_COUNT)
+
+
+def expected_values(expected, item_count=ITEM_COUNT):
+    # Her alan için beklenen değer sütunu; vergi zinciri tüm satırlar için tek seferde hesaplanır
+    expected = expected.reset_index(drop=True)
+    values = {}
+    for field in declaration_fields(item_count):
+        if field.column is not None:
+            values[field.id] = expected[field.column] if field.column in expected.columns else pd.Series(["---"] * len(expected))
+    for i in range(1, item_count + 1):
+        def col(name):
+            return _numeric(expected.get(f"{name}_{i}", pd.Series([np.nan] * len(expected))))
+        gv, otv, kdv = compute_taxes(col("CIF_Toplam"), col("GV_Orani"), col("ÖTV_Orani"), col("KDV_Orani"))
+        values[f"gv_{i}"] = gv
+        values[f"otv_{i}"] = otv
+        values[f"kdv_{i}"] = kdv
+    return pd.DataFrame(values)
+
+
+MISSING_TEXT = ("", "---")
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT
+
+
+def canonical_text(value):
+    # Tam sayı değerli float'lar (ör. 4000.0) 4000 olarak ele alınır; büyük/küçük harf farkı yok
+    # sayılır, "İ/I/ı/i" aynı harf kabul edilir (ör. "im" == "IM"). Boş/"---" değerler None olur:
+    # beklenen tarafta kontrol dışı, öğrenci tarafında boş cevap.
+    if _is_missing(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = " ".join(str(value).split()).upper().replace("İ", "I")
+    return None if text in MISSING_TEXT else text
+
+
+def canonical_code(value):
+    text = canonical_text(value)
+    return text if text is None else _CODE_SEPARATORS.sub("", text) or None
+
+
+def canonical_date(value):
+    if _is_missing(value):
+        return None
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    text = canonical_text(value)
+    if text is None:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    # Tarih olarak okunamayan değerler metin olarak karşılaştırılır
+    return text
+
+
+def canonical_number(value):
+    if _is_missing(value) or isinstance(value, bool):
+        return np.nan
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    text = str(value).strip()
+    if _DECIMAL_COMMA.fullmatch(text):
+        text = text.replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+_CODE_SEPARATORS = re.compile(r"[\s./-]+")
+_DECIMAL_COMMA = re.compile(r"-?\d+,\d+")   # "1234,56"; binlik ayırıcılı yazımlar sayı sayılmaz
+CANONICAL = {"text": canonical_text, "code": canonical_code, "date": canonical_date, "number": canonical_number}
+
+
+def canonical(kind, values):
+    # Alan türüne göre karşılaştırmaya hazır değerler: sayılar için float dizisi, diğerleri için
+    # kanonik metin (boş değerler None) dizisi. Beklenen ve öğrenci değerleri aynı fonksiyondan geçer.
+    if kind == "number":
+        array = np.asarray(values)
+        if array.dtype.kind in "fiu":
+            return array.astype(float)
+        return np.array([canonical_number(v) for v in array.tolist()], dtype=float)
+    convert = CANONICAL[kind]
+    return np.array([convert(v) for v in np.asarray(values, dtype=object).tolist()], dtype=object)
+
+
+def _matches(kind, got, want):
+    if kind == "number":
+        return np.isclose(got, want, rtol=0, atol=NUMERIC_TOLERANCE) | np.isnan(want)
+    return pd.isna(want) | (got == want).astype(bool)
+
+
+class AnswerKey:
+    # Derlenmiş cevap anahtarı: alan id -> kanonik beklenen değer dizisi (satır sırası ödev
+    # sayfasıyla aynı). display: öğrenciye gösterilen ham beklenen değerler.
+    def __init__(self, item_count, canonical_values, display, version=None):
+        self.item_count = item_count
+        self.values = canonical_values
+        self.display = display
+        self.version = version
+
+    def __len__(self):
+        return len(self.display)
+
+    def take(self, rows, item_count=None):
+        # Verilen satırlar ve (isteğe bağlı) ilk item_count kalem için alt anahtar
+        rows = np.asarray(rows, dtype=int)
+        item_count = self.item_count if item_count is None else min(item_count, self.item_count)
+        ids = [field.id for field in declaration_fields(item_count)]
+        return AnswerKey(item_count, {i: self.values[i][rows] for i in ids},
+                         self.display[ids].iloc[rows].reset_index(drop=True), self.version)
+
+
+def compile_answer_key(expected, item_count=None, version=None):
+    if item_count is None:
+        item_count = item_count_of(expected)
+    display = expected_values(expected, item_count)
+    values = {field.id: canonical(field.kind, display[field.id]) for field in declaration_fields(item_count)}
+    return AnswerKey(item_count, values, display, version)
+
+
+class GradeResult:
+    def __init__(self, fields, student, expected, matches):
+        self.fields = fields
+        self.student = student        # öğrenci cevapları (alan id -> sütun)
+        self.expected = expected      # beklenen değerler (alan id -> sütun)
+        self.matches = matches        # bool DataFrame (satır x alan id)
+
+    def __len__(self):
+        return len(self.matches)
+
+    def success(self):
+        return self.matches.all(axis=1).to_numpy()
+
+    def errors(self):
+        labels = np.array([field.error for field in self.fields], dtype=object)
+        mismatch = ~self.matches[[field.id for field in self.fields]].to_numpy()
+        return [labels[row].tolist() for row in mismatch]
+
+    def comparison_table(self, row=0):
+        # Öğrenciye gösterilen nötr karşılaştırma tablosu (doğru/yanlış etiketi yok)
+        student_row = self.student.iloc[row]
+        expected_row = self.expected.iloc[row]
+        return pd.DataFrame({
+            "Alan": [field.label for field in self.fields],
+            "Öğrenci Cevabı": [_display(student_row[field.id]) for field in self.fields],
+            "Sistem (Beklenen)": [_display(expected_row[field.id]) for field in self.fields],
+        })
+
+
+def _display(value):
+    return "" if value is None else str(value)
+
+
+def grade_batch(submissions, expected, item_count=None):
+    # submissions: form anahtarları sütun olan DataFrame; expected: aynı sıradaki ödev satırları
+    # ya da önceden derlenmiş AnswerKey. Kalem sayısı satırlar arasında farklıysa en büyüğü
+    # kullanılır; satırda olmayan kalemlerin beklenen değeri boş olduğundan kontrol dışı kalır.
+    key = expected if isinstance(expected, AnswerKey) else compile_answer_key(expected, item_count)
+    if item_count is not None and item_count != key.item_count:
+        key = key.take(np.arange(len(key)), item_count)
+    item_count = key.item_count
+    fields = declaration_fields(item_count)
+    n = len(key)
+    empty = np.full(n, None, dtype=object)
+
+    # Öğrenci cevapları da aynı kanonik dönüşümden geçer; karşılaştırma alan başına tek dizi işlemi
+    student = {field.id: submissions[field.form_key].to_numpy(dtype=object) if field.form_key in submissions.columns else empty
+               for field in fields}
+    matches = {field.id: _matches(field.kind, canonical(field.kind, student[field.id]), key.values[field.id])
+               for field in fields}
+    return GradeResult(fields, pd.DataFrame(student), key.display, pd.DataFrame(matches))
+
+
+def grade_single(form_values, expected_row, item_count=None):
+    # expected_row: öğrenci satırı (sözlük / RecordView) ya da tek satırlık AnswerKey
+    if isinstance(expected_row, AnswerKey):
+        return grade_batch(pd.DataFrame([form_values]), expected_row, item_count)
+    if item_count is None:
+        item_count = item_count_of(expected_row)
+    return grade_batch(pd.DataFrame([form_values]), pd.DataFrame([dict(expected_row)]), item_count)
@@ -1,20 +1,65 @@
 import customtkinter as ctk
-import pandas as pd
 import os
-import subprocess
-from datetime import datetime
-import random
+import queue
+import sys
+import threading
+from collections import deque
 from tkinter import messagebox
+import courses
+import publish
+import regrade
+import shuffle
 
 # Configuration
-EXCEL_FILE = "mail_merge_wide_3kalem.xlsx"
-LOG_FILE = "student_logs.json"
+# Kullanım: python hoca_panel.py [ders_kimliği]  (dersler courses.json'dan okunur, bkz. courses.py)
+COURSE = courses.CourseRegistry().get(sys.argv[1] if len(sys.argv) > 1 else None)
+EXCEL_FILE = COURSE.excel_path
+LOG_HISTORY = 500       # Ekranda tutulan en fazla log kaydı (en yeniler)
+TAIL_INTERVAL = 2000    # ms; canlı takipte yeni kayıtların sorgulanma aralığı
+TAIL_BATCH = 1000       # Bir sorguda okunan en fazla yeni kayıt
+# "Canlıyı Güncelle" yalnızca bu veri dosyalarını işler (PDF'ler, loglar ve diğer dosyalar gönderilmez)
+PUBLISH_PATHS = [EXCEL_FILE, courses.COURSES_FILE]
+
+
+def format_log(log):
+    status = "✅ BAŞARILI" if log['success'] else "❌ HATALI"
+    text = f"[{log['timestamp']}] {log['student_name']} ({log['student_no']})\n"
+    text += f"Ödev: {log['odev_no']} | Durum: {status}\n"
+    if log['errors']:
+        text += f"Hatalar: {', '.join(log['errors'][:3])}...\n"
+    text += "-"*50 + "\n"
+    return text
+
+
+class LogTail:
+    # Log deposunu son görülen id'den itibaren izler; yalnızca yeni kayıtlar okunur.
+    # İlk okumada (ve yeniden notlandırma eski kayıtları değiştirdiğinde) son LOG_HISTORY kayıt alınır.
+    def __init__(self, store, history=LOG_HISTORY):
+        self.store = store
+        self.history = history
+        self.last_id = None
+        self.generation = None
+
+    def fetch(self):
+        # (baştan mı, en yeniden eskiye biçimlenmiş kayıtlar) döner; arka plan iş parçacığında çağrılır
+        generation = self.store.grades_generation()
+        reset = self.last_id is None or generation != self.generation
+        if reset:
+            logs = self.store.query_submissions(sort="id", descending=True, limit=self.history)
+            self.generation = generation
+        else:
+            logs = self.store.submissions_after(self.last_id, TAIL_BATCH)[::-1][:self.history]
+        if logs:
+            self.last_id = max(self.last_id or 0, logs[0]['id'])
+        elif reset:
+            self.last_id = 0
+        return reset, [format_log(log) for log in logs]
 
 class AdminPanel(ctk.CTk):
     def __init__(self):
         super().__init__()
 
-        self.title("Trakya Üniversitesi - BİLGE Hoca Paneli")
+        self.title(f"Trakya Üniversitesi - BİLGE Hoca Paneli ({COURSE.title})")
         self.geometry("800x600")
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
@@ -33,12 +78,26 @@ class AdminPanel(ctk.CTk):
         self.btn_shuffle = ctk.CTkButton(self.sidebar, text="Verileri Karıştır", command=self.shuffle_data)
         self.btn_shuffle.pack(pady=10, padx=20)
 
-        self.btn_push = ctk.CTkButton(self.sidebar, text="Canlıyı Güncelle", fg_color="green", hover_color="darkgreen", command=self.push_to_github)
+        self.btn_push = ctk.CTkButton(self.sidebar, text="Canlıyı Güncelle", fg_color="green", hover_color="darkgreen", command=self.publish_live)
         self.btn_push.pack(pady=10, padx=20)
 
         self.btn_logs = ctk.CTkButton(self.sidebar, text="Logları Yenile", command=self.load_logs)
         self.btn_logs.pack(pady=10, padx=20)
 
+        self.live_logs = ctk.BooleanVar(value=True)
+        self.switch_live = ctk.CTkSwitch(self.sidebar, text="Canlı Takip", variable=self.live_logs, command=self._schedule_tail)
+        self.switch_live.pack(pady=10, padx=20)
+
+        self.btn_regrade = ctk.CTkButton(self.sidebar, text="Yeniden Notlandır", command=self.regrade_submissions)
+        self.btn_regrade.pack(pady=10, padx=20)
+
+        # Arka plan işlerinin ilerleme göstergesi
+        self.progress_bar = ctk.CTkProgressBar(self.sidebar, width=160)
+        self.progress_bar.set(0)
+        self.progress_bar.pack(pady=(30, 5), padx=20)
+        self.status_label = ctk.CTkLabel(self.sidebar, text="", wraplength=160)
+        self.status_label.pack(pady=5, padx=20)
+
         # Main Content
         self.main_frame = ctk.CTkFrame(self)
         self.main_frame.grid(row=0, column=1, padx=20, pady=20, sticky="nsew")
@@ -46,64 +105,190 @@ class AdminPanel(ctk.CTk):
         self.log_display = ctk.CTkTextbox(self.main_frame, width=550, height=500)
         self.log_display.pack(expand=True, fill="both")
 
+        # Yayın işçi iş parçacığında çalışır; ilerleme ve sonuç kuyruktan after() ile okunur
+        self.publish_events = queue.Queue()
+        self.publisher = publish.Publisher(
+            ".", PUBLISH_PATHS,
+            progress=lambda frac, msg: self.publish_events.put(("progress", frac, msg)),
+            done=lambda result, error: self.publish_events.put(("done", result, error)),
+        )
+        self.publish_polling = False
+
+        self.log_store = COURSE.log_store()
+        self.log_tail = LogTail(self.log_store)
+        self.log_events = queue.Queue()
+        self.log_lines = deque()      # ekrandaki her kaydın satır sayısı (üstte en yeni)
+        self.tail_busy = False
+        self.tail_job = None
         self.load_logs()
 
     def shuffle_data(self):
+        if not os.path.exists(EXCEL_FILE):
+            messagebox.showerror("Hata", "Excel dosyası bulunamadı!")
+            return
+
+        # Karıştırma işçi iş parçacığında çalışır; arayüz kuyruğu after() ile yoklar
+        self.btn_shuffle.configure(state="disabled")
+        self.progress_bar.set(0)
+        self.shuffle_events = queue.Queue()
+        threading.Thread(target=self._run_shuffle, daemon=True).start()
+        self.after(100, self._poll_shuffle)
+
+    def _run_shuffle(self):
         try:
-            if not os.path.exists(EXCEL_FILE):
-                messagebox.showerror("Hata", "Excel dosyası bulunamadı!")
+            result = shuffle.shuffle_workbook(EXCEL_FILE, progress=lambda frac, msg: self.shuffle_events.put(("progress", frac, msg)))
+            self.shuffle_events.put(("done", result))
+        except Exception as e:
+            self.shuffle_events.put(("error", e))
+
+    def _poll_shuffle(self):
+        try:
+            while True:
+                event = self.shuffle_events.get_nowait()
+                if event[0] == "progress":
+                    self.progress_bar.set(event[1])
+                    self.status_label.configure(text=event[2])
+                    continue
+                self.btn_shuffle.configure(state="normal")
+                if event[0] == "done":
+                    result = event[1]
+                    messagebox.showinfo("Başarılı", f"Excel verileri rastgele karıştırıldı ve kaydedildi.\n"
+                                                    f"{result['rows']} satır, tohum: {result['seed']}")
+                else:
+                    self.status_label.configure(text="")
+                    messagebox.showerror("Hata", f"Karıştırma sırasında hata oluştu: {event[1]}")
                 return
+        except queue.Empty:
+            pass
+        self.after(100, self._poll_shuffle)
 
-            xl = pd.ExcelFile(EXCEL_FILE)
-            new_sheets = {}
-            
-            for sheet in xl.sheet_names:
-                df = pd.read_excel(EXCEL_FILE, sheet_name=sheet)
-                
-                # Örnek Karıştırma Mantığı: Fiyatları %10-20 arası rastgele değiştir
-                for i in range(1, 4):
-                    col = f'Kalem_Fiyatı_{i}'
-                    if col in df.columns:
-                        df[col] = df[col].apply(lambda x: round(x * random.uniform(0.9, 1.1), 2) if isinstance(x, (int, float)) else x)
-                
-                new_sheets[sheet] = df
-
-            with pd.ExcelWriter(EXCEL_FILE) as writer:
-                for sheet, df in new_sheets.items():
-                    df.to_excel(writer, sheet_name=sheet, index=False)
-            
-            messagebox.showinfo("Başarılı", "Excel verileri rastgele karıştırıldı ve kaydedildi.")
-        except Exception as e:
-            messagebox.showerror("Hata", f"Karıştırma sırasında hata oluştu: {e}")
+    def regrade_submissions(self):
+        if not os.path.exists(EXCEL_FILE):
+            messagebox.showerror("Hata", "Excel dosyası bulunamadı!")
+            return
 
-    def push_to_github(self):
+        # Yeniden notlandırma (ve karıştırma sonrası depo derlemesi) işçi iş parçacığında çalışır
+        self.btn_regrade.configure(state="disabled")
+        self.progress_bar.set(0)
+        self.regrade_events = queue.Queue()
+        threading.Thread(target=self._run_regrade, daemon=True).start()
+        self.after(100, self._poll_regrade)
+
+    def _run_regrade(self):
         try:
-            # Git komutlarını çalıştır
-            subprocess.run(["git", "add", "."], check=True)
-            subprocess.run(["git", "commit", "-m", f"Hoca Paneli Güncellemesi: {datetime.now().strftime('%Y-%m-%d %H:%M')}"], check=True)
-            subprocess.run(["git", "push", "origin", "main"], check=True)
-            
-            messagebox.showinfo("Başarılı", "Değişiklikler GitHub'a gönderildi. Canlı sistem 1-2 dakika içinde güncellenecektir.")
+            summary = regrade.regrade_all(self.log_store, EXCEL_FILE,
+                                          progress=lambda frac, msg: self.regrade_events.put(("progress", frac, msg)))
+            self.regrade_events.put(("done", summary))
         except Exception as e:
-            messagebox.showerror("Hata", f"GitHub'a gönderilirken hata oluştu: {e}\nLütfen Git'in yüklü ve bağlı olduğundan emin olun.")
+            self.regrade_events.put(("error", e))
+
+    def _poll_regrade(self):
+        try:
+            while True:
+                event = self.regrade_events.get_nowait()
+                if event[0] == "progress":
+                    self.progress_bar.set(event[1])
+                    self.status_label.configure(text=event[2])
+                    continue
+                self.btn_regrade.configure(state="normal")
+                if event[0] == "done":
+                    summary = event[1]
+                    messagebox.showinfo("Başarılı", f"{summary['regraded']} / {summary['total']} teslim yeniden notlandırıldı.\n"
+                                                    f"Eşleşmeyen teslim: {summary['unmatched']}")
+                    self.load_logs()
+                else:
+                    self.status_label.configure(text="")
+                    messagebox.showerror("Hata", f"Yeniden notlandırma sırasında hata oluştu: {event[1]}")
+                return
+        except queue.Empty:
+            pass
+        self.after(100, self._poll_regrade)
+
+    def publish_live(self):
+        # Art arda tıklamalar ve yayın sürerken gelen istekler tek commit'te birleştirilir
+        waiting = self.publisher.request()
+        self.status_label.configure(text=f"Yayın sırada ({waiting} istek)")
+        if not self.publish_polling:
+            self.publish_polling = True
+            self.after(100, self._poll_publish)
+
+    def _poll_publish(self):
+        try:
+            while True:
+                event = self.publish_events.get_nowait()
+                if event[0] == "progress":
+                    self.progress_bar.set(event[1])
+                    self.status_label.configure(text=event[2])
+                    continue
+                result, error = event[1], event[2]
+                if error is not None:
+                    self.status_label.configure(text="Yayın başarısız")
+                    messagebox.showerror("Hata", f"Canlı sisteme gönderilirken hata oluştu: {error}\nLütfen Git'in yüklü ve bağlı olduğundan emin olun.")
+                elif result["commit"]:
+                    messagebox.showinfo("Başarılı", f"{', '.join(result['files'])} gönderildi ({result['commit']}). "
+                                                    "Canlı sistem 1-2 dakika içinde güncellenecektir.")
+                else:
+                    self.status_label.configure(text="Gönderilecek veri değişikliği yok")
+        except queue.Empty:
+            pass
+        if self.publisher.busy or not self.publish_events.empty():
+            self.after(100, self._poll_publish)
+        else:
+            self.publish_polling = False
 
     def load_logs(self):
-        self.log_display.delete("1.0", "end")
-        if os.path.exists(LOG_FILE):
-            import json
-            with open(LOG_FILE, "r", encoding="utf-8") as f:
-                logs = json.load(f)
-                for log in reversed(logs):
-                    status = "✅ BAŞARILI" if log['success'] else "❌ HATALI"
-                    text = f"[{log['timestamp']}] {log['student_name']} ({log['student_no']})\n"
-                    text += f"Ödev: {log['odev_no']} | Durum: {status}\n"
-                    if log['errors']:
-                        text += f"Hatalar: {', '.join(log['errors'][:3])}...\n"
-                    text += "-"*50 + "\n"
-                    self.log_display.insert("end", text)
+        # Sorgu ve biçimlendirme işçi iş parçacığında yapılır; arayüz kuyruğu after() ile yoklar
+        if self.tail_busy:
+            return
+        self.tail_busy = True
+        threading.Thread(target=self._run_tail, daemon=True).start()
+        self.after(50, self._poll_logs)
+
+    def _run_tail(self):
+        try:
+            self.log_events.put(("logs",) + self.log_tail.fetch())
+        except Exception as e:
+            self.log_events.put(("error", e))
+
+    def _poll_logs(self):
+        try:
+            event = self.log_events.get_nowait()
+        except queue.Empty:
+            self.after(50, self._poll_logs)
+            return
+        self.tail_busy = False
+        if event[0] == "logs":
+            self._show_logs(event[1], event[2])
         else:
+            self.status_label.configure(text=f"Log okunamadı: {event[1]}")
+        self._schedule_tail()
+
+    def _show_logs(self, reset, entries):
+        if reset:
+            self.log_display.delete("1.0", "end")
+            self.log_lines.clear()
+        if entries:
+            if not self.log_lines:
+                self.log_display.delete("1.0", "end")
+            # Yeni kayıtlar tek insert çağrısıyla en üste eklenir
+            self.log_display.insert("1.0", "".join(entries))
+            self.log_lines.extendleft(text.count("\n") for text in reversed(entries))
+            # Görünür geçmiş LOG_HISTORY kayıtla sınırlı: en eski kayıtlar alttan silinir
+            if len(self.log_lines) > LOG_HISTORY:
+                while len(self.log_lines) > LOG_HISTORY:
+                    self.log_lines.pop()
+                self.log_display.delete(f"{sum(self.log_lines) + 1}.0", "end")
+        elif not self.log_lines:
+            self.log_display.delete("1.0", "end")
             self.log_display.insert("end", "Henüz log kaydı bulunmuyor.")
 
+    def _schedule_tail(self):
+        if self.tail_job is not None:
+            self.after_cancel(self.tail_job)
+            self.tail_job = None
+        if self.live_logs.get():
+            self.tail_job = self.after(TAIL_INTERVAL, self.load_logs)
+
 if __name__ == "__main__":
     app = AdminPanel()
     app.mainloop()
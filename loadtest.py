@@ -0,0 +1,208 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import data_store
+import data_version
+import generator
+import grading
+from log_store import LogStore
+
+# Sınıf ölçeğinde yük testi: gerçek app.py betiği streamlit.testing.v1.AppTest ile başsız
+# çalıştırılır. Her sanal öğrenci kendi oturumunda giriş yapar, "Dijital Beyanname" sayfasını
+# açar, formu doğru cevaplarla doldurur ve tescil eder.
+#
+# AppTest her çalıştırmada süreç genelindeki Runtime nesnesini değiştirdiği için aynı süreçte
+# iş parçacıklarıyla eşzamanlı kullanılamaz. Eşzamanlılık bu yüzden süreçlerle sağlanır: her
+# işçi süreç öğrencilerini sırayla çalıştırır, tüm süreçler aynı çalışma klasörünü (Excel,
+# derlenmiş depo, SQLite log veritabanı) paylaşır. Her süreç kendi st.cache_resource
+# önbelleklerini kurar; yani ölçülen durum, ortak depoya yazan birden çok uygulama örneğidir.
+#
+# Kullanım: python loadtest.py [öğrenci_sayısı] [eşzamanlılık] [excel_dosyası] [sayfa]
+# Excel verilmezse generator.py ile geçici bir sınıf üretilir. Ağ bağlantısı gerekmez.
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+EXCEL_FILE = "mail_merge_wide_3kalem.xlsx"  # app.py ile aynı (çalışma klasörüne bu adla kopyalanır)
+LOG_DB = "bilge_logs.db"
+SHEET_NAME = "Odev1"
+FAR_DEADLINE = "31.12.2099 23:59"
+STEPS = ["giris", "beyanname", "tescil"]
+RUN_TIMEOUT = 120
+
+
+def _prepare_workdir(student_count, excel_path=None, sheet_name=None, seed=1):
+    # Uygulamanın göreli yollarla çalıştığı geçici klasör: Excel + boş log veritabanı
+    workdir = tempfile.mkdtemp(prefix="bilge-loadtest-")
+    target = os.path.join(workdir, EXCEL_FILE)
+    if excel_path:
+        shutil.copy(excel_path, target)
+    else:
+        students = generator.sample_students(student_count)
+        generator.write_cohort(generator.generate_cohort(students, seed, [(SHEET_NAME, 1, FAR_DEADLINE)]), target)
+        sheet_name = SHEET_NAME
+    return workdir, target, sheet_name
+
+
+def _pick_students(excel_path, sheet_name, count):
+    # Tek faturalı öğrenciler ve beklenen form değerleri (doğru cevaplar)
+    snapshot = data_version.DataSnapshot(excel_path, data_store.ensure_store(excel_path))
+    index = snapshot.student_index()
+    students = []
+    for student_no, rows in index.rows.get(sheet_name, {}).items():
+        if len(rows) != 1:
+            continue
+        record = snapshot.record(sheet_name, rows[0])
+        item_count = grading.item_count_of(record)
+        expected = grading.expected_values(pd.DataFrame([dict(record)]), item_count).iloc[0]
+        answers = {field.form_key: expected[field.id] for field in grading.declaration_fields(item_count)}
+        students.append((student_no, answers))
+        if len(students) >= count:
+            break
+    return students
+
+
+def _form_value(value):
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return value
+
+
+def _fill(at, key, value):
+    for widget_type in (at.text_input, at.text_area):
+        try:
+            widget_type(key=key).input(str(value))
+            return
+        except KeyError:
+            continue
+    at.number_input(key=key).set_value(float(value))
+
+
+def _check(at, step):
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].message}")
+
+
+def simulate_student(student_no, answers, sheet_name):
+    # Tek öğrencinin akışı; adım süreleri (sn) ya da hata mesajı döner
+    timings = {}
+    try:
+        _simulate(student_no, answers, sheet_name, timings)
+    except Exception as e:
+        return student_no, timings, str(e)
+    return student_no, timings, None
+
+
+def _simulate(student_no, answers, sheet_name, timings):
+    at = AppTest.from_file(APP_FILE, default_timeout=RUN_TIMEOUT)
+    at.run()
+    _check(at, "açılış")
+    # Süreç yeni açıldıysa veriler arka planda ısıtılıyor olabilir: giriş formu görünene kadar yenile
+    waited = time.perf_counter()
+    while not at.text_input and time.perf_counter() - waited < RUN_TIMEOUT:
+        time.sleep(0.5)
+        at.run()
+        _check(at, "açılış")
+
+    started = time.perf_counter()
+    at.text_input[0].input(student_no)
+    at.selectbox[0].select(sheet_name)
+    at.button[0].click().run()
+    _check(at, "giris")
+    timings["giris"] = time.perf_counter() - started
+    if not at.session_state.logged_in:
+        raise RuntimeError(f"giris: {student_no} giriş yapamadı")
+
+    started = time.perf_counter()
+    at.sidebar.radio[0].set_value("Dijital Beyanname").run()
+    _check(at, "beyanname")
+    timings["beyanname"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key, value in answers.items():
+        _fill(at, key, _form_value(value))
+    next(b for b in at.button if b.label.startswith("BEYANNAMEYİ TESCİL ET")).click().run()
+    _check(at, "tescil")
+    timings["tescil"] = time.perf_counter() - started
+
+
+def run(student_count=50, concurrency=10, excel_path=None, sheet_name=None):
+    workdir, target, sheet_name = _prepare_workdir(student_count, excel_path, sheet_name)
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if sheet_name is None:
+            sheet_name = data_store.sheet_names(data_store.ensure_store(target))[0]
+        students = _pick_students(target, sheet_name, student_count)
+        timings = {step: [] for step in STEPS}
+        failures = []
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=concurrency, initializer=os.chdir, initargs=(workdir,)) as pool:
+            futures = [pool.submit(simulate_student, no, answers, sheet_name) for no, answers in students]
+            for future in futures:
+                student_no, student_timings, error = future.result()
+                for step, seconds in student_timings.items():
+                    timings[step].append(seconds)
+                if error:
+                    failures.append((student_no, error))
+        elapsed = time.perf_counter() - started
+
+        logged = LogStore(os.path.join(workdir, LOG_DB)).read_submissions()
+        return {
+            "students": len(students),
+            "concurrency": concurrency,
+            "elapsed": elapsed,
+            "timings": timings,
+            "failures": failures,
+            "logged": len(logged),
+            "logged_students": len({r["student_no"] for r in logged}),
+            "successful": sum(1 for r in logged if r["success"]),
+            "missing": sorted({s[0] for s in students} - {str(r["student_no"]) for r in logged}),
+        }
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def report(result):
+    print(f"{result['students']} öğrenci, eşzamanlılık {result['concurrency']}, "
+          f"toplam {result['elapsed']:.1f} sn")
+    print(f"{'adım':<12} {'n':>5} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'en çok (ms)':>12}")
+    for step in STEPS:
+        values = np.array(result["timings"][step]) * 1000
+        if not len(values):
+            print(f"{step:<12} {0:>5}")
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f"{step:<12} {len(values):>5} {p50:>10.0f} {p95:>10.0f} {p99:>10.0f} {values.max():>12.0f}")
+    print(f"verim: {len(result['timings']['tescil']) / result['elapsed']:.2f} tescil/sn")
+    print(f"log kaydı: {result['logged']} teslim, {result['logged_students']} öğrenci, "
+          f"{result['successful']} başarılı")
+    if result["missing"]:
+        print(f"LOGDA OLMAYAN TESLİM: {len(result['missing'])} ({', '.join(result['missing'][:10])})")
+    for student_no, error in result["failures"][:10]:
+        print(f"HATA {student_no}: {error}")
+    return not result["missing"] and not result["failures"]
+
+
+if __name__ == "__main__":
+    # AppTest çalışırken sys.modules["__main__"] uygulama betiğiyle değişir; işçi süreçlere
+    # gönderilen fonksiyonlar bu yüzden "__main__" değil "loadtest" modülünden alınır
+    import loadtest
+
+    ok = loadtest.report(loadtest.run(
+        student_count=int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        concurrency=int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+        excel_path=os.path.abspath(sys.argv[3]) if len(sys.argv) > 3 else None,
+        sheet_name=sys.argv[4] if len(sys.argv) > 4 else None,
+    ))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,409 @@
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import metrics
+
+# Beyanname ve giriş logları için eklemeli (append-only) SQLite deposu.
+# WAL kipinde her kayıt tek bir INSERT'tür: tüm dosyayı yeniden yazmak yoktur ve eşzamanlı
+# Streamlit oturumları birbirinin kaydını ezmez (SQLite kendi dosya kilidini kullanır).
+
+LOG_DB = "bilge_logs.db"
+LOGIN_KEEP = 5000          # Canlı tabloda tutulan giriş denemesi sayısı
+ROTATE_EVERY = 500         # Kaç girişte bir döndürme kontrolü yapılacağı
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+PAGE_SIZE = 50
+EXPORT_CHUNK = 2000        # Dışa aktarımda veritabanından bir seferde okunan satır
+
+# Sayfalı sorgularda izin verilen sıralama sütunları (kullanıcı girdisi SQL'e doğrudan girmez)
+SUBMISSION_SORT_COLUMNS = ("timestamp", "student_no", "student_name", "odev_no", "success", "id")
+LOGIN_SORT_COLUMNS = ("timestamp", "student_no", "odev_no", "status", "id")
+LOGIN_SUMMARY_SORT_COLUMNS = ("last_timestamp", "student_no", "attempts", "status", "odev_no")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    student_no TEXT NOT NULL,
+    student_name TEXT,
+    odev_no TEXT,
+    success INTEGER NOT NULL,
+    errors TEXT NOT NULL DEFAULT '[]',
+    sheet TEXT,
+    invoice_no TEXT,
+    payload TEXT
+);
+CREATE TABLE IF NOT EXISTS logins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    student_no TEXT NOT NULL,
+    odev_no TEXT,
+    status TEXT,
+    details TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_odev_time ON submissions (odev_no, timestamp);
+CREATE INDEX IF NOT EXISTS idx_submissions_student_time ON submissions (student_no, timestamp);
+CREATE INDEX IF NOT EXISTS idx_submissions_time ON submissions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_logins_odev_time ON logins (odev_no, timestamp);
+CREATE INDEX IF NOT EXISTS idx_logins_student_time ON logins (student_no, timestamp);
+CREATE INDEX IF NOT EXISTS idx_logins_time ON logins (timestamp);
+"""
+
+
+def _now():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def _filters(odev_no=None, student_no=None, start=None, end=None):
+    # Ortak WHERE koşulu; zaman damgaları "YYYY-AA-GG SS:DD:ss" metni olduğundan sözlük sırası
+    # zaman sırasıdır ve aralık sorgusu timestamp indeksini kullanır
+    clauses, params = [], []
+    if odev_no is not None:
+        clauses.append("odev_no = ?")
+        params.append(str(odev_no))
+    if student_no:
+        clauses.append("student_no = ?")
+        params.append(str(student_no))
+    if start:
+        clauses.append("timestamp >= ?")
+        params.append(str(start))
+    if end:
+        clauses.append("timestamp <= ?")
+        params.append(str(end))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _order(sort, descending, allowed, tie="id"):
+    # Eşit değerlerde sayfa sınırlarının kaymaması için ikinci anahtar (tie) eklenir
+    if sort not in allowed:
+        raise ValueError(f"Geçersiz sıralama sütunu: {sort}")
+    direction = "DESC" if descending else "ASC"
+    return f" ORDER BY {sort} {direction}, {tie} {direction}"
+
+
+def day_range(first_day=None, last_day=None):
+    # Tarih seçiciden gelen günleri kapsayıcı zaman damgası aralığına çevirir
+    start = f"{first_day:%Y-%m-%d} 00:00:00" if first_day else None
+    end = f"{last_day:%Y-%m-%d} 23:59:59" if last_day else None
+    return start, end
+
+
+class LogStore:
+    def __init__(self, path=LOG_DB, archive_dir=None, login_keep=LOGIN_KEEP):
+        self.path = path
+        self.archive_dir = archive_dir or os.path.join(os.path.dirname(os.path.abspath(path)), "log_archive")
+        self.login_keep = login_keep
+        self._local = threading.local()
+        self._rotate_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Eski şemaya sonradan eklenen sütunlar
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(submissions)").fetchall()}
+            for column in ("sheet", "invoice_no", "payload"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE submissions ADD COLUMN {column} TEXT")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = _Connection(conn)
+            conn = self._local.conn
+        return conn
+
+    # --- Yazma ---
+
+    def append_submission(self, student_no, student_name, odev_no, success, errors, timestamp=None,
+                          sheet=None, invoice_no=None, payload=None):
+        # payload: öğrencinin formdaki tüm alan değerleri (yeniden notlandırma için saklanır)
+        with metrics.timer("log.teslim_yazma"), self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO submissions (timestamp, student_no, student_name, odev_no, success, errors, "
+                "sheet, invoice_no, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (timestamp or _now(), str(student_no), student_name, str(odev_no), int(bool(success)),
+                 json.dumps(list(errors), ensure_ascii=False), sheet,
+                 None if invoice_no is None else str(invoice_no),
+                 None if payload is None else json.dumps(payload, ensure_ascii=False, separators=(",", ":"))),
+            )
+            return cur.lastrowid
+
+    def update_grades(self, grades):
+        # grades: (id, success, errors) üçlüleri; tek bir işlemde yazılır
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "UPDATE submissions SET success = ?, errors = ? WHERE id = ?",
+                [(int(bool(success)), json.dumps(list(errors), ensure_ascii=False), row_id)
+                 for row_id, success, errors in grades],
+            )
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('grades_generation', '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+            )
+
+    def append_login(self, student_no, odev_no, status, details="", timestamp=None):
+        with metrics.timer("log.giris_yazma"), self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO logins (timestamp, student_no, odev_no, status, details) VALUES (?, ?, ?, ?, ?)",
+                (timestamp or _now(), str(student_no), str(odev_no), status, details),
+            )
+            row_id = cur.lastrowid
+        if row_id % ROTATE_EVERY == 0:
+            self.rotate_logins()
+        return row_id
+
+    # --- Okuma ---
+
+    def read_submissions(self, odev_no=None):
+        query = "SELECT id, timestamp, student_no, student_name, odev_no, success, errors FROM submissions"
+        params = ()
+        if odev_no is not None:
+            query += " WHERE odev_no = ?"
+            params = (str(odev_no),)
+        rows = self._connect().execute(query + " ORDER BY id", params).fetchall()
+        return [_submission_dict(row) for row in rows]
+
+    def submissions_after(self, last_id, limit=5000):
+        # Artımlı okuyucular için: verilen id'den sonraki kayıtlar
+        rows = self._connect().execute(
+            "SELECT id, timestamp, student_no, student_name, odev_no, success, errors FROM submissions "
+            "WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, limit),
+        ).fetchall()
+        return [_submission_dict(row) for row in rows]
+
+    def grades_generation(self):
+        # Yeniden notlandırmada artar; eski kayıtlardan türetilen özetlerin geçersiz olduğunu bildirir
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'grades_generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def read_payloads(self):
+        # Form değerleri saklanmış (yeniden notlandırılabilir) teslimler
+        rows = self._connect().execute(
+            "SELECT id, student_no, sheet, invoice_no, payload FROM submissions "
+            "WHERE payload IS NOT NULL AND sheet IS NOT NULL ORDER BY id"
+        ).fetchall()
+        return [dict(row, payload=json.loads(row["payload"])) for row in rows]
+
+    def read_logins(self):
+        rows = self._connect().execute(
+            "SELECT id, timestamp, student_no, odev_no, status, details FROM logins ORDER BY id"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query_submissions(self, odev_no=None, student_no=None, start=None, end=None,
+                          sort="timestamp", descending=True, offset=0, limit=PAGE_SIZE):
+        # Yönetim paneli tablosu: süzme, sıralama ve sayfalama veritabanında yapılır,
+        # yalnızca istenen sayfanın kayıtları okunur (toplam için count_submissions)
+        where, params = _filters(odev_no, student_no, start, end)
+        rows = self._connect().execute(
+            "SELECT id, timestamp, student_no, student_name, odev_no, success, errors FROM submissions"
+            + where + _order(sort, descending, SUBMISSION_SORT_COLUMNS) + " LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return [_submission_dict(row) for row in rows]
+
+    def query_logins(self, odev_no=None, student_no=None, start=None, end=None,
+                     sort="timestamp", descending=True, offset=0, limit=PAGE_SIZE):
+        where, params = _filters(odev_no, student_no, start, end)
+        rows = self._connect().execute(
+            "SELECT id, timestamp, student_no, odev_no, status, details FROM logins"
+            + where + _order(sort, descending, LOGIN_SORT_COLUMNS) + " LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query_login_summary(self, odev_no=None, student_no=None, start=None, end=None,
+                            sort="last_timestamp", descending=True, offset=0, limit=PAGE_SIZE):
+        # Öğrenci başına tek satır: son işlem zamanı, son durum/ödev, toplam deneme.
+        # SQLite'ta MAX(id) ile seçilen çıplak sütunlar en son kaydın değerlerini verir.
+        where, params = _filters(odev_no, student_no, start, end)
+        rows = self._connect().execute(
+            "SELECT student_no, last_timestamp, status, odev_no, attempts FROM ("
+            "SELECT student_no, MAX(id) AS last_id, timestamp AS last_timestamp, status, odev_no, "
+            "COUNT(*) AS attempts FROM logins" + where + " GROUP BY student_no)"
+            + _order(sort, descending, LOGIN_SUMMARY_SORT_COLUMNS, tie="student_no") + " LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_submissions(self, odev_no=None, student_no=None, start=None, end=None):
+        where, params = _filters(odev_no, student_no, start, end)
+        return self._connect().execute("SELECT COUNT(*) FROM submissions" + where, params).fetchone()[0]
+
+    def count_logins(self, odev_no=None, student_no=None, start=None, end=None):
+        where, params = _filters(odev_no, student_no, start, end)
+        return self._connect().execute("SELECT COUNT(*) FROM logins" + where, params).fetchone()[0]
+
+    def count_login_students(self, odev_no=None, student_no=None, start=None, end=None):
+        where, params = _filters(odev_no, student_no, start, end)
+        return self._connect().execute("SELECT COUNT(DISTINCT student_no) FROM logins" + where, params).fetchone()[0]
+
+    # --- Dışa aktarım (parça parça okuma) ---
+
+    def _iter_rows(self, query, params, chunk):
+        cursor = self._connect().execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                return
+            yield from rows
+
+    def iter_submissions(self, odev_no=None, student_no=None, start=None, end=None, chunk=EXPORT_CHUNK):
+        where, params = _filters(odev_no, student_no, start, end)
+        return self._iter_rows(
+            "SELECT id, timestamp, student_no, student_name, odev_no, success, errors FROM submissions"
+            + where + " ORDER BY timestamp DESC, id DESC",
+            params, chunk,
+        )
+
+    def iter_login_summary(self, odev_no=None, student_no=None, start=None, end=None, chunk=EXPORT_CHUNK):
+        where, params = _filters(odev_no, student_no, start, end)
+        return self._iter_rows(
+            "SELECT student_no, MAX(id) AS last_id, timestamp AS last_timestamp, status, odev_no, "
+            "COUNT(*) AS attempts FROM logins" + where + " GROUP BY student_no ORDER BY student_no",
+            params, chunk,
+        )
+
+    def iter_grades(self, odev_no=None, chunk=EXPORT_CHUNK):
+        # Ödev ve öğrenci başına not özeti; ödeve, sonra öğrenci numarasına göre sıralı
+        where, params = _filters(odev_no)
+        return self._iter_rows(
+            "SELECT odev_no, student_no, MAX(student_name) AS student_name, COUNT(*) AS attempts, "
+            "SUM(success) AS successes, MAX(success) AS passed, "
+            "MIN(CASE WHEN success THEN timestamp END) AS first_success, MAX(timestamp) AS last_timestamp "
+            "FROM submissions" + where + " GROUP BY odev_no, student_no ORDER BY odev_no, student_no",
+            params, chunk,
+        )
+
+    def change_marker(self, table):
+        # Tablodan türetilen dosyaların (dışa aktarım önbelleği) geçerliliği: son kayıt id'si ve
+        # teslimler için yeniden notlandırma kuşağı
+        if table == "submissions":
+            last_id = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM submissions").fetchone()[0]
+            return last_id, self.grades_generation()
+        if table == "logins":
+            return (self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM logins").fetchone()[0],)
+        raise ValueError(f"Bilinmeyen tablo: {table}")
+
+    # --- Döndürme ---
+
+    def rotate_logins(self):
+        # En eski kayıtlar silinmez; sıkıştırılmış JSON Lines arşivine taşınır
+        with self._rotate_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                total = conn.execute("SELECT COUNT(*) FROM logins").fetchone()[0]
+                overflow = total - self.login_keep
+                if overflow <= 0:
+                    return None
+                rows = conn.execute(
+                    "SELECT id, timestamp, student_no, odev_no, status, details FROM logins ORDER BY id LIMIT ?",
+                    (overflow,),
+                ).fetchall()
+                os.makedirs(self.archive_dir, exist_ok=True)
+                archive_path = os.path.join(
+                    self.archive_dir,
+                    f"login_logs-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{rows[0]['id']}-{rows[-1]['id']}.jsonl.gz",
+                )
+                with gzip.open(archive_path, "wt", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(dict(row), ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                conn.execute("DELETE FROM logins WHERE id <= ?", (rows[-1]['id'],))
+            return archive_path
+
+    # --- Eski JSON dosyalarından geçiş ---
+
+    def migrate_json(self, log_file=None, login_log_file=None):
+        migrated = {}
+        for kind, path in (("submissions", log_file), ("logins", login_log_file)):
+            if not path or not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                try:
+                    records = json.load(f)
+                except json.JSONDecodeError:
+                    records = []
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                meta_key = f"migrated:{os.path.abspath(path)}"
+                already_migrated = conn.execute("SELECT 1 FROM meta WHERE key = ?", (meta_key,)).fetchone()
+                if already_migrated:
+                    records = []
+                elif kind == "submissions":
+                    conn.executemany(
+                        "INSERT INTO submissions (timestamp, student_no, student_name, odev_no, success, errors) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [(r.get("timestamp", ""), str(r.get("student_no", "")), r.get("student_name"),
+                          str(r.get("odev_no", "")), int(bool(r.get("success"))),
+                          json.dumps(r.get("errors") or [], ensure_ascii=False)) for r in records],
+                    )
+                else:
+                    conn.executemany(
+                        "INSERT INTO logins (timestamp, student_no, odev_no, status, details) VALUES (?, ?, ?, ?, ?)",
+                        [(r.get("timestamp", ""), str(r.get("student_no", "")), str(r.get("odev_no", "")),
+                          r.get("status"), r.get("details", "")) for r in records],
+                    )
+                if not already_migrated:
+                    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (meta_key, _now()))
+            os.replace(path, path + ".migrated")
+            migrated[kind] = len(records)
+        return migrated
+
+
+class _Connection:
+    # sqlite3 bağlantısını "with" bloğunda açık BEGIN/COMMIT ile kullanmak için ince sarmalayıcı
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+    def execute(self, *args):
+        return self.conn.execute(*args)
+
+    def executemany(self, *args):
+        return self.conn.executemany(*args)
+
+    def executescript(self, script):
+        return self.conn.executescript(script)
+
+
+def _submission_dict(row):
+    record = dict(row)
+    record["success"] = bool(record["success"])
+    record["errors"] = json.loads(record["errors"]) if record["errors"] else []
+    return record
+
+
+if __name__ == "__main__":
+    # Kullanım: python log_store.py migrate [student_logs.json] [login_logs.json]
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        log_file = sys.argv[2] if len(sys.argv) > 2 else "student_logs.json"
+        login_file = sys.argv[3] if len(sys.argv) > 3 else "login_logs.json"
+        result = LogStore(LOG_DB).migrate_json(log_file, login_file)
+        print(f"Aktarılan kayıtlar: {result or 'yok'}")
+    else:
+        print("Kullanım: python log_store.py migrate [student_logs.json] [login_logs.json]")
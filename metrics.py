@@ -0,0 +1,201 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+# Sıcak yol ölçümleri: adlandırılmış zamanlayıcılar (histogramlı) ve sayaçlar.
+# Süreç genelinde tek bir kayıt defteri tutulur; Akademisyen Paneli'ndeki "Performans" görünümü
+# ve dışa aktarma (Prometheus metin biçimi / JSONL) buradan okur.
+# BILGE_METRICS=0 ile kapatılır: timer() paylaşılan boş bir bağlam döndürür, count() hemen döner.
+
+ENABLED = os.environ.get("BILGE_METRICS", "1") != "0"
+PROMETHEUS_FILE = "bilge_metrics.prom"
+JSONL_FILE = "bilge_metrics.jsonl"
+
+# Histogram üst sınırları (saniye); Prometheus "le" kovaları
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # son kova: +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        # Kova sınırından yaklaşık yüzdelik (Prometheus histogram_quantile gibi üst sınır)
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def timers(self):
+        # Performans tablosu: aşama -> n, ortalama, p50/p95/p99 (yaklaşık), en çok (ms)
+        with self._lock:
+            rows = []
+            for name, h in sorted(self._histograms.items()):
+                rows.append({
+                    "Aşama": name,
+                    "n": h.count,
+                    "Ortalama (ms)": round(h.total / h.count * 1000, 3) if h.count else 0.0,
+                    "p50 (ms)": round(h.quantile(0.50) * 1000, 3),
+                    "p95 (ms)": round(h.quantile(0.95) * 1000, 3),
+                    "p99 (ms)": round(h.quantile(0.99) * 1000, 3),
+                    "En çok (ms)": round(h.max * 1000, 3),
+                    "Toplam (sn)": round(h.total, 3),
+                })
+            return rows
+
+    def histogram(self, name):
+        # Kova etiketi -> bu kovaya düşen gözlem sayısı
+        with self._lock:
+            h = self._histograms.get(name)
+            if h is None:
+                return {}
+            labels = [f"≤{b * 1000:g} ms" for b in BUCKETS] + [f">{BUCKETS[-1] * 1000:g} ms"]
+            return dict(zip(labels, h.counts))
+
+    def counters(self):
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def hit_rate(self, prefix):
+        # "<önek>.isabet" / "<önek>.iska" sayaçlarından isabet oranı
+        counters = self.counters()
+        hits, misses = counters.get(f"{prefix}.isabet", 0), counters.get(f"{prefix}.iska", 0)
+        return hits / (hits + misses) if hits + misses else None
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            for name, h in sorted(self._histograms.items()):
+                metric = "bilge_" + _metric_name(name) + "_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {h.count}')
+                lines.append(f"{metric}_sum {h.total:.6f}")
+                lines.append(f"{metric}_count {h.count}")
+            for name, value in sorted(self._counters.items()):
+                metric = "bilge_" + _metric_name(name) + "_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path=PROMETHEUS_FILE):
+        # node_exporter textfile toplayıcısı için atomik yazım
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def export_jsonl(self, path=JSONL_FILE, release=None):
+        # Sürümler arası karşılaştırma için her çağrıda bir satır eklenir
+        line = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "since": self.started_at,
+            "release": release,
+            "timers": self.timers(),
+            "counters": self.counters(),
+        }
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return path
+
+
+def _metric_name(name):
+    table = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+    return "".join(c if c.isalnum() else "_" for c in name.translate(table)).lower()
+
+
+METRICS = Metrics()
+
+
+def timer(name):
+    return METRICS.timer(name)
+
+
+def count(name, n=1):
+    METRICS.count(name, n)
+
+
+def start():
+    # Bağlam yöneticisi kullanılamayan yerler için (ör. betiğin başı ve sonu)
+    return time.perf_counter() if METRICS.enabled else None
+
+
+def stop(name, started):
+    if started is not None:
+        METRICS.observe(name, time.perf_counter() - started)
@@ -0,0 +1,232 @@
+import sys
+import threading
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+import data_version
+import grading
+import metrics
+from log_store import LOG_DB, LogStore
+from regrade import match_rows
+from student_index import normalize_student_no
+
+# Saklanan beyannameler üzerinde kopya / ortak çalışma analizi (çevrim dışı iş).
+# Her öğrencinin ödev sayfası ve faturası için son teslimi ele alınır. Beyannamenin parmak izi,
+# alanlarının notlandırmadaki kurallarla kanonikleştirilmiş değerleridir ("alan=değer" jetonları;
+# sayılar NUMERIC_TOLERANCE basamağına yuvarlanır). İki denetim yapılır:
+#
+# 1. Başkasının cevabı: öğrencinin kendi faturasına uymayan bir cevabı, yalnızca tek bir başka
+#    öğrencinin faturasında geçen (ayırt edici) beklenen değere eşitse o öğrenciden alınmış sayılır.
+#    Alan başına beklenen değer -> satır sözlüğü kurulur; her cevap tek bir sözlük aramasıdır.
+#    Aynı kaynaktan en az MIN_COPIED_FIELDS alan alınmışsa rapora girer.
+# 2. Benzer beyanname: jeton kümeleri arasındaki Jaccard benzerliği. Tüm çiftleri (O(n²))
+#    karşılaştırmak yerine MinHash imzaları NUM_BANDS şeride bölünür (LSH); yalnızca en az bir
+#    şeridi aynı olan çiftler aday olur ve gerçek benzerlikleri hesaplanır. Birebir aynı jeton
+#    kümeleri ayrıca gruplanır. Sınıfın büyük bölümünde ortak olan jetonlar (ör. Döviz=USD)
+#    benzerliğe katılmaz.
+
+MIN_COPIED_FIELDS = 3
+SIMILARITY_THRESHOLD = 0.8  # Jaccard; bu değer ve üzeri "benzer beyanname" sayılır
+COMMON_SHARE = 0.5          # teslimlerin bu oranından fazlasında geçen jetonlar ortak sayılır...
+COMMON_MIN = 5              # ...küçük sınıflarda en az bu kadar teslimde geçmek şartıyla
+NUM_BANDS = 16
+BAND_ROWS = 8               # NUM_BANDS x BAND_ROWS = MinHash imza uzunluğu; eşik ~ (1/16)^(1/8) ≈ 0.71
+MAX_BUCKET = 100            # bundan kalabalık şerit kovaları aday üretmez (ortak jetonlardan oluşur)
+PERM_CHUNK = 16             # MinHash hesabında bir seferde işlenen permütasyon sayısı (bellek sınırı)
+SEED = 1
+
+_PRIME = (1 << 31) - 1
+
+COPIED_COLUMNS = ["Ödev", "Öğrenci", "Kaynak Öğrenci", "Kaynak Fatura", "Alan Sayısı", "Alanlar"]
+SIMILAR_COLUMNS = ["Ödev", "Öğrenci", "Diğer Öğrenci", "Benzerlik", "Ortak Cevap", "Aynı"]
+
+# checked: incelenen teslim; unmatched: güncel ödev verisinde karşılığı olmayan teslim;
+# copied / similar: rapor tabloları; created_at: analiz zamanı
+Report = namedtuple("Report", "checked unmatched copied similar created_at")
+
+
+def _tokens(kind, values):
+    # Kanonik değerler -> karşılaştırılabilir jeton değeri (boş cevaplar None)
+    if kind == "number":
+        return np.array([None if np.isnan(v) else f"{v:.2f}" for v in values], dtype=object)
+    return values
+
+
+def minhash(token_sets, num_perm=NUM_BANDS * BAND_ROWS, seed=SEED):
+    # token_sets: boş olmayan tam sayı jeton kümeleri -> (küme sayısı x num_perm) imza matrisi
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, num_perm, dtype=np.int64)
+    b = rng.integers(0, _PRIME, num_perm, dtype=np.int64)
+    lengths = np.array([len(tokens) for tokens in token_sets])
+    flat = np.fromiter((t for tokens in token_sets for t in tokens), dtype=np.int64, count=int(lengths.sum()))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    signature = np.empty((len(token_sets), num_perm), dtype=np.int64)
+    for lo in range(0, num_perm, PERM_CHUNK):
+        hi = min(lo + PERM_CHUNK, num_perm)
+        hashed = (flat[:, None] * a[lo:hi] + b[lo:hi]) % _PRIME
+        signature[:, lo:hi] = np.minimum.reduceat(hashed, starts, axis=0)
+    return signature
+
+
+def lsh_candidates(signature, bands=NUM_BANDS, rows=BAND_ROWS, max_bucket=MAX_BUCKET):
+    # En az bir şeridi birebir aynı olan imza çiftleri (satır konumları, küçük olan önce)
+    pairs = set()
+    for band in range(bands):
+        block = np.ascontiguousarray(signature[:, band * rows:(band + 1) * rows])
+        _, inverse, counts = np.unique(block, axis=0, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse.reshape(-1), kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        for bucket in np.flatnonzero((counts > 1) & (counts <= max_bucket)):
+            members = order[starts[bucket]:starts[bucket] + counts[bucket]]
+            pairs.update(combinations(sorted(members.tolist()), 2))
+    return pairs
+
+
+def _copied_rows(sheet_name, sheet, key, fields, answers, students, rows):
+    # Denetim 1: alan başına ayırt edici beklenen değer -> sahip satır (birden çok öğrencide geçen: -1)
+    owners = sheet['Öğrenci_Numarası'].map(normalize_student_no).to_numpy()
+    invoices = sheet['Fatura_Numarası'].astype(str).to_numpy()
+    matched = np.flatnonzero(~np.isnan(rows))
+    own = rows[matched].astype(int)
+    copied = defaultdict(list)   # (teslim konumu, kaynak satır) -> alan etiketleri
+    for field in fields:
+        expected = _tokens(field.kind, key.values[field.id])
+        index = {}
+        for row, value in enumerate(expected.tolist()):
+            if value is None:
+                continue
+            source = index.get(value)
+            if source is None:
+                index[value] = row
+            elif source >= 0 and owners[source] != owners[row]:
+                index[value] = -1
+        answer = answers[field.id]
+        for i, row in zip(matched.tolist(), own.tolist()):
+            value = answer[i]
+            if value is None or value == expected[row]:
+                continue
+            source = index.get(value, -1)
+            if source >= 0 and owners[source] != students[i]:
+                copied[(i, source)].append(field.label)
+    return [(sheet_name, students[i], owners[source], invoices[source], len(labels), ", ".join(labels))
+            for (i, source), labels in copied.items() if len(labels) >= MIN_COPIED_FIELDS]
+
+
+def _similar_rows(sheet_name, fields, answers, students):
+    # Denetim 2: jeton kümeleri, ortak jetonların ayıklanması, MinHash + LSH adayları, Jaccard doğrulaması
+    n = len(students)
+    vocabulary = {}
+    token_sets = [[] for _ in range(n)]
+    for field in fields:
+        for i, value in enumerate(answers[field.id].tolist()):
+            if value is not None:
+                token_sets[i].append(vocabulary.setdefault((field.id, value), len(vocabulary)))
+    if not vocabulary:
+        return []
+    frequency = np.bincount(np.fromiter((t for tokens in token_sets for t in tokens), dtype=np.int64),
+                            minlength=len(vocabulary))
+    common = frequency > max(COMMON_MIN, COMMON_SHARE * n)
+    token_sets = [frozenset(t for t in tokens if not common[t]) for tokens in token_sets]
+    present = [i for i in range(n) if token_sets[i]]
+    if len(present) < 2:
+        return []
+
+    # Birebir aynı parmak izleri kova sınırına takılmadan eşleşir
+    pairs = set()
+    exact = defaultdict(list)
+    for i in present:
+        exact[token_sets[i]].append(i)
+    for members in exact.values():
+        pairs.update(combinations(members, 2))
+    signature = minhash([sorted(token_sets[i]) for i in present])
+    pairs.update((present[p], present[q]) for p, q in lsh_candidates(signature))
+
+    result = []
+    for i, j in pairs:
+        if students[i] == students[j]:
+            continue
+        shared = len(token_sets[i] & token_sets[j])
+        similarity = shared / len(token_sets[i] | token_sets[j])
+        if similarity >= SIMILARITY_THRESHOLD:
+            result.append((sheet_name, students[i], students[j], round(similarity, 3), shared,
+                           token_sets[i] == token_sets[j]))
+    return result
+
+
+def find_collusion(submissions, snapshot):
+    # submissions: LogStore.read_payloads() kayıtları; snapshot: beklenen değerlerin okunduğu veri sürümü
+    copied, similar = [], []
+    checked = unmatched = 0
+    if submissions:
+        sub_df = pd.DataFrame(submissions)
+        sub_df["_no"] = sub_df["student_no"].map(normalize_student_no)
+        latest = sub_df.drop_duplicates(subset=["sheet", "_no", "invoice_no"], keep="last")
+        for sheet_name, group in latest.groupby("sheet", sort=False):
+            sheet = snapshot.sheet(sheet_name)
+            if sheet is None:
+                unmatched += len(group)
+                continue
+            key = snapshot.answer_key(sheet_name)
+            fields = grading.declaration_fields(key.item_count)
+            rows = match_rows(sheet, group["student_no"], group["invoice_no"])
+            payloads = pd.DataFrame(group["payload"].tolist())
+            empty = np.full(len(group), None, dtype=object)
+            answers = {
+                field.id: _tokens(field.kind, grading.canonical(field.kind, payloads[field.form_key].to_numpy(dtype=object)))
+                if field.form_key in payloads.columns else empty
+                for field in fields
+            }
+            students = group["_no"].to_numpy()
+            checked += len(group)
+            unmatched += int(np.isnan(rows).sum())
+            copied.extend(_copied_rows(sheet_name, sheet, key, fields, answers, students, rows))
+            similar.extend(_similar_rows(sheet_name, fields, answers, students))
+    copied = pd.DataFrame(copied, columns=COPIED_COLUMNS).sort_values(["Alan Sayısı", "Ödev"], ascending=[False, True])
+    similar = pd.DataFrame(similar, columns=SIMILAR_COLUMNS).sort_values(["Benzerlik", "Ödev"], ascending=[False, True])
+    return Report(checked, unmatched, copied.reset_index(drop=True), similar.reset_index(drop=True),
+                  datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def analyze(store, snapshot):
+    with metrics.timer("kopya.analiz"):
+        return find_collusion(store.read_payloads(), snapshot)
+
+
+class ReportCache:
+    # Ders başına son analiz; teslim tablosu ve veri sürümü değişmedikçe yeniden hesaplanmaz
+    def __init__(self):
+        self._entry = None   # ((değişim işareti, veri sürümü), Report)
+        self._lock = threading.Lock()
+
+    @property
+    def last(self):
+        entry = self._entry
+        return None if entry is None else entry[1]
+
+    def report(self, store, snapshot):
+        marker = (store.change_marker("submissions"), snapshot.version)
+        with self._lock:
+            if self._entry is not None and self._entry[0] == marker:
+                metrics.count("kopya.onbellek.isabet")
+                return self._entry[1]
+            metrics.count("kopya.onbellek.iska")
+            report = analyze(store, snapshot)
+            self._entry = (marker, report)
+            return report
+
+
+if __name__ == "__main__":
+    # Kullanım: python plagiarism.py [excel_dosyası] [log_veritabanı]
+    excel_file = sys.argv[1] if len(sys.argv) > 1 else "mail_merge_wide_3kalem.xlsx"
+    log_db = sys.argv[2] if len(sys.argv) > 2 else LOG_DB
+    report = analyze(LogStore(log_db), data_version.DataVersionService(excel_file).wait())
+    print(f"{report.checked} teslim incelendi ({report.unmatched} eşleşmeyen)")
+    with pd.option_context("display.max_rows", None, "display.width", 200, "display.max_colwidth", 80):
+        print(f"\nBaşkasının cevabı ({len(report.copied)}):")
+        print(report.copied.to_string(index=False) if len(report.copied) else "-")
+        print(f"\nBenzer beyanname ({len(report.similar)}):")
+        print(report.similar.to_string(index=False) if len(report.similar) else "-")
@@ -0,0 +1,204 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# Teslim politikası: son teslim tarihleri, ödev takvimleri ve çalışma zamanı kilidi.
+#
+# - Excel'deki 'Son_Teslim' hücreleri veri sürümü başına bir kez ayrıştırılır (deadline_array);
+#   sonuç satır konumuna göre dizinlenmiş epoch saniye dizisidir (NaN: süre sınırı yok).
+# - Ödev takvimi (açılış, kapanış, ek süre) ve kilit dersin klasöründeki policy.json'da tutulur,
+#   Akademisyen Paneli'nden yeniden başlatmadan değiştirilir. Diğer süreçlerin (ör. ikinci uygulama
+#   örneği) yaptığı değişiklikler en geç CHECK_INTERVAL içinde görülür.
+# - "Bu öğrenci şimdi teslim edebilir mi?" sorusu (Policy.check) her istekte ayrıştırma yapmadan,
+#   birkaç karşılaştırmayla yanıtlanır.
+#
+# Takvimde kapanış verilmişse ödevin tüm öğrencileri için Excel'deki Son_Teslim yerine geçer
+# (süre uzatma); ek süre her iki durumda da son teslime eklenir.
+#
+# policy.json biçimi:
+# {"locked": false,
+#  "schedules": {"Odev1": {"open": "01.10.2025 09:00", "close": "21.12.2025 22:00", "grace_minutes": 15}}}
+
+POLICY_FILE = "policy.json"
+CHECK_INTERVAL = 2.0  # saniye; policy.json'un stat kontrolü en fazla bu sıklıkta yapılır
+DATE_FORMAT = "%d.%m.%Y %H:%M"
+DEADLINE_FORMATS = ("%Y-%m-%d %H:%M", "%d.%m.%Y %H:%M", "%Y-%m-%d %H:%M:%S", "%d.%m.%Y %H:%M:%S")
+
+OPEN = "acik"
+LOCKED = "kilitli"
+NOT_OPEN = "baslamadi"
+CLOSED = "sure_doldu"
+
+# allowed: teslim edilebilir mi; reason: yukarıdaki durumlardan biri;
+# at: ilgili zaman (başlamadıysa açılış, değilse etkin son teslim; epoch saniye ya da None)
+Decision = namedtuple("Decision", "allowed reason at")
+Schedule = namedtuple("Schedule", "opens closes grace")  # epoch saniye (ya da None), ek süre saniye
+
+
+def parse_deadline(value):
+    # Son teslim hücresi (metin ya da datetime); boş/okunamayan değer None (süre sınırı yok)
+    if isinstance(value, datetime):
+        return value
+    if value is None or value == "---" or (isinstance(value, float) and np.isnan(value)):
+        return None
+    for fmt in DEADLINE_FORMATS:
+        try:
+            return datetime.strptime(str(value), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def deadline_array(values):
+    # Sayfanın Son_Teslim sütunu -> epoch saniye dizisi; tekil değerler bir kez ayrıştırılır
+    values = pd.Series(values)
+    parsed = {}
+    for value in values.unique():
+        deadline = parse_deadline(value)
+        parsed[value] = np.nan if deadline is None else deadline.timestamp()
+    return values.map(parsed).to_numpy(dtype=float)
+
+
+def format_time(timestamp):
+    if timestamp is None or timestamp != timestamp:
+        return "---"
+    return datetime.fromtimestamp(timestamp).strftime(DATE_FORMAT)
+
+
+def _timestamp(text):
+    return None if not text else datetime.strptime(text, DATE_FORMAT).timestamp()
+
+
+class Policy:
+    def __init__(self, path=POLICY_FILE, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.locked = False
+        self.schedules = {}   # ödev (sayfa adı) -> Schedule
+        self._mtime = None
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- Kalıcı durum ---
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        state = {}
+        if mtime is not None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        schedules = {}
+        for assignment, entry in state.get("schedules", {}).items():
+            schedules[assignment] = Schedule(_timestamp(entry.get("open")), _timestamp(entry.get("close")),
+                                             float(entry.get("grace_minutes", 0)) * 60)
+        # Okuyucular kilitsiz okur: durum tek atamalarla değiştirilir
+        self.schedules = schedules
+        self.locked = bool(state.get("locked", False))
+        self._mtime = mtime
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime != self._mtime:
+            with self._lock:
+                self._load()
+
+    def _save(self):
+        state = {
+            "locked": self.locked,
+            "schedules": {
+                assignment: {
+                    "open": None if s.opens is None else format_time(s.opens),
+                    "close": None if s.closes is None else format_time(s.closes),
+                    "grace_minutes": s.grace / 60,
+                }
+                for assignment, s in self.schedules.items()
+            },
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".policy-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    # --- Değişiklik: diskteki güncel durumun üzerine uygulanır (başka süreçteki değişiklikler korunur) ---
+
+    def set_locked(self, locked):
+        with self._lock:
+            self._load()
+            self.locked = bool(locked)
+            self._save()
+
+    def set_schedule(self, assignment, opens=None, closes=None, grace_minutes=0):
+        # opens/closes: datetime ya da None
+        schedule = Schedule(None if opens is None else opens.timestamp(),
+                            None if closes is None else closes.timestamp(), float(grace_minutes) * 60)
+        with self._lock:
+            self._load()
+            self.schedules = dict(self.schedules, **{assignment: schedule})
+            self._save()
+
+    def clear_schedule(self, assignment):
+        with self._lock:
+            self._load()
+            self.schedules = {name: s for name, s in self.schedules.items() if name != assignment}
+            self._save()
+
+    # --- Karar ---
+
+    def is_locked(self):
+        self._refresh()
+        return self.locked
+
+    def check(self, deadlines, assignment, row, now=None):
+        # deadlines: sayfanın deadline_array sonucu (ya da Son_Teslim sütunu yoksa None)
+        self._refresh()
+        now = time.time() if now is None else now
+        if self.locked:
+            return self._deny(LOCKED, None)
+        deadline = np.nan if deadlines is None else deadlines[row]
+        grace = 0.0
+        schedule = self.schedules.get(assignment)
+        if schedule is not None:
+            if schedule.opens is not None and now < schedule.opens:
+                return self._deny(NOT_OPEN, schedule.opens)
+            if schedule.closes is not None:
+                deadline = schedule.closes
+            grace = schedule.grace
+        if deadline == deadline and now > deadline + grace:
+            return self._deny(CLOSED, float(deadline))
+        return Decision(True, OPEN, None if deadline != deadline else float(deadline))
+
+    def _deny(self, reason, at):
+        metrics.count(f"politika.red.{reason}")
+        return Decision(False, reason, at)
+
+
+if __name__ == "__main__":
+    # Kullanım: python policy.py [policy.json] [kilitle|ac]
+    path = sys.argv[1] if len(sys.argv) > 1 else POLICY_FILE
+    policy = Policy(path)
+    if len(sys.argv) > 2:
+        if sys.argv[2] not in ("kilitle", "ac"):
+            print("Kullanım: python policy.py [policy.json] [kilitle|ac]")
+            sys.exit(1)
+        policy.set_locked(sys.argv[2] == "kilitle")
+    print(f"Kilit: {'etkin (öğrenci erişimi kapalı)' if policy.locked else 'devre dışı'}")
+    for assignment, schedule in sorted(policy.schedules.items()):
+        print(f"{assignment}: açılış {format_time(schedule.opens)} | kapanış {format_time(schedule.closes)} "
+              f"| ek süre {schedule.grace / 60:.0f} dk")
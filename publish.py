@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+# "Canlıyı Güncelle" yayın hattı: yalnızca veri dosyaları (ödev çalışma kitabı, ders ayarları)
+# git ile işlenip uzak depoya gönderilir. İşlem arayüz iş parçacığı dışında çalışır; kısa
+# aralıklarla gelen istekler COALESCE_DELAY kadar beklenip tek bir commit'te birleştirilir.
+# İlerleme ve sonuç geri çağrılarla bildirilir (hoca panelinde kuyruğa konup after() ile okunur).
+# Uzak depo herhangi bir git uzak deposu olabilir; yerel bir --bare depo ile ağsız denenebilir.
+
+REMOTE = "origin"
+BRANCH = "main"
+COALESCE_DELAY = 3.0   # saniye; son istekten sonra bu kadar yeni istek gelmezse yayın başlar
+GIT_TIMEOUT = 120
+
+
+class PublishError(Exception):
+    pass
+
+
+class Publisher:
+    def __init__(self, repo_dir, paths, remote=REMOTE, branch=BRANCH, delay=COALESCE_DELAY,
+                 progress=None, done=None):
+        # progress(oran, mesaj) ve done(sonuç, hata) işçi iş parçacığından çağrılır
+        self.repo_dir = os.path.abspath(repo_dir)
+        self.paths = [os.path.relpath(os.path.abspath(p), self.repo_dir) for p in paths]
+        self.remote = remote
+        self.branch = branch
+        self.delay = delay
+        self.progress = progress
+        self.done = done
+        self._pending = []
+        self._last_request = 0.0
+        self._thread = None
+        self._cond = threading.Condition()
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._thread is not None
+
+    def request(self, reason="Hoca Paneli Güncellemesi"):
+        # Bekleyen ya da sürmekte olan yayın varsa istek bir sonraki commit'e eklenir
+        with self._cond:
+            self._pending.append(reason)
+            self._last_request = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="bilge-publish", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return len(self._pending)
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._pending:
+                        self._thread = None
+                        return
+                    remaining = self._last_request + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                reasons, self._pending = self._pending, []
+            try:
+                result = self.publish(reasons)
+            except Exception as e:
+                if self.done:
+                    self.done(None, e)
+            else:
+                if self.done:
+                    self.done(result, None)
+
+    def _report(self, fraction, message):
+        if self.progress:
+            self.progress(fraction, message)
+
+    def _git(self, *args):
+        completed = subprocess.run(["git", *args], cwd=self.repo_dir, capture_output=True, text=True,
+                                   timeout=GIT_TIMEOUT)
+        if completed.returncode != 0:
+            raise PublishError(f"git {args[0]}: {(completed.stderr or completed.stdout).strip()}")
+        return completed.stdout
+
+    def changed_paths(self):
+        # Yalnızca izlenen veri dosyalarındaki değişiklikler (diğer çalışma ağacı değişiklikleri yok sayılır)
+        # -z: Türkçe karakterli yollar tırnaklanıp kaçışlanmaz
+        entries = iter(self._git("status", "--porcelain", "-z", "--untracked-files=all", "--", *self.paths).split("\0"))
+        changed = []
+        for entry in entries:
+            if not entry:
+                continue
+            changed.append(entry[3:])
+            if entry[0] in "RC":
+                next(entries, None)  # yeniden adlandırmada eski yol ayrı kayıttır
+        return changed
+
+    def publish(self, reasons=("Hoca Paneli Güncellemesi",)):
+        self._report(0.1, "Değişiklikler denetleniyor")
+        changed = self.changed_paths()
+        commit = None
+        if changed:
+            self._report(0.3, f"Hazırlanıyor: {', '.join(changed)}")
+            self._git("add", "--", *changed)
+            message = f"Hoca Paneli Güncellemesi: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            details = sorted(set(reasons) - {"Hoca Paneli Güncellemesi"})
+            if details:
+                message += "\n\n" + "\n".join(f"- {reason}" for reason in details)
+            self._report(0.5, "Commit oluşturuluyor")
+            # Yol verilerek commit: panel dışında hazırlanmış (staged) başka değişiklikler karışmaz
+            self._git("commit", "-m", message, "--", *changed)
+            commit = self._git("rev-parse", "--short", "HEAD").strip()
+        # Önceki başarısız gönderimler de bu adımda tamamlanır
+        self._report(0.7, "Uzak depoya gönderiliyor")
+        self._git("push", self.remote, self.branch)
+        self._report(1.0, "Tamamlandı")
+        return {"commit": commit, "files": changed, "requests": len(reasons)}
+
+
+if __name__ == "__main__":
+    # Kullanım: python publish.py <veri_dosyası> [veri_dosyası ...]
+    if len(sys.argv) < 2:
+        print("Kullanım: python publish.py <veri_dosyası> [veri_dosyası ...]")
+        sys.exit(1)
+    publisher = Publisher(".", sys.argv[1:], progress=lambda fraction, message: print(f"[{fraction:.0%}] {message}"))
+    try:
+        result = publisher.publish()
+    except PublishError as e:
+        print(f"Hata: {e}")
+        sys.exit(1)
+    print(f"Gönderildi: {result['commit'] or 'yeni commit yok'} ({', '.join(result['files']) or 'değişiklik yok'})")
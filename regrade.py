@@ -0,0 +1,134 @@
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import grading
+from log_store import LOG_DB, LogStore
+from student_index import normalize_student_no
+
+# Saklanan tüm beyannameleri güncel ödev verisine göre yeniden notlandırır.
+# "Verileri Karıştır" ya da Excel düzeltmesinden sonra çalıştırılır: teslimler ödev sayfasına
+# göre gruplanır ve her sayfa tek bir grade_batch çağrısıyla notlandırılır. Canlı notlandırmayla
+# aynı sonucu vermesi için beklenen değerler aynı cevap anahtarı derleyicisinden geçer; verilen
+# snapshot Excel'in güncel sürümüyse onun önceden derlenmiş anahtarı kullanılır.
+# Karıştırmadan hemen sonra Excel'in yeniden derlenmesi de bu işe düştüğünden arayüzler işi
+# arka planda çalıştırır: hoca paneli işçi iş parçacığı + kuyrukla, web paneli RegradeJob ile.
+
+
+def match_rows(sheet, student_nos, invoice_nos):
+    # Teslimleri ödev satırına (öğrenci no + fatura no) eşler: satır konumu dizisi, eşleşmeyenler NaN
+    sheet_keys = pd.DataFrame({
+        "_no": sheet['Öğrenci_Numarası'].map(normalize_student_no).to_numpy(),
+        "_invoice": sheet['Fatura_Numarası'].astype(str).to_numpy(),
+        "_row": np.arange(len(sheet)),
+    }).drop_duplicates(subset=["_no", "_invoice"])
+    keys = pd.DataFrame({
+        "_no": pd.Series(student_nos).map(normalize_student_no).to_numpy(),
+        "_invoice": pd.Series(invoice_nos).astype(str).to_numpy(),
+    })
+    return keys.merge(sheet_keys, on=["_no", "_invoice"], how="left")["_row"].to_numpy(dtype=float)
+
+
+def regrade_all(store, excel_path, snapshot=None, progress=None):
+    # progress(oran, mesaj): 0..1 arası ilerleme bildirimi (işçi iş parçacığından çağrılır)
+    def report(fraction, message):
+        if progress:
+            progress(fraction, message)
+
+    report(0.0, "Teslimler okunuyor")
+    submissions = store.read_payloads()
+    summary = {"total": len(submissions), "regraded": 0, "unmatched": 0}
+    if not submissions:
+        report(1.0, "Tamamlandı")
+        return summary
+
+    report(0.1, "Veri deposu derleniyor")
+    manifest = data_store.ensure_store(excel_path)
+    if manifest is None:
+        # Ne Excel ne de daha önce derlenmiş bir depo var
+        raise FileNotFoundError(f"Excel dosyası bulunamadı: {excel_path}")
+    if snapshot is not None and snapshot.version != manifest["version"]:
+        snapshot = None
+    sub_df = pd.DataFrame(submissions)
+    grades = []
+    groups = sub_df.groupby("sheet", sort=False)
+    for n, (sheet_name, group) in enumerate(groups, 1):
+        report(0.2 + 0.7 * (n - 1) / groups.ngroups, f"Notlandırılıyor: {sheet_name}")
+        sheet = data_store.read_sheet(excel_path, manifest, sheet_name)
+        if sheet is None:
+            summary["unmatched"] += len(group)
+            continue
+
+        sheet = sheet.reset_index(drop=True)
+        all_rows = match_rows(sheet, group["student_no"], group["invoice_no"])
+        matched = ~np.isnan(all_rows)
+        summary["unmatched"] += int((~matched).sum())
+        if not matched.any():
+            continue
+
+        payloads = pd.DataFrame(group["payload"].tolist())[matched]
+        rows = all_rows[matched].astype(int)
+        if snapshot is not None:
+            key = snapshot.answer_key(sheet_name).take(rows)
+        else:
+            items = data_store.read_items(excel_path, manifest, sheet_name)
+            expected = data_store.widen(sheet, items, rows) if items is not None else sheet.iloc[rows]
+            key = grading.compile_answer_key(expected)
+        result = grading.grade_batch(payloads, key)
+        grades.extend(zip(group["id"].to_numpy()[matched].tolist(), result.success().tolist(), result.errors()))
+
+    report(0.9, "Notlar kaydediliyor")
+    store.update_grades(grades)
+    summary["regraded"] = len(grades)
+    report(1.0, "Tamamlandı")
+    return summary
+
+
+class RegradeJob:
+    # Ders başına tek bir arka plan yeniden notlandırması; oturumlar durumu okuyarak izler
+    def __init__(self):
+        self.progress = (0.0, "")
+        self.result = None
+        self.error = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, store, excel_path, snapshot=None):
+        # Zaten çalışıyorsa yeni iş başlatılmaz (False döner)
+        with self._lock:
+            if self.running:
+                return False
+            self.progress, self.result, self.error = (0.0, "Başlatılıyor"), None, None
+            self._thread = threading.Thread(target=self._run, args=(store, excel_path, snapshot),
+                                            name="bilge-regrade", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, store, excel_path, snapshot):
+        try:
+            self.result = regrade_all(store, excel_path, snapshot, progress=self._report)
+        except Exception as e:
+            self.error = e
+
+    def _report(self, fraction, message):
+        self.progress = (fraction, message)
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+if __name__ == "__main__":
+    # Kullanım: python regrade.py [excel_dosyası] [log_veritabanı]
+    excel_file = sys.argv[1] if len(sys.argv) > 1 else "mail_merge_wide_3kalem.xlsx"
+    log_db = sys.argv[2] if len(sys.argv) > 2 else LOG_DB
+    result = regrade_all(LogStore(log_db), excel_file)
+    print(f"{result['regraded']} / {result['total']} teslim yeniden notlandırıldı ({result['unmatched']} eşleşmeyen)")
@@ -0,0 +1,308 @@
+import string
+import threading
+from collections import OrderedDict
+
+import metrics
+from data_store import ITEM_COUNT, ITEM_COUNT_COL
+
+# Ticari fatura ve vergi oranı özeti HTML'i. Şablonlar modül yüklenirken bir kez ayrıştırılır
+# (_compile); üretilen HTML (ödev, öğrenci satırı, veri sürümü) anahtarıyla sınırlı bir LRU
+# önbellekte tutulur, böylece her Streamlit yeniden çalıştırmasında yalnızca önbellekten bir
+# metin okunur.
+
+RENDER_CACHE_SIZE = 512
+
+
+INVOICE_HEAD = """<div style="border: 2px solid #004a99; padding: 30px; background-color: white; color: black; font-family: 'Times New Roman', Times, serif; line-height: 1.6;">
+<div style="text-align: center; border-bottom: 3px double #004a99; padding-bottom: 10px; margin-bottom: 20px;">
+<h1 style="color: #004a99; margin: 0; font-size: 28px;">TİCARİ FATURA</h1>
+<div style="font-size: 14px; font-weight: bold;">(COMMERCIAL INVOICE)</div>
+</div>
+
+<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
+<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">İHRACATÇI / SATICI (EXPORTER):</strong>
+<div style="font-size: 14px; white-space: pre-wrap;">{satici}</div>
+</div>
+<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
+<table style="width: 100%; font-size: 14px; border-collapse: collapse;">
+<tr><td style="padding: 3px;"><b>Fatura No:</b></td><td style="padding: 3px;">{f_no}</td></tr>
+<tr><td style="padding: 3px;"><b>Tarih:</b></td><td style="padding: 3px;">{f_tarih}</td></tr>
+<tr><td style="padding: 3px;"><b>Referans:</b></td><td style="padding: 3px;">{ref}</td></tr>
+<tr><td style="padding: 3px;"><b>Döviz:</b></td><td style="padding: 3px;">{doviz}</td></tr>
+<tr><td style="padding: 3px;"><b>Beyanname Türü:</b></td><td style="padding: 3px;">{b_turu}</td></tr>
+<tr><td style="padding: 3px;"><b>Çıkış Rejimi:</b></td><td style="padding: 3px;">{rejimi}</td></tr>
+</table>
+</div>
+</div>
+
+<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
+<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">ALICI / İTHALATÇI (CONSIGNEE):</strong>
+<div style="font-size: 14px; white-space: pre-wrap;">{alici}</div>
+<br>
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">BEYAN SAHİBİ / TEMSİLCİ (DECLARANT):</strong>
+<div style="font-size: 14px; white-space: pre-wrap;">{beyan_sahibi}</div>
+</div>
+<div style="width: 48%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">NAKLİYE VE LOJİSTİK BİLGİLERİ:</strong>
+<div style="font-size: 13px;">
+<b>Menşe Ülke:</b> {mense}<br>
+<b>Gideceği Ülke:</b> {varis}<br>
+<b>İlk Varış Ülkesi:</b> {ilk_varis}<br>
+<b>Ticareti Yapan Ülke:</b> {ticaret_ulke}<br>
+<b>Gümrük İdaresi:</b> {v_gumruk_adi}<br>
+<b>Taşıma Aracı Kimliği:</b> {tasima}<br>
+<b>Yükleme Yeri:</b> {yukleme}<br>
+<b>Taşıma Şekli (Sınır):</b> {t_sinir}<br>
+<b>Taşıma Şekli (Dahili):</b> {t_dahili}<br>
+<b>Konteyner:</b> {konteyner}
+</div>
+</div>
+</div>
+
+<table style="width: 100%; border-collapse: collapse; font-size: 11px; margin-bottom: 20px; border: 1px solid #004a99;">
+<thead>
+<tr style="background-color: #004a99; color: white; text-align: center;">
+<th style="border: 1px solid #004a99; padding: 5px;">Eşyanın Tanımı</th>
+<th style="border: 1px solid #004a99; padding: 5px;">GTİP</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Miktar/Birim</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Net/Brüt (KG)</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Kalem Fiyatı</th>
+<th style="border: 1px solid #004a99; padding: 5px;">İstatistiki Kıymet</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Navlun/Sigorta</th>
+<th style="border: 1px solid #004a99; padding: 5px;">CIF Toplam</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Vergiler</th>
+<th style="border: 1px solid #004a99; padding: 5px;">Genel Toplam</th>
+</tr>
+</thead>
+<tbody>
+"""
+
+ITEM_ROW = """
+<tr>
+<td style="border: 1px solid #ddd; padding: 5px;">{tanim}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">{gtip}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">{kap_adedi} {birim}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">N: {net}<br>B: {brut}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{fiyat:.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{fob:.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: center;">N: {navlun:.2f}<br>S: {sigorta:.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{cif:.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{vergiler:.2f}</td>
+<td style="border: 1px solid #ddd; padding: 5px; text-align: right;">{toplam_tutar:.2f}</td>
+</tr>"""
+
+INVOICE_FOOT = """
+</tbody>
+<tfoot>
+<tr style="font-weight: bold; background-color: #f8f9fa;">
+<td colspan="5" style="text-align: right; border: 1px solid #004a99; padding: 10px;">TOPLAMLAR:</td>
+<td colspan="2" style="border: 1px solid #004a99; padding: 10px; text-align: center;">Net: {net_toplam} KG / Brüt: {brut_toplam} KG</td>
+<td colspan="2" style="border: 1px solid #004a99; padding: 10px; text-align: right;">GENEL TOPLAM ({doviz}):</td>
+<td style="border: 1px solid #004a99; padding: 10px; text-align: right;">{toplam:.2f}</td>
+</tr>
+</tfoot>
+</table>
+
+<div style="display: flex; justify-content: space-between; margin-bottom: 20px;">
+<div style="width: 60%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">ÖDEME VE BANKA BİLGİLERİ:</strong>
+<div style="font-size: 13px;">
+<b>Ödeme Şekli:</b> {odeme_sekli}<br>
+<b>Teslim Şekli:</b> {teslim_sekli}<br>
+<b>Banka Adı:</b> {banka}<br>
+<b>SWIFT Kodu:</b> {swift}<br>
+<b>IBAN:</b> {iban}
+</div>
+</div>
+<div style="width: 35%; border: 1px solid #ccc; padding: 10px;">
+<strong style="color: #004a99; border-bottom: 1px solid #eee; display: block; margin-bottom: 5px;">EK BELGELER:</strong>
+<div style="font-size: 12px;">
+{ek_belgeler}
+</div>
+</div>
+</div>
+
+<div style="margin-top: 30px; display: flex; justify-content: flex-end;">
+<div style="width: 250px; text-align: center; border-top: 1px solid #000; padding-top: 5px;">
+<b style="font-size: 14px;">Yetkili İmza ve Kaşe</b>
+</div>
+</div>
+
+"""
+
+EK_BELGE_LINE = "<b>{i}. Kalem:</b> {kod} ({ref})"
+
+TAX_SUMMARY_HEAD = """<div style="margin-top: 20px; padding: 15px; border: 1px dashed #004a99; background-color: #f0f7ff; font-size: 12px;">
+<strong style="color: #004a99; display: block; margin-bottom: 5px;">📌 ÖNEMLİ NOT: BEYANNAME İÇİN VERGİ ORANLARI VE MATRAH MANTIĞI</strong>
+<p style="margin-bottom: 10px; color: #333;">Beyannameyi doldururken aşağıdaki oranları ve kümülatif vergi matrahı mantığını kullanınız:</p>
+<table style="width: 100%; border-collapse: collapse; text-align: center;">
+<tr style="background-color: #e1ecf7; font-weight: bold;">
+<td style="border: 1px solid #ccc; padding: 5px;">Kalem No</td>
+<td style="border: 1px solid #ccc; padding: 5px;">Gümrük Vergisi (GV)<br><small>(CIF üzerinden)</small></td>
+<td style="border: 1px solid #ccc; padding: 5px;">ÖTV<br><small>(CIF + GV üzerinden)</small></td>
+<td style="border: 1px solid #ccc; padding: 5px;">KDV<br><small>(CIF + GV + ÖTV üzerinden)</small></td>
+</tr>
+"""
+
+RATE_ROW = """
+<tr>
+<td style="border: 1px solid #ccc; padding: 5px;">Kalem {i}</td>
+<td style="border: 1px solid #ccc; padding: 5px;">%{gv}</td>
+<td style="border: 1px solid #ccc; padding: 5px;">%{otv}</td>
+<td style="border: 1px solid #ccc; padding: 5px;">%{kdv}</td>
+</tr>"""
+
+TAX_SUMMARY_FOOT = """
+</table>
+<p style="margin-top: 10px; font-style: italic; color: #555;">* Vergi oranları sistem tarafından otomatik hesaplanmıştır. Lütfen beyannamenizi bu oranlara göre doldurunuz.</p>
+</div>
+</div>"""
+
+
+def _compile(template):
+    # Şablon bir kez ayrıştırılır: (düz metin, alan adı, biçim) parçaları. Çizimde yalnızca alan
+    # değerleri biçimlenip düz metinle birleştirilir; str.format_map ise her çağrıda şablonu
+    # baştan ayrıştırır. Şablonlar yalnızca düz alan adları ve biçim belirteçleri kullanır.
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if conversion or (field is not None and not field.isidentifier()):
+            raise ValueError(f"Desteklenmeyen şablon alanı: {{{field}}}")
+        parts.append((literal, field, spec or ""))
+
+    def render_template(values):
+        out = []
+        for literal, field, spec in parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(values[field], spec))
+        return "".join(out)
+    return render_template
+
+
+_render_head = _compile(INVOICE_HEAD)
+_render_item = _compile(ITEM_ROW)
+_render_foot = _compile(INVOICE_FOOT)
+_render_ek_belge = _compile(EK_BELGE_LINE)
+_render_rate = _compile(RATE_ROW)
+
+
+def _num(data, key):
+    return float(data.get(key, 0))
+
+
+def _item_count(data):
+    return int(data.get(ITEM_COUNT_COL, ITEM_COUNT))
+
+
+def render_invoice(data, item_count=None):
+    # Yalnızca satırda gerçekten bulunan kalemler çizilir
+    item_count = _item_count(data) if item_count is None else item_count
+    get = data.get
+    parts = [_render_head({
+        "satici": get('Gönderici_Adı_Adresi_VergiNo', '---'),
+        "f_no": get('Fatura_Numarası', '---'),
+        "f_tarih": get('Beyan_Tarihi', '---'),
+        "ref": get('Referans_Numarası', '---'),
+        "doviz": get('Döviz', 'USD'),
+        "b_turu": get('Beyanname_Türü', '---'),
+        "rejimi": get('Rejim_Kodu', '---'),
+        "alici": get('Alıcı_Adı_Adresi', '---'),
+        "beyan_sahibi": get('Beyan_Sahibi_Temsilci', '---'),
+        "mense": get('Sevk_Ülkesi_Adı_Kodu', '---'),
+        "varis": get('Gideceği_Ülke_Kodu', '---'),
+        "ilk_varis": get('İlk_Varış_Ülkesi_Kodu', '---'),
+        "ticaret_ulke": get('Ticareti_Yapan_Ülke_Kodu', '---'),
+        "v_gumruk_adi": get('Varış Gümrük İdaresi', '---'),
+        "tasima": get('Taşıma_Aracı_Kimliği', '---'),
+        "yukleme": get('Boşaltma_Yeri', '---'),
+        "t_sinir": get('Taşıma_Şekli_Sınır', '---'),
+        "t_dahili": get('Taşıma_Şekli_Dahili', '---'),
+        "konteyner": "Evet (1)" if str(get('Konteyner_Kodu', '---')) == "1" else "Hayır (0)",
+    })]
+    for i in range(1, item_count + 1):
+        parts.append(_render_item({
+            "tanim": get(f'Ürün_Tanımı_{i}', '---'),
+            "gtip": get(f'GTIP_Kodu_{i}', '---'),
+            "kap_adedi": get(f'Kap_Adedi_{i}', 0),
+            "birim": get(f'Tamamlayıcı_Ölçü_Birimi_{i}', '---'),
+            "net": get(f'Net_Ağırlık_KG_{i}', 0),
+            "brut": get(f'Brüt_Ağırlık_KG_{i}', 0),
+            "fiyat": _num(data, f'Kalem_Fiyatı_{i}'),
+            "fob": _num(data, f'İstatistiki_Kıymet_FOB_{i}'),
+            "navlun": _num(data, f'Navlun_Tutari_{i}'),
+            "sigorta": _num(data, f'Sigorta_Tutari_{i}'),
+            "cif": _num(data, f'CIF_Toplam_{i}'),
+            "vergiler": _num(data, f'Vergiler_Toplami_{i}'),
+            "toplam_tutar": _num(data, f'Toplam_Tutar_{i}'),
+        }))
+    ek_belgeler = "<br>\n".join(
+        _render_ek_belge({"i": i, "kod": get(f'Ek_Belge_Kodu_{i}', '---'), "ref": get(f'Ek_Belge_Referans_{i}', '---')})
+        for i in range(1, item_count + 1)
+    )
+    parts.append(_render_foot({
+        "net_toplam": get('Toplam_Net_Ağırlık_KG', 0),
+        "brut_toplam": get('Toplam_Brüt_Ağırlık_KG', 0),
+        "doviz": get('Döviz', 'USD'),
+        "toplam": _num(data, 'Toplam_Fatura_Değeri'),
+        "odeme_sekli": get('Ödeme_Şekli', '---'),
+        "teslim_sekli": get('Teslim_Şekli_Yeri', '---'),
+        "banka": get('Banka_Adı_Şube', '---'),
+        "swift": get('SWIFT_Kodu', '---'),
+        "iban": get('IBAN', '---'),
+        "ek_belgeler": ek_belgeler,
+    }))
+    parts.append(render_tax_summary(data, item_count))
+    return "".join(parts)
+
+
+def render_tax_summary(data, item_count=None):
+    item_count = _item_count(data) if item_count is None else item_count
+    rows = [TAX_SUMMARY_HEAD]
+    for i in range(1, item_count + 1):
+        # Oranları doğrudan yeni eklenen sütunlardan çek
+        rows.append(_render_rate({
+            "i": i,
+            "gv": int(round(_num(data, f'GV_Orani_{i}'))),
+            "otv": int(round(_num(data, f'ÖTV_Orani_{i}'))),
+            "kdv": int(round(_num(data, f'KDV_Orani_{i}'))),
+        }))
+    rows.append(TAX_SUMMARY_FOOT)
+    return "".join(rows)
+
+
+class RenderCache:
+    # Süreç genelinde paylaşılan, boyutu sınırlı LRU önbellek (en eski kullanılan silinir)
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render_fn, *args):
+        with self._lock:
+            html = self._items.get(key)
+            if html is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                metrics.count("render.onbellek.isabet")
+                return html
+            self.misses += 1
+        metrics.count("render.onbellek.iska")
+        with metrics.timer("render.fatura"):
+            html = render_fn(*args)
+        with self._lock:
+            self._items[key] = html
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return html
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
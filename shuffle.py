@@ -0,0 +1,130 @@
+import os
+import re
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+import data_store
+from grading import tax_columns
+
+# "Verileri Karıştır" motoru. Çalışma kitabı tek seferde okunur, kalem fiyatları tohumlu
+# NumPy RNG ile sütun bazında değiştirilir ve fiyata bağlı tüm sütunlar (FOB, navlun, sigorta,
+# CIF, GV/ÖTV/KDV, toplamlar) vektörel olarak yeniden hesaplanır. Vergi sütunları çalışma
+# kitabındaki anlamlarıyla yazılır (bkz. grading.tax_columns). Sonuç write-only bir çalışma
+# kitabına tek geçişte yazılır ve sütunsal depo hemen derlenir.
+
+PRICE_LOW = 0.9
+PRICE_HIGH = 1.1
+WRITE_CHUNK = 500  # Kaç satırda bir ilerleme bildirileceği
+
+_PRICE_COL = re.compile(r"^Kalem_Fiyatı_(\d+)$")
+# Fiyatla doğru orantılı sütunlar: fiyat k katına çıkarsa bunlar da k katına çıkar
+_SCALED_FIELDS = ['İstatistiki_Kıymet_FOB', 'Navlun_Tutari', 'Sigorta_Tutari', 'CIF_Toplam']
+# Vergi oranları sayfada yoksa vergi sütunları da CIF ile doğru orantılı olarak ölçeklenir
+_TAX_FIELDS = ['GV', 'ÖTV', 'KDV', 'Vergiler_Toplami', 'Toplam_Tutar']
+_RATE_FIELDS = ['GV_Orani', 'ÖTV_Orani', 'KDV_Orani']
+
+
+def item_numbers(columns):
+    return sorted(int(m.group(1)) for m in (_PRICE_COL.match(str(c)) for c in columns) if m)
+
+
+def shuffle_sheet(df, rng, low=PRICE_LOW, high=PRICE_HIGH):
+    df = df.copy()
+    totals = []
+    for i in item_numbers(df.columns):
+        price_col = f'Kalem_Fiyatı_{i}'
+        old_price = pd.to_numeric(df[price_col], errors='coerce').to_numpy(dtype=float)
+        valid = ~np.isnan(old_price)
+        if not valid.any():
+            continue
+
+        new_price = np.round(old_price * rng.uniform(low, high, len(df)), 2)
+        factor = np.divide(new_price, old_price, out=np.ones_like(old_price), where=valid & (old_price != 0))
+        df[price_col] = np.where(valid, new_price, df[price_col])
+
+        def numeric(col):
+            return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+
+        cif_col = f'CIF_Toplam_{i}'
+        has_rates = cif_col in df.columns and all(f'{field}_{i}' in df.columns for field in _RATE_FIELDS)
+        for field in _SCALED_FIELDS if has_rates else _SCALED_FIELDS + _TAX_FIELDS:
+            col = f'{field}_{i}'
+            if col in df.columns:
+                values = numeric(col)
+                df[col] = np.where(valid & ~np.isnan(values), values * factor, df[col])
+
+        if has_rates:
+            # Vergi zinciri cevap anahtarıyla aynı formülle yeniden hesaplanır
+            cif = np.nan_to_num(numeric(cif_col))
+            rates = [np.nan_to_num(numeric(f'{field}_{i}')) for field in _RATE_FIELDS]
+            taxes = tax_columns(i, cif, *rates)
+            for col, values in taxes.items():
+                if col in df.columns:
+                    df[col] = np.where(valid, values, df[col])
+            totals.append(np.where(valid, taxes[f'Toplam_Tutar_{i}'], 0.0))
+        elif f'Toplam_Tutar_{i}' in df.columns:
+            totals.append(np.where(valid, np.nan_to_num(numeric(f'Toplam_Tutar_{i}')), 0.0))
+
+    if totals and 'Toplam_Fatura_Değeri' in df.columns:
+        df['Toplam_Fatura_Değeri'] = np.sum(totals, axis=0)
+    return df
+
+
+def write_workbook(sheets, path, progress=None):
+    # openpyxl write-only kipinde satırlar tek geçişte akıtılır; dosya atomik olarak değiştirilir
+    total_rows = max(1, sum(len(df) for df in sheets.values()))
+    written = 0
+    wb = Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        ws = wb.create_sheet(title=sheet_name)
+        ws.append([str(c) for c in df.columns])
+        # NumPy değerlerini tek seferde Python nesnelerine, boş hücreleri None'a çevir
+        for row in df.astype(object).where(df.notna(), None).to_numpy().tolist():
+            ws.append(row)
+            written += 1
+            if progress and written % WRITE_CHUNK == 0:
+                progress(0.3 + 0.6 * written / total_rows, f"Yazılıyor: {sheet_name}")
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def shuffle_workbook(path, seed=None, low=PRICE_LOW, high=PRICE_HIGH, progress=None, compile_store=True):
+    # progress(oran, mesaj): 0..1 arası ilerleme bildirimi (hoca panelinin ilerleme çubuğu için)
+    seed = int(np.random.SeedSequence(seed).entropy) if seed is None else seed
+    rng = np.random.default_rng(seed)
+    if progress:
+        progress(0.0, "Çalışma kitabı okunuyor")
+    raw_sheets = pd.read_excel(path, sheet_name=None)
+
+    sheets = {}
+    for n, (sheet_name, df) in enumerate(raw_sheets.items(), 1):
+        sheets[sheet_name] = shuffle_sheet(df, rng, low, high)
+        if progress:
+            progress(0.1 + 0.2 * n / len(raw_sheets), f"Karıştırıldı: {sheet_name}")
+
+    write_workbook(sheets, path, progress)
+    if compile_store:
+        if progress:
+            progress(0.95, "Veri deposu derleniyor")
+        data_store.ensure_store(path)
+    if progress:
+        progress(1.0, "Tamamlandı")
+    return {"seed": seed, "sheets": len(sheets), "rows": sum(len(df) for df in sheets.values())}
+
+
+if __name__ == "__main__":
+    # Kullanım: python shuffle.py [excel_dosyası] [tohum]
+    source = sys.argv[1] if len(sys.argv) > 1 else "mail_merge_wide_3kalem.xlsx"
+    result = shuffle_workbook(source, seed=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(f"{result['rows']} satır / {result['sheets']} sayfa karıştırıldı (tohum: {result['seed']})")
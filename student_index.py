@@ -0,0 +1,56 @@
+import data_store
+
+# Öğrenci numarasından satır konumlarına (ve fatura numaralarına) giden ön-hesaplanmış indeks.
+# Veri sürümü başına bir kez kurulur ve tüm oturumlar tarafından paylaşılır; giriş ve
+# teslim durumu sorguları DataFrame taraması yerine sözlük aramasıdır.
+
+INDEX_COLS = ['Öğrenci_Numarası', 'Öğrenci_Ad_Soyad', 'Fatura_Numarası']
+
+
+def normalize_student_no(value):
+    no = str(value).strip()
+    # Excel'de boş hücre içeren sütunlar float okunur: 1222603002.0 -> 1222603002
+    if no.endswith(".0") and no[:-2].isdigit():
+        no = no[:-2]
+    return no
+
+
+class StudentIndex:
+    def __init__(self, version):
+        self.version = version
+        self.rows = {}       # sayfa -> {öğrenci_no: [satır konumları]}
+        self.invoices = {}   # sayfa -> {öğrenci_no: [fatura numaraları]}
+        self.students = {}   # öğrenci_no -> ad soyad (tüm sayfalarda tekil, ilk görülen sırada)
+
+    def add_sheet(self, sheet_name, df):
+        rows = {}
+        invoices = {}
+        numbers = df['Öğrenci_Numarası'].tolist()
+        names = df['Öğrenci_Ad_Soyad'].tolist()
+        invoice_nos = df['Fatura_Numarası'].tolist()
+        for pos, (raw_no, name, invoice_no) in enumerate(zip(numbers, names, invoice_nos)):
+            no = normalize_student_no(raw_no)
+            if not no or no == "---":
+                continue
+            rows.setdefault(no, []).append(pos)
+            invoices.setdefault(no, []).append(invoice_no)
+            self.students.setdefault(no, name)
+        self.rows[sheet_name] = rows
+        self.invoices[sheet_name] = invoices
+
+    def lookup(self, sheet_name, student_no):
+        return self.rows.get(sheet_name, {}).get(normalize_student_no(student_no), [])
+
+    def invoices_for(self, sheet_name, student_no):
+        return self.invoices.get(sheet_name, {}).get(normalize_student_no(student_no), [])
+
+    def has_student(self, student_no):
+        return normalize_student_no(student_no) in self.students
+
+
+def build_index(excel_path, manifest):
+    index = StudentIndex(manifest["version"] if manifest else None)
+    for sheet_name in data_store.sheet_names(manifest):
+        df = data_store.read_sheet(excel_path, manifest, sheet_name, columns=INDEX_COLS)
+        index.add_sheet(sheet_name, df)
+    return index
@@ -0,0 +1,81 @@
+import pytest
+
+import auth
+from auth import Limit, RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_capacity_exhausted_then_refilled(clock):
+    limiter = RateLimiter("test", {"oturum": Limit(3, 0.5)}, clock=clock)
+    assert [limiter.acquire(oturum="a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire(oturum="a") == pytest.approx(2.0)
+    assert limiter.rejected["oturum"] == 1
+    # Başka anahtarın kovası etkilenmez
+    assert limiter.acquire(oturum="b") == 0
+
+    clock.now += 1.0
+    assert limiter.acquire(oturum="a") == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter.acquire(oturum="a") == 0
+    # Uzun beklemeden sonra kova kapasiteyi aşmaz
+    clock.now += 3600
+    assert [limiter.acquire(oturum="a") for _ in range(4)][-1] > 0
+
+
+def test_no_token_spent_when_one_bucket_is_empty(clock):
+    limiter = RateLimiter("test", {"oturum": Limit(5, 1.0), "istemci": Limit(1, 0.1)}, clock=clock)
+    assert limiter.acquire(oturum="a", istemci="10.0.0.1") == 0
+    # İstemci kovası boş: oturum kovasından da jeton düşülmez
+    for _ in range(10):
+        assert limiter.acquire(oturum="a", istemci="10.0.0.1") == pytest.approx(10.0)
+    assert limiter.rejected == {"istemci": 10}
+    assert limiter._level("oturum", "a", clock.now) == pytest.approx(4)
+
+
+def test_none_keys_are_skipped(clock):
+    limiter = RateLimiter("test", {"oturum": Limit(1, 0.1), "istemci": Limit(1, 0.1)}, clock=clock)
+    assert limiter.acquire(oturum="a", istemci=None) == 0
+    assert limiter.acquire(oturum="b", istemci=None) == 0
+
+
+def test_full_buckets_are_pruned(clock, monkeypatch):
+    monkeypatch.setattr(auth, "PRUNE_EVERY", 2)
+    limiter = RateLimiter("test", {"oturum": Limit(2, 1.0)}, clock=clock)
+    limiter.acquire(oturum="a")
+    clock.now += 10
+    limiter.acquire(oturum="b")
+    assert set(limiter._buckets) == {("oturum", "b")}
+
+
+def test_hash_and_verify_password():
+    encoded = auth.hash_password("gizli şifre", iterations=1000)
+    algorithm, iterations, salt, digest = encoded.split("$")
+    assert (algorithm, iterations) == (auth.HASH_ALGORITHM, "1000")
+    assert auth.verify_password("gizli şifre", encoded)
+    assert not auth.verify_password("gizli sifre", encoded)
+    # Her özet kendi tuzunu kullanır
+    assert auth.hash_password("gizli şifre", iterations=1000) != encoded
+
+
+@pytest.mark.parametrize("encoded", [
+    None,
+    "",
+    "pbkdf2_sha256$1000$abcd",
+    "pbkdf2_sha256$bin$00$00",
+    "pbkdf2_sha256$1000$zz$00",
+    "md5$1000$00$00",
+])
+def test_verify_rejects_malformed_hash(encoded):
+    assert not auth.verify_password("şifre", encoded)
@@ -0,0 +1,131 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+import data_version
+import grading
+
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mail_merge_wide_3kalem.xlsx")
+
+
+@pytest.fixture(scope="module")
+def sheets(tmp_path_factory):
+    # Depodaki çalışma kitabı geçici klasörde derlenir; kalemli ödev sayfaları -> geniş düzende
+    # beklenen satırlar (boş yardımcı sayfalar atlanır)
+    path = tmp_path_factory.mktemp("veri") / os.path.basename(WORKBOOK)
+    shutil.copy(WORKBOOK, path)
+    snapshot = data_version.DataSnapshot(str(path), data_store.ensure_store(str(path)))
+    result = {}
+    for sheet_name in snapshot.sheet_names():
+        df, items = snapshot.sheet(sheet_name), snapshot.items(sheet_name)
+        expected = df if items is None else data_store.widen(df, items, np.arange(len(df)))
+        if grading.item_count_of(expected) > 0:
+            result[sheet_name] = expected
+    assert result
+    return result
+
+
+def _submissions(expected):
+    # Doğru cevaplardan başlayıp her üç satırdan ikisine farklı türde hatalar eklenir
+    item_count = grading.item_count_of(expected)
+    submissions = grading.expected_values(expected, item_count).astype(object)
+    for row in range(len(submissions)):
+        if row % 3 == 1:
+            submissions.loc[row, "gtip_1"] = "0000.00.00.00.00"
+            submissions.loc[row, "b_tarihi"] = "01.01.1999"
+        elif row % 3 == 2:
+            submissions.loc[row, "top_fatura"] = grading.canonical_number(submissions.loc[row, "top_fatura"]) + 1
+            submissions.loc[row, "kdv_1"] = None
+    return submissions
+
+
+def test_correct_answers_pass(sheets):
+    for expected in sheets.values():
+        answers = grading.expected_values(expected, grading.item_count_of(expected))
+        assert grading.grade_batch(answers, expected).success().all()
+
+
+def test_grade_batch_matches_grade_single(sheets):
+    for expected in sheets.values():
+        submissions = _submissions(expected)
+        batch = grading.grade_batch(submissions, expected)
+        batch_errors = batch.errors()
+        assert not batch.success()[1::3].any()
+        for row in range(min(len(expected), 30)):
+            single = grading.grade_single(submissions.iloc[row].to_dict(), expected.iloc[row].to_dict())
+            assert single.success()[0] == batch.success()[row]
+            assert single.errors()[0] == batch_errors[row]
+
+
+@pytest.mark.parametrize("kind, given, wanted", [
+    ("code", "8703.23.19.00.00", "870323190000"),
+    ("code", " im ", "IM"),
+    ("code", 4000.0, "4000"),
+    ("code", "---", None),
+    ("text", "  Kapıkule   gümrük  ", "KAPIKULE GÜMRÜK"),
+    ("text", "istanbul", "ISTANBUL"),
+    ("text", "İSTANBUL", "ISTANBUL"),
+    ("text", "", None),
+    ("text", np.nan, None),
+    ("date", "30.11.2025", "2025-11-30"),
+    ("date", "30/11/2025", "2025-11-30"),
+    ("date", "2025-11-30", "2025-11-30"),
+    ("date", pd.Timestamp("2025-11-30 10:15"), "2025-11-30"),
+    ("date", "yarın", "YARIN"),
+])
+def test_canonical_text_kinds(kind, given, wanted):
+    assert grading.CANONICAL[kind](given) == wanted
+
+
+@pytest.mark.parametrize("given, wanted", [
+    ("12,5", 12.5),
+    ("-3,25", -3.25),
+    (" 7.75 ", 7.75),
+    (42, 42.0),
+])
+def test_canonical_number(given, wanted):
+    assert grading.canonical_number(given) == wanted
+
+
+@pytest.mark.parametrize("given", [None, "", "---", "1.234,56", True, np.nan])
+def test_canonical_number_missing(given):
+    assert np.isnan(grading.canonical_number(given))
+
+
+def test_number_tolerance():
+    want = np.array([10.0, 10.0, np.nan])
+    got = grading.canonical("number", ["10,009", "10.02", "abc"])
+    assert grading._matches("number", got, want).tolist() == [True, False, True]
+
+
+def test_compile_answer_key_and_take(sheets):
+    expected = next(iter(sheets.values()))
+    key = grading.compile_answer_key(expected, version="v1")
+    assert len(key) == len(expected) and key.version == "v1"
+    assert key.item_count == grading.item_count_of(expected)
+    assert key.values["b_tarihi"][0] == grading.canonical_date(expected["Beyan_Tarihi"].iloc[0])
+
+    rows = [4, 0, 2]
+    sub = key.take(rows, item_count=1)
+    assert sub.item_count == 1 and len(sub) == 3 and sub.version == "v1"
+    assert set(sub.values) == {field.id for field in grading.declaration_fields(1)}
+    for field in grading.declaration_fields(1):
+        np.testing.assert_array_equal(sub.values[field.id], key.values[field.id][rows])
+    assert sub.display["ref_no"].tolist() == key.display["ref_no"].iloc[rows].tolist()
+    # Kalem sayısı anahtardakinden büyük istenirse anahtarınki kullanılır
+    assert key.take(rows, item_count=99).item_count == key.item_count
+
+
+def test_grading_with_taken_key_matches_full_key(sheets):
+    expected = next(iter(sheets.values()))
+    key = grading.compile_answer_key(expected)
+    submissions = _submissions(expected)
+    full = grading.grade_batch(submissions, key)
+    rows = [1, 2, 3]
+    part = grading.grade_batch(submissions.iloc[rows].reset_index(drop=True), key.take(rows))
+    assert part.success().tolist() == full.success()[rows].tolist()
+    assert part.errors() == [full.errors()[row] for row in rows]
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import policy
+
+DEADLINE = datetime(2025, 12, 1, 22, 0)
+
+
+@pytest.fixture
+def rules(tmp_path):
+    return policy.Policy(str(tmp_path / policy.POLICY_FILE), check_interval=0)
+
+
+@pytest.fixture
+def deadlines():
+    # Satır 0: Excel'de son teslim var; satır 1: süre sınırı yok
+    return policy.deadline_array(["2025-12-01 22:00", "---"])
+
+
+def at(*args):
+    return datetime(*args).timestamp()
+
+
+def test_deadline_array():
+    values = policy.deadline_array(["01.12.2025 22:00", "2025-12-01 22:00:00", None, "yarın", DEADLINE])
+    assert values[0] == values[1] == values[4] == DEADLINE.timestamp()
+    assert np.isnan(values[2:4]).all()
+
+
+def test_open_before_and_closed_after_deadline(rules, deadlines):
+    decision = rules.check(deadlines, "Odev1", 0, now=at(2025, 12, 1, 21, 59))
+    assert decision == policy.Decision(True, policy.OPEN, DEADLINE.timestamp())
+    assert rules.check(deadlines, "Odev1", 0, now=at(2025, 12, 1, 22, 1)) == \
+        policy.Decision(False, policy.CLOSED, DEADLINE.timestamp())
+    assert rules.check(deadlines, "Odev1", 1, now=at(2030, 1, 1)) == policy.Decision(True, policy.OPEN, None)
+    assert rules.check(None, "Odev1", 0, now=at(2030, 1, 1)).allowed
+
+
+def test_locked(rules, deadlines):
+    rules.set_locked(True)
+    assert rules.check(deadlines, "Odev1", 1, now=at(2025, 1, 1)) == policy.Decision(False, policy.LOCKED, None)
+    rules.set_locked(False)
+    assert rules.check(deadlines, "Odev1", 1, now=at(2025, 1, 1)).allowed
+
+
+def test_not_open(rules, deadlines):
+    opens = datetime(2025, 11, 1, 9, 0)
+    rules.set_schedule("Odev1", opens=opens)
+    assert rules.check(deadlines, "Odev1", 0, now=at(2025, 10, 31)) == \
+        policy.Decision(False, policy.NOT_OPEN, opens.timestamp())
+    assert rules.check(deadlines, "Odev1", 0, now=at(2025, 11, 2)).allowed
+    # Takvim yalnızca kendi ödevini etkiler
+    assert rules.check(deadlines, "Odev2", 0, now=at(2025, 10, 31)).allowed
+
+
+def test_grace_period(rules, deadlines):
+    rules.set_schedule("Odev1", grace_minutes=15)
+    assert rules.check(deadlines, "Odev1", 0, now=at(2025, 12, 1, 22, 14)).allowed
+    decision = rules.check(deadlines, "Odev1", 0, now=at(2025, 12, 1, 22, 16))
+    assert decision == policy.Decision(False, policy.CLOSED, DEADLINE.timestamp())
+
+
+def test_schedule_close_overrides_son_teslim(rules, deadlines):
+    extended = datetime(2025, 12, 8, 22, 0)
+    rules.set_schedule("Odev1", closes=extended)
+    assert rules.check(deadlines, "Odev1", 0, now=at(2025, 12, 5)) == \
+        policy.Decision(True, policy.OPEN, extended.timestamp())
+    assert rules.check(deadlines, "Odev1", 1, now=at(2025, 12, 9)).reason == policy.CLOSED
+    rules.clear_schedule("Odev1")
+    assert rules.check(deadlines, "Odev1", 0, now=at(2025, 12, 5)).reason == policy.CLOSED
+
+
+def test_changes_are_seen_by_other_instances(tmp_path, deadlines):
+    path = str(tmp_path / policy.POLICY_FILE)
+    panel, app = policy.Policy(path), policy.Policy(path, check_interval=0)
+    panel.set_locked(True)
+    assert app.is_locked()
+    assert not policy.Policy(path, check_interval=0).check(deadlines, "Odev1", 1).allowed
@@ -0,0 +1,69 @@
+import subprocess
+
+import pytest
+
+from publish import PublishError, Publisher
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repos(tmp_path):
+    # Ağsız uzak depo (--bare) ve onun çalışma kopyası
+    remote = tmp_path / "remote.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "--bare", "-b", "main", str(remote))
+    git(tmp_path, "clone", str(remote), str(work))
+    git(work, "config", "user.name", "test")
+    git(work, "config", "user.email", "test@example.com")
+    git(work, "symbolic-ref", "HEAD", "refs/heads/main")
+    (work / "odev.xlsx").write_bytes(b"v1")
+    git(work, "add", "odev.xlsx")
+    git(work, "commit", "-m", "ilk")
+    git(work, "push", "origin", "main")
+    return remote, work
+
+
+def test_requests_within_delay_are_coalesced_into_one_commit(repos):
+    remote, work = repos
+    results = []
+    publisher = Publisher(work, [work / "odev.xlsx", work / "courses.json"], delay=0.3,
+                          done=lambda result, error: results.append((result, error)))
+    (work / "odev.xlsx").write_bytes(b"v2")
+    (work / "other.txt").write_text("ilgisiz")
+    publisher.request("Karıştırma")
+    (work / "courses.json").write_text("{}")
+    publisher.request("Ders ayarı")
+    publisher.wait(30)
+
+    assert len(results) == 1
+    result, error = results[0]
+    assert error is None
+    assert result["requests"] == 2
+    assert sorted(result["files"]) == ["courses.json", "odev.xlsx"]
+
+    assert git(remote, "rev-list", "--count", "main").strip() == "2"
+    pushed = git(remote, "show", "--name-only", "--format=", "main").split()
+    assert sorted(pushed) == ["courses.json", "odev.xlsx"]
+    message = git(remote, "log", "-1", "--format=%B", "main")
+    assert "- Karıştırma" in message and "- Ders ayarı" in message
+    assert "other.txt" in git(work, "status", "--porcelain")
+
+
+def test_failed_push_reports_publish_error(repos):
+    _, work = repos
+    git(work, "remote", "set-url", "origin", str(work.parent / "yok.git"))
+    results = []
+    publisher = Publisher(work, [work / "odev.xlsx"], delay=0.0,
+                          done=lambda result, error: results.append((result, error)))
+    (work / "odev.xlsx").write_bytes(b"v2")
+    publisher.request()
+    publisher.wait(30)
+
+    assert len(results) == 1
+    result, error = results[0]
+    assert result is None
+    assert isinstance(error, PublishError)
+    assert str(error).startswith("git push")
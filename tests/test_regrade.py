@@ -0,0 +1,22 @@
+import pytest
+
+import regrade
+from log_store import LogStore
+
+
+def test_missing_workbook_is_reported(tmp_path):
+    store = LogStore(str(tmp_path / "logs.db"))
+    store.append_submission("1000000001", "Öğrenci", "Odev1", True, [], sheet="Odev1",
+                            invoice_no="F1", payload={"ref_no": "REF1"})
+    with pytest.raises(FileNotFoundError, match="Excel dosyası bulunamadı"):
+        regrade.regrade_all(store, str(tmp_path / "yok.xlsx"))
+
+    job = regrade.RegradeJob()
+    assert job.start(store, str(tmp_path / "yok.xlsx"))
+    job.wait(30)
+    assert job.result is None and isinstance(job.error, FileNotFoundError)
+
+
+def test_no_submissions_needs_no_workbook(tmp_path):
+    store = LogStore(str(tmp_path / "logs.db"))
+    assert regrade.regrade_all(store, str(tmp_path / "yok.xlsx")) == {"total": 0, "regraded": 0, "unmatched": 0}
@@ -0,0 +1,25 @@
+import pytest
+
+import render
+
+
+def test_compiled_template_matches_format_map():
+    template = "<td>{ad}</td><td>{tutar:.2f}</td><td>%{oran}</td>{{sabit}}"
+    values = {"ad": "Otomobil", "tutar": 1234.567, "oran": 18}
+    assert render._compile(template)(values) == template.format_map(values)
+
+
+@pytest.mark.parametrize("template", ["{ad!r}", "{kalem[0]}", "{kalem.ad}"])
+def test_unsupported_fields_are_rejected(template):
+    with pytest.raises(ValueError):
+        render._compile(template)
+
+
+def test_render_cache_evicts_least_recently_used():
+    cache = render.RenderCache(maxsize=2)
+    cache.get_or_render("a", str.upper, "a")
+    cache.get_or_render("b", str.upper, "b")
+    assert cache.get_or_render("a", str.upper, "yeni") == "A"
+    cache.get_or_render("c", str.upper, "c")
+    assert cache.get_or_render("b", str.upper, "yeni") == "YENI"
+    assert (cache.hits, cache.misses, len(cache)) == (1, 4, 2)